@@ -8,10 +8,15 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from utils.conflict_engine import ConflictEngine
+from utils.cache import TTLCache, stable_fingerprint
+from utils.geo import get_gazetteer
 import os
 
 logger = logging.getLogger(__name__)
 
+ANALYSIS_UNAVAILABLE = "Unable to perform detailed analysis. Please review conflicts and warnings manually."
+
 class ConflictDetectionAgent:
     """Agent for detecting conflicts and unrealistic elements in itineraries"""
     
@@ -20,6 +25,22 @@ class ConflictDetectionAgent:
         self.max_activities_per_day = 4
         self.min_activity_duration = 30  # minutes
         self.max_activity_duration = 12 * 60  # 12 hours in minutes
+        
+        self.gazetteer = get_gazetteer()
+        
+        # Array-based checks (itinerary parsed once per check)
+        self.engine = ConflictEngine(
+            travel_time=self._estimate_travel_time,
+            max_activities_per_day=self.max_activities_per_day,
+            min_activity_duration=self.min_activity_duration,
+            max_activity_duration=self.max_activity_duration
+        )
+        
+        # LLM analyses keyed by itinerary fingerprint, plus in-flight background tasks
+        self.llm_analysis_cache = TTLCache(ttl=3600, max_entries=500)
+        self._analysis_tasks: Dict[str, asyncio.Task] = {}
+        # Failed analyses are remembered briefly for status reporting, never served as results
+        self.failed_analyses = TTLCache(ttl=300, max_entries=500)
     
     def _get_llm_client(self, session_id: str) -> LlmChat:
         """Get LLM client for conflict analysis"""
@@ -31,36 +52,51 @@ class ConflictDetectionAgent:
     
     async def check_itinerary_conflicts(self, 
                                       session_id: str,
-                                      itinerary: List[Dict]) -> Dict[str, Any]:
+                                      itinerary: List[Dict],
+                                      defer_llm: bool = False,
+                                      day_indices: Optional[List[int]] = None,
+                                      modified_days: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         Comprehensive conflict detection for entire itinerary
         
         Args:
             session_id: User session ID
             itinerary: List of day-wise itinerary data
+            defer_llm: Return rule-based results immediately and run LLM analysis in background
+            day_indices: Only check these days (0-based) and their boundaries, e.g. days touched by an edit
+            modified_days: Days changed since the last check (0-based); cached results are reused for the rest
         
         Returns:
             Dict with conflicts, warnings, and suggestions
         """
         try:
-            conflicts = []
-            warnings = []
-            suggestions = []
+            # Per-day and inter-day checks over parsed activity arrays (unchanged days come from cache)
+            issues = self.engine.check(itinerary, day_indices, modified_days)
+            conflicts = issues['conflicts']
+            warnings = issues['warnings']
+            suggestions = issues['suggestions']
             
-            for day_idx, day in enumerate(itinerary):
-                day_conflicts = await self._check_day_conflicts(day, day_idx + 1)
-                conflicts.extend(day_conflicts.get('conflicts', []))
-                warnings.extend(day_conflicts.get('warnings', []))
-                suggestions.extend(day_conflicts.get('suggestions', []))
+            checked_days = None if day_indices is None else sorted({idx for idx in day_indices if 0 <= idx < len(itinerary)})
             
-            # Check inter-day conflicts
-            inter_day_issues = await self._check_inter_day_conflicts(itinerary)
-            conflicts.extend(inter_day_issues.get('conflicts', []))
-            warnings.extend(inter_day_issues.get('warnings', []))
-            suggestions.extend(inter_day_issues.get('suggestions', []))
+            # Scoped checks see only part of the issues, so they get their own analysis
+            analysis_id = issues['fingerprint'] if checked_days is None else stable_fingerprint(issues['fingerprint'], checked_days)
             
-            # Get LLM analysis for complex conflicts
-            llm_analysis = await self._get_llm_conflict_analysis(session_id, itinerary, conflicts, warnings)
+            # LLM analysis only adds value when there are conflicts to explain
+            if not conflicts:
+                llm_analysis = self._get_rule_based_summary(warnings)
+                llm_analysis_status = "skipped"
+            else:
+                llm_analysis = self.llm_analysis_cache.get(analysis_id)
+                if llm_analysis is not None:
+                    llm_analysis_status = "ready"
+                elif defer_llm:
+                    self._start_background_analysis(analysis_id, session_id, itinerary, conflicts, warnings)
+                    llm_analysis_status = "pending"
+                else:
+                    llm_analysis = await self._get_llm_conflict_analysis(session_id, itinerary, conflicts, warnings)
+                    llm_analysis_status = self._record_analysis(analysis_id, llm_analysis)
+                    if llm_analysis is None:
+                        llm_analysis = ANALYSIS_UNAVAILABLE
             
             return {
                 "has_conflicts": len(conflicts) > 0,
@@ -69,8 +105,11 @@ class ConflictDetectionAgent:
                 "warnings": warnings,
                 "suggestions": suggestions,
                 "llm_analysis": llm_analysis,
+                "llm_analysis_status": llm_analysis_status,
+                "analysis_id": analysis_id,
                 "feasibility_score": self._calculate_feasibility_score(conflicts, warnings),
-                "total_issues": len(conflicts) + len(warnings)
+                "total_issues": len(conflicts) + len(warnings),
+                "checked_days": None if checked_days is None else [idx + 1 for idx in checked_days]
             }
             
         except Exception as e:
@@ -82,121 +121,84 @@ class ConflictDetectionAgent:
                 "warnings": [],
                 "suggestions": [],
                 "llm_analysis": "Unable to perform conflict analysis",
+                "llm_analysis_status": "failed",
+                "analysis_id": None,
                 "feasibility_score": 0.7,
                 "total_issues": 0
             }
     
-    async def _check_day_conflicts(self, day: Dict, day_number: int) -> Dict[str, List]:
-        """Check conflicts within a single day"""
-        conflicts = []
-        warnings = []
-        suggestions = []
-        
-        activities = day.get('activities', [])
-        
-        # Check 1: Too many activities
-        if len(activities) > self.max_activities_per_day:
-            conflicts.append({
-                "type": "too_many_activities",
-                "severity": "high",
-                "day": day_number,
-                "message": f"Day {day_number} has {len(activities)} activities (max recommended: {self.max_activities_per_day})",
-                "suggestion": f"Consider moving {len(activities) - self.max_activities_per_day} activities to other days"
-            })
-        
-        # Check 2: Time conflicts and overlaps
-        time_conflicts = self._check_time_overlaps(activities, day_number)
-        conflicts.extend(time_conflicts)
-        
-        # Check 3: Unrealistic travel times
-        travel_warnings = self._check_travel_feasibility(activities, day_number)
-        warnings.extend(travel_warnings)
+    def _get_rule_based_summary(self, warnings: List[Dict]) -> str:
+        """Summary used instead of LLM analysis when no conflicts are detected"""
+        if not warnings:
+            return "Itinerary looks well-structured with no major conflicts detected."
+        return f"No blocking conflicts detected. Review {len(warnings)} warning(s) for a more comfortable pace."
+    
+    def _start_background_analysis(self, analysis_id: str, session_id: str, itinerary: List[Dict],
+                                   conflicts: List[Dict], warnings: List[Dict]):
+        """Start LLM analysis in background (one task per itinerary fingerprint)"""
+        if analysis_id in self._analysis_tasks:
+            return
         
-        # Check 4: Activity duration reasonableness
-        duration_issues = self._check_activity_durations(activities, day_number)
-        warnings.extend(duration_issues)
+        async def run_analysis():
+            try:
+                analysis = await self._get_llm_conflict_analysis(session_id, itinerary, conflicts, warnings)
+                self._record_analysis(analysis_id, analysis)
+                return analysis
+            finally:
+                self._analysis_tasks.pop(analysis_id, None)
         
-        # Check 5: Day overload (total time)
-        total_time_check = self._check_total_day_time(activities, day_number)
-        if total_time_check:
-            warnings.append(total_time_check)
+        self._analysis_tasks[analysis_id] = asyncio.create_task(run_analysis())
+        logger.info(f"🧠 Background conflict analysis started: {analysis_id}")
+    
+    def _record_analysis(self, analysis_id: str, analysis: Optional[str]) -> str:
+        """Cache a successful analysis or note a failure (so the next check retries); returns the status"""
+        if analysis is None:
+            self.failed_analyses.set(analysis_id, True)
+            return "failed"
+        self.llm_analysis_cache.set(analysis_id, analysis)
+        self.failed_analyses.invalidate(analysis_id)
+        return "ready"
+    
+    def get_conflict_analysis(self, analysis_id: str) -> Dict[str, Any]:
+        """Get status ("ready", "pending", "failed" or "not_found") and result of a (possibly background) LLM conflict analysis"""
+        analysis = self.llm_analysis_cache.get(analysis_id)
+        if analysis is not None:
+            status = "ready"
+        elif analysis_id in self._analysis_tasks:
+            status = "pending"
+        elif self.failed_analyses.get(analysis_id) is not None:
+            status = "failed"
+            analysis = ANALYSIS_UNAVAILABLE
+        else:
+            status = "not_found"
         
         return {
-            "conflicts": conflicts,
-            "warnings": warnings,
-            "suggestions": suggestions
+            "analysis_id": analysis_id,
+            "status": status,
+            "llm_analysis": analysis
         }
     
-    def _check_time_overlaps(self, activities: List[Dict], day_number: int) -> List[Dict]:
-        """Check for time overlaps between activities"""
-        conflicts = []
-        
-        # Parse and sort activities by time
-        timed_activities = []
-        for i, activity in enumerate(activities):
-            time_str = activity.get('time', '')
+    async def wait_for_conflict_analysis(self, analysis_id: str, timeout: float = 30.0) -> Dict[str, Any]:
+        """Wait for a background LLM conflict analysis to finish"""
+        task = self._analysis_tasks.get(analysis_id)
+        if task:
             try:
-                # Parse time (assuming format like "9:00 AM", "2:30 PM")
-                time_obj = datetime.strptime(time_str, "%I:%M %p") if time_str else None
-                duration_str = activity.get('duration', '2 hours')
-                duration_minutes = self._parse_duration(duration_str)
-                
-                if time_obj and duration_minutes:
-                    end_time = time_obj + timedelta(minutes=duration_minutes)
-                    timed_activities.append({
-                        "index": i,
-                        "start": time_obj,
-                        "end": end_time,
-                        "activity": activity
-                    })
-            except:
-                continue
-        
-        # Check for overlaps
-        timed_activities.sort(key=lambda x: x['start'])
-        
-        for i in range(len(timed_activities) - 1):
-            current = timed_activities[i]
-            next_activity = timed_activities[i + 1]
-            
-            if current['end'] > next_activity['start']:
-                conflicts.append({
-                    "type": "time_overlap",
-                    "severity": "high",
-                    "day": day_number,
-                    "message": f"Activity '{current['activity']['title']}' overlaps with '{next_activity['activity']['title']}'",
-                    "activities": [current['activity']['title'], next_activity['activity']['title']],
-                    "suggestion": "Adjust timing or reduce duration of activities"
-                })
-        
-        return conflicts
-    
-    def _check_travel_feasibility(self, activities: List[Dict], day_number: int) -> List[Dict]:
-        """Check if travel between locations is feasible"""
-        warnings = []
-        
-        for i in range(len(activities) - 1):
-            current_location = activities[i].get('location', '')
-            next_location = activities[i + 1].get('location', '')
-            
-            if current_location and next_location and current_location != next_location:
-                # Estimate travel time (simple heuristic)
-                estimated_travel = self._estimate_travel_time(current_location, next_location)
-                
-                if estimated_travel > 120:  # More than 2 hours
-                    warnings.append({
-                        "type": "long_travel_time",
-                        "severity": "medium",
-                        "day": day_number,
-                        "message": f"Long travel time (~{estimated_travel//60}h) from {current_location} to {next_location}",
-                        "suggestion": "Consider grouping activities by location or adding buffer time"
-                    })
+                await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Conflict analysis {analysis_id} still pending after {timeout}s")
+            except Exception as e:
+                logger.error(f"Background conflict analysis error: {e}")
         
-        return warnings
+        return self.get_conflict_analysis(analysis_id)
     
     def _estimate_travel_time(self, location1: str, location2: str) -> int:
         """Estimate travel time between locations (in minutes)"""
-        # Simple heuristic - in real implementation, use mapping APIs
+        # Gazetteer travel-time matrix for known POIs
+        travel = self.gazetteer.estimate_travel(location1, location2)
+        if travel:
+            return travel[1]
+        
+        # Simple heuristic for locations not in the gazetteer
         if "airport" in location1.lower() or "airport" in location2.lower():
             return 60  # 1 hour to/from airport
         elif any(word in location1.lower() for word in ["city", "center", "downtown"]):
@@ -204,112 +206,12 @@ class ConflictDetectionAgent:
         else:
             return 45  # Default inter-location travel
     
-    def _parse_duration(self, duration_str: str) -> int:
-        """Parse duration string to minutes"""
-        try:
-            duration_str = duration_str.lower()
-            if 'hour' in duration_str:
-                hours = float(duration_str.split()[0])
-                return int(hours * 60)
-            elif 'minute' in duration_str:
-                minutes = float(duration_str.split()[0])
-                return int(minutes)
-            else:
-                return 120  # Default 2 hours
-        except:
-            return 120
-    
-    def _check_activity_durations(self, activities: List[Dict], day_number: int) -> List[Dict]:
-        """Check if activity durations are reasonable"""
-        warnings = []
-        
-        for activity in activities:
-            duration_str = activity.get('duration', '2 hours')
-            duration_minutes = self._parse_duration(duration_str)
-            
-            if duration_minutes < self.min_activity_duration:
-                warnings.append({
-                    "type": "too_short_activity",
-                    "severity": "low",
-                    "day": day_number,
-                    "message": f"Activity '{activity['title']}' duration ({duration_str}) seems too short",
-                    "suggestion": "Consider extending duration or combining with nearby activities"
-                })
-            elif duration_minutes > self.max_activity_duration:
-                warnings.append({
-                    "type": "too_long_activity",
-                    "severity": "medium",
-                    "day": day_number,
-                    "message": f"Activity '{activity['title']}' duration ({duration_str}) seems too long",
-                    "suggestion": "Consider breaking into multiple activities or reducing duration"
-                })
-        
-        return warnings
-    
-    def _check_total_day_time(self, activities: List[Dict], day_number: int) -> Optional[Dict]:
-        """Check if total day time is reasonable"""
-        total_minutes = sum(self._parse_duration(activity.get('duration', '2 hours')) for activity in activities)
-        total_hours = total_minutes / 60
-        
-        if total_hours > 14:  # More than 14 hours of activities
-            return {
-                "type": "day_overload",
-                "severity": "high",
-                "day": day_number,
-                "message": f"Day {day_number} has {total_hours:.1f} hours of activities (very packed)",
-                "suggestion": "Consider reducing activities or spreading across multiple days"
-            }
-        elif total_hours > 10:  # More than 10 hours
-            return {
-                "type": "busy_day",
-                "severity": "medium",
-                "day": day_number,
-                "message": f"Day {day_number} has {total_hours:.1f} hours of activities (quite busy)",
-                "suggestion": "Ensure adequate rest time between activities"
-            }
-        
-        return None
-    
-    async def _check_inter_day_conflicts(self, itinerary: List[Dict]) -> Dict[str, List]:
-        """Check conflicts between days"""
-        conflicts = []
-        warnings = []
-        
-        for i in range(len(itinerary) - 1):
-            current_day = itinerary[i]
-            next_day = itinerary[i + 1]
-            
-            # Check if last activity of current day and first activity of next day are feasible
-            current_activities = current_day.get('activities', [])
-            next_activities = next_day.get('activities', [])
-            
-            if current_activities and next_activities:
-                last_activity = current_activities[-1]
-                first_activity = next_activities[0]
-                
-                # Check overnight location change
-                last_location = last_activity.get('location', '')
-                first_location = first_activity.get('location', '')
-                
-                if last_location and first_location and last_location != first_location:
-                    travel_time = self._estimate_travel_time(last_location, first_location)
-                    if travel_time > 180:  # More than 3 hours
-                        warnings.append({
-                            "type": "overnight_travel",
-                            "severity": "medium",
-                            "days": [i + 1, i + 2],
-                            "message": f"Long travel required between Day {i+1} and Day {i+2}",
-                            "suggestion": "Consider overnight stay or early start time"
-                        })
-        
-        return {"conflicts": conflicts, "warnings": warnings, "suggestions": []}
-    
     async def _get_llm_conflict_analysis(self, 
                                        session_id: str, 
                                        itinerary: List[Dict], 
                                        conflicts: List[Dict],
-                                       warnings: List[Dict]) -> str:
-        """Get LLM analysis of complex conflicts"""
+                                       warnings: List[Dict]) -> Optional[str]:
+        """Get LLM analysis of complex conflicts (None if the LLM call fails)"""
         try:
             if not conflicts and not warnings:
                 return "Itinerary looks well-structured with no major conflicts detected."
@@ -341,7 +243,7 @@ class ConflictDetectionAgent:
             
         except Exception as e:
             logger.error(f"LLM conflict analysis error: {e}")
-            return "Unable to perform detailed analysis. Please review conflicts and warnings manually."
+            return None
     
     def _calculate_feasibility_score(self, conflicts: List[Dict], warnings: List[Dict]) -> float:
         """Calculate feasibility score (0-1, higher is better)"""
@@ -6,19 +6,27 @@ Flags unrealistic plans with suggestions
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from models.schemas import ItineraryVariant, Activity, CustomizationResponse
+from models.schemas import CustomizationResponse
+from models.internal import ActivityData
 from utils.event_bus import EventBus, EventTypes
 from utils.context_store import ContextStore
+from utils.frozen_itinerary import FrozenDict, freeze, assoc_in, insert_in, remove_in
+from utils.json_patch import make_patch
+from utils.operation_log import OperationLogStore
 
 logger = logging.getLogger(__name__)
 
 class CustomizationAgent:
     """Agent responsible for managing itinerary customizations and edits"""
     
-    def __init__(self, context_store: ContextStore, event_bus: EventBus):
+    def __init__(self, context_store: ContextStore, event_bus: EventBus,
+                 history: Optional[OperationLogStore] = None):
         self.context_store = context_store
         self.event_bus = event_bus
         
+        # Undo/redo history per session itinerary: compact patch records, not itinerary copies
+        self.history = history or OperationLogStore()
+        
         # Subscribe to customization events
         self.event_bus.subscribe(EventTypes.CUSTOMIZATION_REQUESTED, self._handle_customization_request)
     
@@ -54,8 +62,9 @@ class CustomizationAgent:
             if not itinerary_data:
                 raise ValueError(f"Itinerary {itinerary_id} not found")
             
-            # Parse itinerary
-            itinerary = ItineraryVariant(**itinerary_data)
+            # Frozen variant: each edit copies only the changed day/activity path,
+            # and a rejected edit simply keeps the previous snapshot
+            original = itinerary = freeze(itinerary_data)
             
             # Apply each customization
             conflicts = []
@@ -65,6 +74,7 @@ class CustomizationAgent:
                 customization_result = await self._apply_single_customization(
                     itinerary, customization
                 )
+                itinerary = customization_result.get("itinerary", itinerary)
                 conflicts.extend(customization_result.get("conflicts", []))
                 suggestions.extend(customization_result.get("suggestions", []))
             
@@ -77,14 +87,13 @@ class CustomizationAgent:
             itinerary = self._recalculate_totals(itinerary)
             
             # Store updated itinerary
-            self.context_store.add_itinerary(session_id, itinerary.id, itinerary.dict())
+            self.context_store.add_itinerary(session_id, itinerary["id"], itinerary)
             
-            # Log customization
-            self.context_store.add_customization(session_id, {
-                "itinerary_id": itinerary_id,
+            # Log the edit as a patch in the itinerary's operation log
+            self._record_history(session_id, itinerary_id, original, itinerary, {
                 "customizations": customizations,
-                "conflicts": conflicts,
-                "suggestions": suggestions
+                "conflict_count": len(conflicts),
+                "suggestion_count": len(suggestions)
             })
             
             return CustomizationResponse(
@@ -97,11 +106,70 @@ class CustomizationAgent:
             logger.error(f"Customization application error: {e}")
             raise
 
-    async def _apply_single_customization(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply a single customization to the itinerary"""
+    def _record_history(self, session_id: str, itinerary_id: str, before: FrozenDict, after: FrozenDict,
+                        operation_data: Dict[str, Any]):
+        """Append an applied customization to the itinerary's log (restarted if the itinerary changed elsewhere)"""
+        patch = make_patch(before, after)
+        if not patch:
+            return  # Every customization was rejected
+        
+        key = f"{session_id}:{itinerary_id}"
+        log = self.history.get(key)
+        if log is not None and log.state_at(log.cursor) == before:
+            before_version = log.version
+        else:
+            # Unknown version makes the store start a fresh log from `before`
+            before_version = max(log.positions) + 1 if log is not None else 1
+        self.history.record(key, before, before_version, "customize", operation_data, patch, after, before_version + 1)
+
+    def step_history(self, session_id: str, itinerary_id: str, direction: str) -> Dict[str, Any]:
+        """
+        Undo or redo the last customization of a session itinerary
+        
+        Args:
+            session_id: User session ID
+            itinerary_id: Itinerary ID
+            direction: "undo" or "redo"
+        
+        Returns:
+            Dict with the restored itinerary, the RFC 6902 patch from the previous state and undo/redo flags
+        
+        Raises:
+            KeyError: Unknown itinerary or no customization history
+            ValueError: Nothing to undo/redo, or the itinerary changed since its last customization
+        """
+        key = f"{session_id}:{itinerary_id}"
+        log = self.history.get(key)
+        itinerary_data = self.context_store.get_itinerary(session_id, itinerary_id)
+        if log is None or itinerary_data is None:
+            raise KeyError(itinerary_id)
+        
+        current = freeze(itinerary_data)
+        if log.state_at(log.cursor) != current:
+            raise ValueError(f"Itinerary {itinerary_id} changed since its last customization")
+        if not (log.can_undo if direction == "undo" else log.can_redo):
+            raise ValueError(f"Nothing to {direction}")
+        
+        step = log.undo if direction == "undo" else log.redo
+        restored = step(max(log.positions) + 1)
+        self.context_store.add_itinerary(session_id, itinerary_id, restored)
+        logger.info(f"↩️ Customization {direction} on itinerary {itinerary_id}")
+        
+        return {
+            "updated_variant": restored,
+            "patch": make_patch(current, restored),
+            "can_undo": log.can_undo,
+            "can_redo": log.can_redo
+        }
+
+    def get_history(self, session_id: str, itinerary_id: str) -> List[Dict[str, Any]]:
+        """Logged customizations of a session itinerary (oldest first)"""
+        log = self.history.get(f"{session_id}:{itinerary_id}")
+        return log.history() if log is not None else []
+
+    async def _apply_single_customization(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a single customization, returning the edited itinerary with conflicts and suggestions"""
         customization_type = customization.get("type")
-        conflicts = []
-        suggestions = []
         
         if customization_type == "activity_swap":
             result = await self._swap_activity(itinerary, customization)
@@ -120,7 +188,7 @@ class CustomizationAgent:
         
         return result
 
-    async def _swap_activity(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
+    async def _swap_activity(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
         """Swap an activity with another"""
         day_index = customization.get("day") - 1
         activity_index = customization.get("activity_index")
@@ -130,18 +198,18 @@ class CustomizationAgent:
         suggestions = []
         
         try:
-            if day_index >= len(itinerary.daily_itinerary):
+            if day_index >= len(itinerary["daily_itinerary"]):
                 conflicts.append(f"Day {customization.get('day')} does not exist")
                 return {"conflicts": conflicts}
             
-            day = itinerary.daily_itinerary[day_index]
+            day = itinerary["daily_itinerary"][day_index]
             
-            if activity_index >= len(day.activities):
+            if activity_index >= len(day["activities"]):
                 conflicts.append(f"Activity index {activity_index} does not exist on day {customization.get('day')}")
                 return {"conflicts": conflicts}
             
-            # Create new activity
-            new_activity = Activity(**new_activity_data)
+            # Validate only the incoming activity
+            new_activity = freeze(ActivityData.from_dict(new_activity_data).to_dict())
             
             # Check timing conflicts
             timing_conflicts = self._check_timing_conflicts(day, new_activity, activity_index)
@@ -149,15 +217,15 @@ class CustomizationAgent:
             
             if not conflicts:
                 # Replace activity
-                day.activities[activity_index] = new_activity
+                itinerary = assoc_in(itinerary, ("daily_itinerary", day_index, "activities", activity_index), new_activity)
                 suggestions.append(f"Successfully swapped activity on day {customization.get('day')}")
             
         except Exception as e:
             conflicts.append(f"Activity swap error: {str(e)}")
         
-        return {"conflicts": conflicts, "suggestions": suggestions}
+        return {"itinerary": itinerary, "conflicts": conflicts, "suggestions": suggestions}
 
-    async def _add_activity(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
+    async def _add_activity(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new activity to the itinerary"""
         day_index = customization.get("day") - 1
         new_activity_data = customization.get("activity")
@@ -167,15 +235,15 @@ class CustomizationAgent:
         suggestions = []
         
         try:
-            if day_index >= len(itinerary.daily_itinerary):
+            if day_index >= len(itinerary["daily_itinerary"]):
                 conflicts.append(f"Day {customization.get('day')} does not exist")
                 return {"conflicts": conflicts}
             
-            day = itinerary.daily_itinerary[day_index]
-            new_activity = Activity(**new_activity_data)
+            day = itinerary["daily_itinerary"][day_index]
+            new_activity = freeze(ActivityData.from_dict(new_activity_data).to_dict())
             
             # Check daily capacity
-            if len(day.activities) >= 8:
+            if len(day["activities"]) >= 8:
                 conflicts.append(f"Day {customization.get('day')} already has maximum activities (8)")
                 suggestions.append("Consider moving some activities to another day")
                 return {"conflicts": conflicts, "suggestions": suggestions}
@@ -185,18 +253,16 @@ class CustomizationAgent:
             conflicts.extend(timing_conflicts)
             
             if not conflicts:
-                if insert_index == -1:
-                    day.activities.append(new_activity)
-                else:
-                    day.activities.insert(insert_index, new_activity)
+                position = len(day["activities"]) if insert_index == -1 else insert_index
+                itinerary = insert_in(itinerary, ("daily_itinerary", day_index, "activities"), position, new_activity)
                 suggestions.append(f"Successfully added activity to day {customization.get('day')}")
             
         except Exception as e:
             conflicts.append(f"Activity addition error: {str(e)}")
         
-        return {"conflicts": conflicts, "suggestions": suggestions}
+        return {"itinerary": itinerary, "conflicts": conflicts, "suggestions": suggestions}
 
-    async def _remove_activity(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
+    async def _remove_activity(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
         """Remove an activity from the itinerary"""
         day_index = customization.get("day") - 1
         activity_index = customization.get("activity_index")
@@ -205,32 +271,32 @@ class CustomizationAgent:
         suggestions = []
         
         try:
-            if day_index >= len(itinerary.daily_itinerary):
+            if day_index >= len(itinerary["daily_itinerary"]):
                 conflicts.append(f"Day {customization.get('day')} does not exist")
                 return {"conflicts": conflicts}
             
-            day = itinerary.daily_itinerary[day_index]
+            day = itinerary["daily_itinerary"][day_index]
             
-            if activity_index >= len(day.activities):
+            if activity_index >= len(day["activities"]):
                 conflicts.append(f"Activity index {activity_index} does not exist on day {customization.get('day')}")
                 return {"conflicts": conflicts}
             
             # Check minimum activities
-            if len(day.activities) <= 2:
+            if len(day["activities"]) <= 2:
                 conflicts.append(f"Day {customization.get('day')} needs minimum 2 activities")
                 suggestions.append("Consider replacing the activity instead of removing it")
                 return {"conflicts": conflicts, "suggestions": suggestions}
             
             # Remove activity
-            removed_activity = day.activities.pop(activity_index)
-            suggestions.append(f"Successfully removed '{removed_activity.name}' from day {customization.get('day')}")
+            itinerary, removed_activity = remove_in(itinerary, ("daily_itinerary", day_index, "activities"), activity_index)
+            suggestions.append(f"Successfully removed '{removed_activity['name']}' from day {customization.get('day')}")
             
         except Exception as e:
             conflicts.append(f"Activity removal error: {str(e)}")
         
-        return {"conflicts": conflicts, "suggestions": suggestions}
+        return {"itinerary": itinerary, "conflicts": conflicts, "suggestions": suggestions}
 
-    async def _reorder_activities(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
+    async def _reorder_activities(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
         """Reorder activities within a day"""
         day_index = customization.get("day") - 1
         new_order = customization.get("new_order")  # List of activity indices
@@ -239,36 +305,34 @@ class CustomizationAgent:
         suggestions = []
         
         try:
-            if day_index >= len(itinerary.daily_itinerary):
+            if day_index >= len(itinerary["daily_itinerary"]):
                 conflicts.append(f"Day {customization.get('day')} does not exist")
                 return {"conflicts": conflicts}
             
-            day = itinerary.daily_itinerary[day_index]
+            day = itinerary["daily_itinerary"][day_index]
             
-            if len(new_order) != len(day.activities):
+            if len(new_order) != len(day["activities"]):
                 conflicts.append("New order must include all activities")
                 return {"conflicts": conflicts}
             
-            # Reorder activities
-            original_activities = day.activities.copy()
-            day.activities = [original_activities[i] for i in new_order]
+            # Reorder activities on a new day; the original stays untouched if rejected
+            reordered_day = day.set("activities", [day["activities"][i] for i in new_order])
             
             # Check if reordering creates timing conflicts
-            timing_conflicts = self._check_day_timing_flow(day)
+            timing_conflicts = self._check_day_timing_flow(reordered_day)
             if timing_conflicts:
-                # Revert if conflicts
-                day.activities = original_activities
                 conflicts.extend(timing_conflicts)
                 suggestions.append("Consider adjusting activity timings after reordering")
             else:
+                itinerary = assoc_in(itinerary, ("daily_itinerary", day_index), reordered_day)
                 suggestions.append(f"Successfully reordered activities on day {customization.get('day')}")
             
         except Exception as e:
             conflicts.append(f"Activity reordering error: {str(e)}")
         
-        return {"conflicts": conflicts, "suggestions": suggestions}
+        return {"itinerary": itinerary, "conflicts": conflicts, "suggestions": suggestions}
 
-    async def _change_timing(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
+    async def _change_timing(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
         """Change timing of an activity"""
         day_index = customization.get("day") - 1
         activity_index = customization.get("activity_index")
@@ -278,38 +342,36 @@ class CustomizationAgent:
         suggestions = []
         
         try:
-            if day_index >= len(itinerary.daily_itinerary):
+            if day_index >= len(itinerary["daily_itinerary"]):
                 conflicts.append(f"Day {customization.get('day')} does not exist")
                 return {"conflicts": conflicts}
             
-            day = itinerary.daily_itinerary[day_index]
+            day = itinerary["daily_itinerary"][day_index]
             
-            if activity_index >= len(day.activities):
+            if activity_index >= len(day["activities"]):
                 conflicts.append(f"Activity index {activity_index} does not exist on day {customization.get('day')}")
                 return {"conflicts": conflicts}
             
-            activity = day.activities[activity_index]
-            original_time = activity.time
+            activity = day["activities"][activity_index]
             
-            # Update timing
-            activity.time = new_time
+            # Update timing on a new day; the original stays untouched if rejected
+            retimed_day = assoc_in(day, ("activities", activity_index, "time"), new_time)
             
             # Check timing conflicts
-            timing_conflicts = self._check_day_timing_flow(day)
+            timing_conflicts = self._check_day_timing_flow(retimed_day)
             if timing_conflicts:
-                # Revert if conflicts
-                activity.time = original_time
                 conflicts.extend(timing_conflicts)
                 suggestions.append("Consider adjusting other activities' timings to accommodate this change")
             else:
-                suggestions.append(f"Successfully updated timing for '{activity.name}' to {new_time}")
+                itinerary = assoc_in(itinerary, ("daily_itinerary", day_index), retimed_day)
+                suggestions.append(f"Successfully updated timing for '{activity['name']}' to {new_time}")
             
         except Exception as e:
             conflicts.append(f"Timing change error: {str(e)}")
         
-        return {"conflicts": conflicts, "suggestions": suggestions}
+        return {"itinerary": itinerary, "conflicts": conflicts, "suggestions": suggestions}
 
-    async def _adjust_budget(self, itinerary: ItineraryVariant, customization: Dict[str, Any]) -> Dict[str, Any]:
+    async def _adjust_budget(self, itinerary: FrozenDict, customization: Dict[str, Any]) -> Dict[str, Any]:
         """Adjust budget constraints for the itinerary"""
         target_budget = customization.get("target_budget")
         
@@ -317,7 +379,7 @@ class CustomizationAgent:
         suggestions = []
         
         try:
-            current_cost = itinerary.total_cost
+            current_cost = itinerary["total_cost"]
             
             if target_budget < current_cost * 0.5:
                 conflicts.append(f"Target budget ₹{target_budget} is too low (minimum ₹{current_cost * 0.5})")
@@ -332,58 +394,58 @@ class CustomizationAgent:
         
         return {"conflicts": conflicts, "suggestions": suggestions}
 
-    def _check_timing_conflicts(self, day, new_activity: Activity, exclude_index: Optional[int] = None) -> List[str]:
+    def _check_timing_conflicts(self, day: Dict[str, Any], new_activity: Dict[str, Any], exclude_index: Optional[int] = None) -> List[str]:
         """Check for timing conflicts when adding/changing an activity"""
         conflicts = []
         
         try:
-            new_start = datetime.strptime(new_activity.time, "%H:%M")
-            new_duration_hours = self._parse_duration(new_activity.duration)
+            new_start = datetime.strptime(new_activity["time"], "%H:%M")
+            new_duration_hours = self._parse_duration(new_activity["duration"])
             new_end = new_start + timedelta(hours=new_duration_hours)
             
-            for i, existing_activity in enumerate(day.activities):
+            for i, existing_activity in enumerate(day["activities"]):
                 if exclude_index is not None and i == exclude_index:
                     continue
                 
-                existing_start = datetime.strptime(existing_activity.time, "%H:%M")
-                existing_duration_hours = self._parse_duration(existing_activity.duration)
+                existing_start = datetime.strptime(existing_activity["time"], "%H:%M")
+                existing_duration_hours = self._parse_duration(existing_activity["duration"])
                 existing_end = existing_start + timedelta(hours=existing_duration_hours)
                 
                 # Check overlap
                 if not (new_end <= existing_start or new_start >= existing_end):
-                    conflicts.append(f"Timing conflict with '{existing_activity.name}' at {existing_activity.time}")
+                    conflicts.append(f"Timing conflict with '{existing_activity['name']}' at {existing_activity['time']}")
             
         except Exception as e:
             conflicts.append(f"Timing validation error: {str(e)}")
         
         return conflicts
 
-    def _check_day_timing_flow(self, day) -> List[str]:
+    def _check_day_timing_flow(self, day: Dict[str, Any]) -> List[str]:
         """Check the overall timing flow of a day"""
         conflicts = []
         
         try:
             # Sort activities by time
-            sorted_activities = sorted(day.activities, key=lambda x: datetime.strptime(x.time, "%H:%M"))
+            sorted_activities = sorted(day["activities"], key=lambda x: datetime.strptime(x["time"], "%H:%M"))
             
             for i in range(len(sorted_activities) - 1):
                 current_activity = sorted_activities[i]
                 next_activity = sorted_activities[i + 1]
                 
-                current_start = datetime.strptime(current_activity.time, "%H:%M")
-                current_duration = self._parse_duration(current_activity.duration)
+                current_start = datetime.strptime(current_activity["time"], "%H:%M")
+                current_duration = self._parse_duration(current_activity["duration"])
                 current_end = current_start + timedelta(hours=current_duration)
                 
-                next_start = datetime.strptime(next_activity.time, "%H:%M")
+                next_start = datetime.strptime(next_activity["time"], "%H:%M")
                 
                 # Check for overlap
                 if current_end > next_start:
-                    conflicts.append(f"'{current_activity.name}' overlaps with '{next_activity.name}'")
+                    conflicts.append(f"'{current_activity['name']}' overlaps with '{next_activity['name']}'")
                 
                 # Check for reasonable gaps (minimum 30 minutes for transitions)
                 gap = (next_start - current_end).total_seconds() / 60
                 if gap < 30 and gap > 0:
-                    conflicts.append(f"Too little time ({int(gap)} minutes) between '{current_activity.name}' and '{next_activity.name}'")
+                    conflicts.append(f"Too little time ({int(gap)} minutes) between '{current_activity['name']}' and '{next_activity['name']}'")
             
         except Exception as e:
             conflicts.append(f"Day timing flow error: {str(e)}")
@@ -403,36 +465,36 @@ class CustomizationAgent:
         except:
             return 2.0  # Default fallback
 
-    async def _validate_itinerary(self, itinerary: ItineraryVariant) -> Dict[str, Any]:
+    async def _validate_itinerary(self, itinerary: FrozenDict) -> Dict[str, Any]:
         """Validate the entire itinerary for consistency and feasibility"""
         conflicts = []
         suggestions = []
         
         try:
             # Check daily activity counts
-            for day_index, day in enumerate(itinerary.daily_itinerary):
-                if len(day.activities) < 2:
-                    conflicts.append(f"Day {day.day} has too few activities (minimum 2)")
-                elif len(day.activities) > 8:
-                    conflicts.append(f"Day {day.day} has too many activities (maximum 8)")
+            for day_index, day in enumerate(itinerary["daily_itinerary"]):
+                if len(day["activities"]) < 2:
+                    conflicts.append(f"Day {day['day']} has too few activities (minimum 2)")
+                elif len(day["activities"]) > 8:
+                    conflicts.append(f"Day {day['day']} has too many activities (maximum 8)")
                 
                 # Check day timing flow
                 timing_conflicts = self._check_day_timing_flow(day)
                 conflicts.extend(timing_conflicts)
                 
                 # Check realistic daily budget
-                if day.total_cost > 50000:
-                    suggestions.append(f"Day {day.day} budget is very high (₹{day.total_cost})")
-                elif day.total_cost < 2000:
-                    suggestions.append(f"Day {day.day} budget seems low (₹{day.total_cost})")
+                if day["total_cost"] > 50000:
+                    suggestions.append(f"Day {day['day']} budget is very high (₹{day['total_cost']})")
+                elif day["total_cost"] < 2000:
+                    suggestions.append(f"Day {day['day']} budget seems low (₹{day['total_cost']})")
             
             # Check overall itinerary balance
-            activity_types = [activity.type.value for day in itinerary.daily_itinerary for activity in day.activities]
+            activity_types = [self._activity_type(activity) for day in itinerary["daily_itinerary"] for activity in day["activities"]]
             
-            if activity_types.count("dining") < itinerary.days:
+            if activity_types.count("dining") < itinerary["days"]:
                 suggestions.append("Consider adding more dining experiences")
             
-            if activity_types.count("relaxation") == 0 and itinerary.days > 3:
+            if activity_types.count("relaxation") == 0 and itinerary["days"] > 3:
                 suggestions.append("Consider adding relaxation activities for longer trips")
             
         except Exception as e:
@@ -440,25 +502,35 @@ class CustomizationAgent:
         
         return {"conflicts": conflicts, "suggestions": suggestions}
 
-    def _recalculate_totals(self, itinerary: ItineraryVariant) -> ItineraryVariant:
-        """Recalculate totals after customizations"""
+    def _activity_type(self, activity: Dict[str, Any]) -> str:
+        """Activity type as a plain string (enum or str)"""
+        activity_type = activity.get("type")
+        return getattr(activity_type, "value", activity_type)
+
+    def _recalculate_totals(self, itinerary: FrozenDict) -> FrozenDict:
+        """Recalculate totals after customizations (days whose total is unchanged stay shared)"""
         try:
             # Recalculate daily totals
-            for day in itinerary.daily_itinerary:
-                day.total_cost = sum(activity.cost for activity in day.activities)
+            daily_itinerary = tuple(
+                day if day.get("total_cost") == day_total else day.set("total_cost", day_total)
+                for day, day_total in (
+                    (day, sum(activity["cost"] for activity in day["activities"]))
+                    for day in itinerary["daily_itinerary"]
+                )
+            )
             
             # Recalculate itinerary totals
-            itinerary.total_cost = sum(day.total_cost for day in itinerary.daily_itinerary)
-            itinerary.total_activities = sum(len(day.activities) for day in itinerary.daily_itinerary)
-            
-            # Update activity types
-            activity_types = list(set([
-                activity.type.value for day in itinerary.daily_itinerary 
-                for activity in day.activities
-            ]))
-            itinerary.activity_types = activity_types
+            itinerary = itinerary.merge({
+                "daily_itinerary": daily_itinerary,
+                "total_cost": sum(day["total_cost"] for day in daily_itinerary),
+                "total_activities": sum(len(day["activities"]) for day in daily_itinerary),
+                "activity_types": list(set([
+                    self._activity_type(activity) for day in daily_itinerary
+                    for activity in day["activities"]
+                ]))
+            })
             
         except Exception as e:
             logger.error(f"Total recalculation error: {e}")
         
-        return itinerary
\ No newline at end of file
+        return itinerary
@@ -4,11 +4,14 @@ Handles base pricing, dynamic adjustments, competitor analysis, and profile-base
 """
 
 import asyncio
+import copy
 import random
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from utils.cache import TTLCache, stable_fingerprint
+from utils.seasonality import get_seasonality_table, parse_travel_date
 import os
 
 logger = logging.getLogger(__name__)
@@ -39,6 +42,80 @@ class DynamicPricingAgent:
             "gold": {"discount": 0.15, "threshold": 50000},    # 15% discount
             "platinum": {"discount": 0.20, "threshold": 100000} # 20% discount
         }
+        
+        # Shared (destination, month) season table
+        self.seasonality = get_seasonality_table()
+        
+        # Quote cache keyed by itinerary fingerprint (15 minute quotes)
+        self.quote_cache = TTLCache(ttl=900, max_entries=500)
+        
+        # Competitor snapshots are reused until they expire so repeat quotes stay stable
+        self.competitor_snapshots = TTLCache(ttl=1800, max_entries=200)
+        
+        self.rates_version = self._compute_rates_version()
+    
+    def _compute_rates_version(self) -> str:
+        """Fingerprint of all rate tables used in quotes"""
+        return stable_fingerprint(self.base_rates, self.demand_multipliers, self.loyalty_tiers)
+    
+    def get_quote_fingerprint(self, itinerary: List[Dict], traveler_profile: Dict, travel_dates: Dict) -> str:
+        """Stable hash of priced line items, profile pricing attributes and travel dates"""
+        line_items = [
+            [
+                (activity.get('title'), activity.get('category'), activity.get('duration'), activity.get('location'))
+                for activity in day.get('activities', [])
+            ]
+            for day in itinerary
+        ]
+        return stable_fingerprint(
+            line_items,
+            self._get_profile_pricing_attributes(traveler_profile),
+            self._get_quote_dates(travel_dates),
+            self.rates_version
+        )
+    
+    def _get_profile_pricing_attributes(self, traveler_profile: Dict) -> Dict:
+        """Profile fields that affect quoted prices"""
+        return {
+            "budget_level": traveler_profile.get('budget_level', 'moderate'),
+            "spending_history": traveler_profile.get('spending_history', 0),
+            "propensity_to_pay": traveler_profile.get('propensity_to_pay', 'medium')
+        }
+    
+    def _get_quote_dates(self, travel_dates: Dict) -> Dict:
+        """Travel date fields that affect quoted prices"""
+        return {
+            "start_date": travel_dates.get('start_date'),
+            "end_date": travel_dates.get('end_date')
+        }
+    
+    def get_cached_quote(self, quote_id: str) -> Optional[Dict[str, Any]]:
+        """Get a cached quote if it is still valid for current rates and competitor snapshot"""
+        if not quote_id:
+            return None
+        
+        quote = self.quote_cache.get(quote_id)
+        if not quote:
+            return None
+        
+        if quote.get("rates_version") != self.rates_version:
+            self.quote_cache.invalidate(quote_id)
+            return None
+        
+        snapshot = self.competitor_snapshots.get(quote.get("competitor_snapshot_key", ""))
+        if not snapshot or snapshot.get("snapshot_id") != quote.get("competitor_snapshot_id"):
+            self.quote_cache.invalidate(quote_id)
+            return None
+        
+        # Callers get their own copy so edits to a response never reach the cache
+        return copy.deepcopy(quote)
+    
+    def update_base_rates(self, category: str, rates: Dict[str, float]):
+        """Update base rates for a category and invalidate existing quotes"""
+        self.base_rates.setdefault(category, {}).update(rates)
+        self.rates_version = self._compute_rates_version()
+        self.quote_cache.clear()
+        logger.info(f"💰 Base rates updated for {category}, quote cache invalidated")
     
     def _get_llm_client(self, session_id: str) -> LlmChat:
         """Get LLM client for pricing analysis"""
@@ -66,6 +143,13 @@ class DynamicPricingAgent:
             Complete pricing breakdown with discounts and justifications
         """
         try:
+            # Repeat requests for the same itinerary reuse the exact quote
+            quote_id = self.get_quote_fingerprint(itinerary, traveler_profile, travel_dates)
+            cached_quote = self.get_cached_quote(quote_id)
+            if cached_quote:
+                logger.info(f"⚡ QUOTE CACHE HIT: {quote_id}")
+                return cached_quote
+            
             pricing_breakdown = {
                 "base_total": 0,
                 "adjusted_total": 0,
@@ -127,12 +211,173 @@ class DynamicPricingAgent:
                 )
             })
             
+            # Cache quote for repeat views and checkout
+            quoted_at = datetime.now()
+            pricing_breakdown.update({
+                "quote_id": quote_id,
+                "quoted_at": quoted_at.isoformat(),
+                "quote_expires_at": (quoted_at + timedelta(seconds=self.quote_cache.ttl)).isoformat(),
+                "rates_version": self.rates_version,
+                "competitor_snapshot_key": competitor_data.get("snapshot_key"),
+                "competitor_snapshot_id": competitor_data.get("snapshot_id"),
+                "profile_attributes": self._get_profile_pricing_attributes(traveler_profile),
+                "travel_dates": self._get_quote_dates(travel_dates),
+                "pricing_factors": {
+                    "budget_level": traveler_profile.get('budget_level', 'moderate'),
+                    "demand_multiplier": demand_analysis.get("multiplier", 1.0),
+                    "competitive_multiplier": self._get_competitive_multiplier(competitor_data)
+                }
+            })
+            self.quote_cache.set(quote_id, copy.deepcopy(pricing_breakdown))
+            
             return pricing_breakdown
             
         except Exception as e:
             logger.error(f"Dynamic pricing calculation error: {e}")
             return self._get_fallback_pricing(itinerary)
     
+    async def reprice_itinerary(self,
+                              session_id: str,
+                              quote_id: str,
+                              itinerary: List[Dict],
+                              traveler_profile: Dict,
+                              travel_dates: Dict) -> Dict[str, Any]:
+        """
+        Reprice an edited itinerary against a previous quote
+        
+        Only added or changed line items are priced; unchanged items keep their
+        quoted prices and totals are adjusted by the delta.
+        
+        Args:
+            session_id: User session ID
+            quote_id: Quote the itinerary was previously priced with
+            itinerary: Edited itinerary with activities
+            traveler_profile: User profile with budget preferences and history
+            travel_dates: Start and end dates for travel
+        
+        Returns:
+            Pricing breakdown for the edited itinerary with a delta summary
+        """
+        try:
+            previous_quote = self.get_cached_quote(quote_id)
+            new_quote_id = self.get_quote_fingerprint(itinerary, traveler_profile, travel_dates)
+            
+            if not previous_quote or "pricing_factors" not in previous_quote:
+                logger.info(f"💰 No reusable quote for {quote_id}, running full pricing")
+                return await self.calculate_dynamic_pricing(session_id, itinerary, traveler_profile, travel_dates)
+            
+            cached_quote = self.get_cached_quote(new_quote_id)
+            if cached_quote:
+                return cached_quote
+            
+            # Demand and competitor factors only hold while dates, profile and destinations match
+            # (demand follows the first located activity, so it is re-derived from the edited itinerary)
+            factors = previous_quote["pricing_factors"]
+            competitor_data = await self._get_competitor_analysis(session_id, itinerary, travel_dates)
+            demand_analysis = await self._analyze_demand(travel_dates, itinerary)
+            if (competitor_data.get("snapshot_id") != previous_quote.get("competitor_snapshot_id") or
+                    demand_analysis.get("multiplier") != factors["demand_multiplier"] or
+                    previous_quote.get("travel_dates") != self._get_quote_dates(travel_dates) or
+                    previous_quote.get("profile_attributes") != self._get_profile_pricing_attributes(traveler_profile)):
+                return await self.calculate_dynamic_pricing(session_id, itinerary, traveler_profile, travel_dates)
+            
+            demand_multiplier = factors["demand_multiplier"]
+            competitive_multiplier = factors["competitive_multiplier"]
+            demand_level = demand_analysis.get("overall_level", "medium")
+            
+            # Index previous line items by content hash
+            previous_items: Dict[str, List[Dict]] = {}
+            for item in previous_quote["line_items"]:
+                previous_items.setdefault(item.get("fingerprint"), []).append(item)
+            
+            # Reused items are copied so the new quote shares no dicts with the previous one;
+            # identical activities are matched in order and take the id of their new position
+            line_items = []
+            added = []
+            for day_idx, day in enumerate(itinerary):
+                for position, activity in enumerate(day.get('activities', [])):
+                    fingerprint = self._line_item_fingerprint(activity, day_idx)
+                    if previous_items.get(fingerprint):
+                        item = dict(previous_items[fingerprint].pop(0))
+                        item["id"] = self._line_item_id(activity, day_idx, position)
+                        line_items.append(item)
+                    else:
+                        item = self._price_activity(activity, day_idx, position, factors["budget_level"])
+                        line_items.append(item)
+                        added.append(item)
+            
+            accommodation_item = self._price_accommodation(len(itinerary), factors["budget_level"])
+            if previous_items.get(accommodation_item["fingerprint"]):
+                line_items.append(dict(previous_items[accommodation_item["fingerprint"]].pop(0)))
+            else:
+                line_items.append(accommodation_item)
+                added.append(accommodation_item)
+            
+            removed = [item for items in previous_items.values() for item in items]
+            
+            # Price only the new items with the quote's cached multipliers
+            for item in added:
+                demand_price = int(item["base_price"] * demand_multiplier)
+                competitive_price = int(demand_price * competitive_multiplier)
+                item.update({
+                    "demand_level": demand_level,
+                    "demand_adjustment": demand_price - item["base_price"],
+                    "competitive_adjustment": competitive_price - demand_price,
+                    "current_price": competitive_price
+                })
+            
+            base_total = (previous_quote["base_total"]
+                          + sum(item["base_price"] for item in added)
+                          - sum(item["base_price"] for item in removed))
+            adjusted_total = (previous_quote["adjusted_total"]
+                              + sum(item["current_price"] for item in added)
+                              - sum(item["current_price"] for item in removed))
+            
+            profile_discounts = self._calculate_profile_discounts(traveler_profile, adjusted_total)
+            final_total = adjusted_total - profile_discounts["total_discount"]
+            
+            # Items removed and added under the same id are reported as changed
+            added_ids = {item["id"] for item in added}
+            removed_ids = {item["id"] for item in removed}
+            changed_ids = added_ids & removed_ids
+            
+            pricing_breakdown = {
+                **previous_quote,
+                "base_total": base_total,
+                "adjusted_total": adjusted_total,
+                "final_total": final_total,
+                "total_savings": base_total - final_total,
+                "line_items": line_items,
+                "discounts_applied": profile_discounts["discounts"],
+                "demand_analysis": demand_analysis,
+                "pricing_delta": {
+                    "previous_quote_id": quote_id,
+                    "added": sorted(added_ids - changed_ids),
+                    "removed": sorted(removed_ids - changed_ids),
+                    "changed": sorted(changed_ids),
+                    "unchanged_count": len(line_items) - len(added),
+                    "total_change": final_total - previous_quote["final_total"]
+                }
+            }
+            pricing_breakdown["justification"] = await self._generate_pricing_justification(
+                session_id, pricing_breakdown, competitor_data, profile_discounts
+            )
+            
+            quoted_at = datetime.now()
+            pricing_breakdown.update({
+                "quote_id": new_quote_id,
+                "quoted_at": quoted_at.isoformat(),
+                "quote_expires_at": (quoted_at + timedelta(seconds=self.quote_cache.ttl)).isoformat()
+            })
+            self.quote_cache.set(new_quote_id, copy.deepcopy(pricing_breakdown))
+            
+            logger.info(f"💰 Incremental reprice: {len(added)} priced, {len(removed)} removed, {len(line_items) - len(added)} reused")
+            return pricing_breakdown
+            
+        except Exception as e:
+            logger.error(f"Incremental repricing error: {e}")
+            return await self.calculate_dynamic_pricing(session_id, itinerary, traveler_profile, travel_dates)
+    
     async def _calculate_base_pricing(self, itinerary: List[Dict], profile: Dict) -> Dict:
         """Calculate base pricing from OTA database"""
         total = 0
@@ -141,46 +386,74 @@ class DynamicPricingAgent:
         budget_level = profile.get('budget_level', 'moderate')
         
         for day_idx, day in enumerate(itinerary):
-            for activity in day.get('activities', []):
-                category = activity.get('category', 'activities')
-                
-                # Get base rate
-                if category in self.base_rates:
-                    if category == 'accommodation':
-                        base_price = self.base_rates[category].get(budget_level, 4000)
-                    elif category in ['adventure', 'culture', 'nature', 'food']:
-                        base_price = self.base_rates['activities'].get(category, 1200)
-                    else:
-                        base_price = self.base_rates['transportation'].get(budget_level, 1000)
-                else:
-                    base_price = 1500  # Default activity price
-                
-                # Add some variation based on activity specifics
-                duration_multiplier = self._get_duration_multiplier(
-                    activity.get('duration', '2 hours')
-                )
-                final_price = int(base_price * duration_multiplier)
-                
-                item = {
-                    "id": f"day_{day_idx + 1}_{activity.get('title', 'activity')}",
-                    "title": activity.get('title', 'Activity'),
-                    "category": category,
-                    "base_price": final_price,
-                    "current_price": final_price,
-                    "day": day_idx + 1,
-                    "duration": activity.get('duration', '2 hours'),
-                    "demand_level": "medium"
-                }
-                
+            for position, activity in enumerate(day.get('activities', [])):
+                item = self._price_activity(activity, day_idx, position, budget_level)
                 items.append(item)
-                total += final_price
+                total += item["base_price"]
         
         # Add accommodation costs (per night)
-        num_nights = len(itinerary) - 1 if len(itinerary) > 1 else 1
+        accommodation_item = self._price_accommodation(len(itinerary), budget_level)
+        
+        items.append(accommodation_item)
+        total += accommodation_item["base_price"]
+        
+        return {"total": total, "items": items}
+    
+    def _line_item_fingerprint(self, activity: Dict, day_idx: int) -> str:
+        """Content hash of the activity fields that affect its price"""
+        return stable_fingerprint(
+            day_idx,
+            activity.get('title'),
+            activity.get('category'),
+            activity.get('duration'),
+            activity.get('location')
+        )
+    
+    def _line_item_id(self, activity: Dict, day_idx: int, position: int) -> str:
+        """Line item id, unique per position so repeated titles in a day stay distinct"""
+        return f"day_{day_idx + 1}_{position + 1}_{activity.get('title', 'activity')}"
+    
+    def _price_activity(self, activity: Dict, day_idx: int, position: int, budget_level: str) -> Dict:
+        """Calculate base price for a single activity line item"""
+        category = activity.get('category', 'activities')
+        
+        # Get base rate
+        if category in self.base_rates:
+            if category == 'accommodation':
+                base_price = self.base_rates[category].get(budget_level, 4000)
+            elif category in ['adventure', 'culture', 'nature', 'food']:
+                base_price = self.base_rates['activities'].get(category, 1200)
+            else:
+                base_price = self.base_rates['transportation'].get(budget_level, 1000)
+        else:
+            base_price = 1500  # Default activity price
+        
+        # Add some variation based on activity specifics
+        duration_multiplier = self._get_duration_multiplier(
+            activity.get('duration', '2 hours')
+        )
+        final_price = int(base_price * duration_multiplier)
+        
+        return {
+            "id": self._line_item_id(activity, day_idx, position),
+            "fingerprint": self._line_item_fingerprint(activity, day_idx),
+            "title": activity.get('title', 'Activity'),
+            "category": category,
+            "base_price": final_price,
+            "current_price": final_price,
+            "day": day_idx + 1,
+            "duration": activity.get('duration', '2 hours'),
+            "demand_level": "medium"
+        }
+    
+    def _price_accommodation(self, num_days: int, budget_level: str) -> Dict:
+        """Calculate accommodation line item (per night)"""
+        num_nights = num_days - 1 if num_days > 1 else 1
         accommodation_rate = self.base_rates['accommodation'].get(budget_level, 4000)
         
-        accommodation_item = {
+        return {
             "id": "accommodation_total",
+            "fingerprint": stable_fingerprint("accommodation", num_nights, accommodation_rate),
             "title": f"Accommodation ({num_nights} nights)",
             "category": "accommodation",
             "base_price": accommodation_rate * num_nights,
@@ -189,11 +462,6 @@ class DynamicPricingAgent:
             "rate_per_night": accommodation_rate,
             "demand_level": "medium"
         }
-        
-        items.append(accommodation_item)
-        total += accommodation_item["base_price"]
-        
-        return {"total": total, "items": items}
     
     def _get_duration_multiplier(self, duration_str: str) -> float:
         """Get pricing multiplier based on activity duration"""
@@ -216,20 +484,21 @@ class DynamicPricingAgent:
     async def _analyze_demand(self, travel_dates: Dict, itinerary: List[Dict]) -> Dict:
         """Analyze demand patterns for pricing adjustments"""
         try:
-            start_date = datetime.fromisoformat(travel_dates.get('start_date', '2024-12-15'))
+            start_date = parse_travel_date(travel_dates.get('start_date', '2024-12-15'))
+            if not start_date:
+                raise ValueError(f"Invalid start date: {travel_dates.get('start_date')}")
             
             # Simulate demand analysis based on season, month, and day of week
             month = start_date.month
             day_of_week = start_date.weekday()
             
-            # Seasonal demand
-            peak_months = [12, 1, 4, 5, 10, 11]  # Winter and pleasant months in India
-            if month in peak_months:
-                seasonal_demand = "high"
-            elif month in [6, 7, 8, 9]:  # Monsoon
-                seasonal_demand = "low"
-            else:
-                seasonal_demand = "medium"
+            # Seasonal demand from shared (destination, month) table
+            destination = next(
+                (activity.get('location') for day in itinerary for activity in day.get('activities', []) if activity.get('location')),
+                None
+            )
+            seasonal_row = self.seasonality.lookup(destination, month)
+            seasonal_demand = seasonal_row["demand_level"]
             
             # Weekend demand
             weekend_demand = "high" if day_of_week in [4, 5, 6] else "medium"
@@ -252,6 +521,8 @@ class DynamicPricingAgent:
                 "overall_level": overall_demand,
                 "seasonal": seasonal_demand,
                 "weekend_factor": weekend_demand,
+                "season_type": seasonal_row["season_type"],
+                "events": seasonal_row["events"],
                 "multiplier": self.demand_multipliers[overall_demand],
                 "analysis": f"Travel dates show {overall_demand} demand period"
             }
@@ -280,7 +551,7 @@ class DynamicPricingAgent:
         return {"total": total, "items": items}
     
     async def _get_competitor_analysis(self, session_id: str, itinerary: List[Dict], travel_dates: Dict) -> Dict:
-        """Get competitor pricing analysis using LLM"""
+        """Get competitor pricing analysis (snapshot reused until it expires)"""
         try:
             # Simulate competitor analysis
             destinations = set()
@@ -289,11 +560,18 @@ class DynamicPricingAgent:
                     if activity.get('location'):
                         destinations.add(activity['location'])
             
+            destination_list = sorted(destinations)[:3]  # Limit to 3 destinations
+            snapshot_key = stable_fingerprint(destination_list, travel_dates.get('start_date'))
+            
+            snapshot = self.competitor_snapshots.get(snapshot_key)
+            if snapshot:
+                return snapshot
+            
             # Mock competitor data with realistic variations
             competitors = ["MakeMyTrip", "Booking.com", "Agoda", "Cleartrip"]
             comparison = {}
             
-            for dest in list(destinations)[:3]:  # Limit to 3 destinations
+            for dest in destination_list:
                 competitor_prices = []
                 for comp in competitors:
                     # Generate realistic competitor prices with variation
@@ -314,11 +592,17 @@ class DynamicPricingAgent:
             
             avg_competitor_multiplier = sum(all_variations) / len(all_variations) if all_variations else 1.0
             
-            return {
+            snapshot = {
                 "destinations": comparison,
                 "average_market_multiplier": avg_competitor_multiplier,
-                "market_position": "competitive" if 0.95 <= avg_competitor_multiplier <= 1.05 else "below_market" if avg_competitor_multiplier > 1.05 else "above_market"
+                "market_position": "competitive" if 0.95 <= avg_competitor_multiplier <= 1.05 else "below_market" if avg_competitor_multiplier > 1.05 else "above_market",
+                "snapshot_key": snapshot_key,
+                "snapshot_id": stable_fingerprint(comparison, datetime.now().isoformat()),
+                "captured_at": datetime.now().isoformat()
             }
+            self.competitor_snapshots.set(snapshot_key, snapshot)
+            
+            return snapshot
             
         except Exception as e:
             logger.error(f"Competitor analysis error: {e}")
@@ -326,15 +610,7 @@ class DynamicPricingAgent:
     
     def _apply_competitive_adjustments(self, items: List[Dict], competitor_data: Dict) -> Dict:
         """Apply competitive pricing adjustments"""
-        market_multiplier = competitor_data.get("average_market_multiplier", 1.0)
-        
-        # Adjust to stay competitive (slight undercut if market is higher)
-        if market_multiplier > 1.02:
-            competitive_multiplier = 0.98  # 2% undercut
-        elif market_multiplier < 0.98:
-            competitive_multiplier = 1.02  # 2% premium for quality
-        else:
-            competitive_multiplier = 1.0   # Match market
+        competitive_multiplier = self._get_competitive_multiplier(competitor_data)
         
         total = 0
         for item in items:
@@ -345,6 +621,18 @@ class DynamicPricingAgent:
         
         return {"total": total, "items": items}
     
+    def _get_competitive_multiplier(self, competitor_data: Dict) -> float:
+        """Get price multiplier to stay competitive with the market"""
+        market_multiplier = competitor_data.get("average_market_multiplier", 1.0)
+        
+        # Adjust to stay competitive (slight undercut if market is higher)
+        if market_multiplier > 1.02:
+            return 0.98  # 2% undercut
+        elif market_multiplier < 0.98:
+            return 1.02  # 2% premium for quality
+        else:
+            return 1.0   # Match market
+    
     def _calculate_profile_discounts(self, profile: Dict, current_total: float) -> Dict:
         """Calculate profile-based discounts and loyalty benefits"""
         discounts = []
@@ -459,9 +747,16 @@ class DynamicPricingAgent:
         }
     
     async def create_checkout_cart(self, session_id: str, pricing_data: Dict, 
-                                 itinerary: List[Dict], user_details: Dict) -> Dict:
+                                 itinerary: List[Dict], user_details: Dict,
+                                 quote_id: Optional[str] = None) -> Dict:
         """Create checkout cart with all services bundled"""
         try:
+            # Reuse the exact quote shown to the user when it is still valid
+            quote_id = quote_id or pricing_data.get("quote_id")
+            cached_quote = self.get_cached_quote(quote_id)
+            if cached_quote:
+                pricing_data = cached_quote
+            
             cart_id = f"cart_{session_id}_{int(datetime.now().timestamp())}"
             
             cart = {
@@ -469,6 +764,7 @@ class DynamicPricingAgent:
                 "session_id": session_id,
                 "created_at": datetime.now().isoformat(),
                 "status": "pending",
+                "quote_id": pricing_data.get("quote_id"),
                 "user_details": user_details,
                 "pricing": pricing_data,
                 "itinerary_summary": {
@@ -12,33 +12,37 @@ from datetime import datetime, timezone
 from models.schemas import ExternalBookingResponse, Activity
 from utils.event_bus import EventBus, EventTypes
 from utils.context_store import ContextStore
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from utils.provider_adapters import MockProviderServer, build_provider_adapters
+from utils.partner_directory import get_partner_directory
+from utils.cache import TTLCache, stable_fingerprint
 
 logger = logging.getLogger(__name__)
 
+# Booking statuses that take (or request) a provider slot
+BOOKED_STATUSES = ("confirmed", "inquiry_sent")
+
 class ExternalBookingAgent:
     """Agent responsible for external booking integrations and provider management"""
     
     def __init__(self, context_store: ContextStore, event_bus: EventBus):
         self.context_store = context_store
         self.event_bus = event_bus
-        self.api_key = os.environ.get('EMERGENT_LLM_KEY')
         
         # Provider configurations
         self.providers = {
             "viator": {
                 "base_url": "https://api.viator.com/partner",
-                "api_key": None,  # Would be configured in production
+                "api_key": os.environ.get('VIATOR_API_KEY'),
                 "enabled": False
             },
             "getyourguide": {
                 "base_url": "https://api.getyourguide.com/v1",
-                "api_key": None,
+                "api_key": os.environ.get('GETYOURGUIDE_API_KEY'),
                 "enabled": False
             },
             "klook": {
                 "base_url": "https://api.klook.com/v1",
-                "api_key": None,
+                "api_key": os.environ.get('KLOOK_API_KEY'),
                 "enabled": False
             },
             "local_partners": {
@@ -47,17 +51,28 @@ class ExternalBookingAgent:
             }
         }
         
+        # Pooled adapters for providers with API keys (all providers against the mock server)
+        self.mock_server = MockProviderServer() if os.environ.get('BOOKING_PROVIDER_MOCK') else None
+        self.adapters = build_provider_adapters(self.providers, self.mock_server.transport if self.mock_server else None)
+        for provider_name in self.adapters:
+            self.providers[provider_name]["enabled"] = True
+        
+        # Local partners come from the directory instead of per-call generation
+        self.partner_directory = get_partner_directory()
+        
+        # Availability cache per (provider, destination, activity type, date, travelers)
+        self.availability_cache = TTLCache(ttl=120, max_entries=2000)
+        self.negative_cache_ttl = 30  # seconds to remember "not available"
+        
+        # Provider fan-out policy
+        self.provider_timeout = 3.0  # seconds per provider (adapters fit their retries into this)
+        self.adapter_timeout_grace = 0.25  # lets an adapter report its own timeout before the hard cutoff
+        self.fanout_deadline = 4.0  # seconds for the whole fan-out
+        self.good_enough_score = 3.5  # return early once a provider scores at least this
+        
         # Subscribe to booking events
         self.event_bus.subscribe(EventTypes.BOOKING_REQUESTED, self._handle_booking_request)
     
-    def _get_llm_client(self, session_id: str) -> LlmChat:
-        """Get LLM client for session"""
-        return LlmChat(
-            api_key=self.api_key,
-            session_id=session_id,
-            system_message="You are a travel booking assistant that generates realistic local travel partners and provider information."
-        ).with_model("openai", "gpt-4o-mini")
-    
     async def _handle_booking_request(self, event):
         """Handle booking request event"""
         try:
@@ -103,6 +118,8 @@ class ExternalBookingAgent:
             
             # Attempt booking
             booking_result = await self._attempt_booking(selected_provider, booking_details)
+            if booking_result.get("status") in BOOKED_STATUSES:
+                self.invalidate_availability(selected_provider, booking_details)
             
             # Store booking record
             self.context_store.add_booking(session_id, {
@@ -133,115 +150,246 @@ class ExternalBookingAgent:
                 additional_info={"error": str(e)}
             )
 
+    async def handle_batch_booking(self,
+                                   session_id: str,
+                                   items: List[Dict[str, Any]],
+                                   booking_defaults: Dict[str, Any] = None,
+                                   max_concurrency: int = 4) -> Dict[str, Any]:
+        """
+        Book a whole cart: items are grouped by provider and each group is booked in one call
+        
+        Args:
+            session_id: User session ID
+            items: Booking items (cart components or activities)
+            booking_defaults: Fields shared by all items (destination, travel_date, travelers)
+            max_concurrency: Maximum concurrent provider calls
+        
+        Returns:
+            Dict with per-item results (in item order) and a summary
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        booking_items = [self._batch_booking_details(item, booking_defaults or {}) for item in items]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(booking_items)
+        
+        logger.info(f"🧺 Processing batch booking of {len(booking_items)} items for session {session_id}")
+        
+        # Pick a provider per distinct availability query (cached and fanned out)
+        async def select_provider(booking_details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                providers = await self._get_available_providers(booking_details.get("activity_id"), booking_details)
+                return await self._select_best_provider(providers, booking_details) if providers else None
+        
+        query_keys = [self._availability_key("batch", booking_details) for booking_details in booking_items]
+        unique_keys = list(dict.fromkeys(query_keys))
+        first_item = {key: query_keys.index(key) for key in unique_keys}
+        selected = await asyncio.gather(
+            *(select_provider(booking_items[first_item[key]]) for key in unique_keys),
+            return_exceptions=True
+        )
+        provider_by_key = dict(zip(unique_keys, selected))
+        
+        # Group items by provider
+        groups: Dict[str, Dict[str, Any]] = {}
+        for idx, (booking_details, key) in enumerate(zip(booking_items, query_keys)):
+            provider = provider_by_key[key]
+            if not provider or isinstance(provider, Exception):
+                results[idx] = self._batch_item_result(booking_details, None, {
+                    "status": "not_available",
+                    "message": str(provider) if isinstance(provider, Exception) else "No providers available for this activity"
+                })
+                continue
+            group = groups.setdefault(provider["name"], {"provider": provider, "indices": []})
+            group["indices"].append(idx)
+        
+        # One provider call per group, bounded parallelism
+        async def book_group(group: Dict[str, Any]):
+            group_items = [booking_items[idx] for idx in group["indices"]]
+            async with semaphore:
+                try:
+                    group_results = await self._attempt_batch_booking(group["provider"], group_items)
+                except Exception as e:
+                    logger.error(f"Batch booking error for {group['provider']['name']}: {e}")
+                    group_results = [{"status": "error", "message": str(e)}] * len(group_items)
+            for idx, booking_result in zip(group["indices"], group_results):
+                results[idx] = self._batch_item_result(booking_items[idx], group["provider"], booking_result)
+                if booking_result.get("status") in BOOKED_STATUSES:
+                    self.invalidate_availability(group["provider"], booking_items[idx])
+        
+        await asyncio.gather(*(book_group(group) for group in groups.values()))
+        
+        # Store booking records
+        for result in results:
+            if result["provider"]:
+                self.context_store.add_booking(session_id, {
+                    "activity_id": result["item_id"],
+                    "activity_name": result["activity_name"],
+                    "provider": result["provider"],
+                    "booking_status": result["status"],
+                    "booking_reference": result["booking_reference"],
+                    "booking_url": result["booking_url"],
+                    "travelers": result["travelers"],
+                    "travel_date": result["travel_date"],
+                    "cost": result["cost"]
+                })
+        
+        succeeded = [r for r in results if r["status"] in BOOKED_STATUSES]
+        return {
+            "status": "completed" if len(succeeded) == len(results) else "partial" if succeeded else "failed",
+            "results": results,
+            "summary": {
+                "total_items": len(results),
+                "booked": len(succeeded),
+                "failed": len(results) - len(succeeded),
+                "provider_calls": len(groups),
+                "total_cost": sum(r["cost"] for r in succeeded)
+            }
+        }
+
+    def _batch_booking_details(self, item: Dict[str, Any], booking_defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """Booking details for a cart component or activity"""
+        return {
+            **booking_defaults,
+            **item,
+            "activity_id": item.get("activity_id") or item.get("id"),
+            "activity_name": item.get("activity_name") or item.get("title") or item.get("name", "Unknown Activity"),
+            "activity_type": item.get("activity_type") or booking_defaults.get("activity_type", "sightseeing")
+        }
+
+    def _batch_item_result(self, booking_details: Dict[str, Any], provider: Optional[Dict[str, Any]],
+                           booking_result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "item_id": booking_details.get("activity_id"),
+            "activity_name": booking_details.get("activity_name"),
+            "provider": provider["name"] if provider else None,
+            "status": booking_result.get("status", "error"),
+            "booking_reference": booking_result.get("reference"),
+            "booking_url": booking_result.get("url"),
+            "message": booking_result.get("message"),
+            "additional_info": booking_result.get("additional_info", {}),
+            "travelers": booking_details.get("travelers", 2),
+            "travel_date": booking_details.get("travel_date", ""),
+            "cost": booking_details.get("price") or (provider.get("price", 0) if provider else 0)
+        }
+
     async def _get_available_providers(self, activity_id: str, booking_details: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Get available providers for an activity"""
+        """Get available providers for an activity (queried concurrently)"""
+        tasks = {}
         try:
             destination = booking_details.get("destination", "").lower()
             activity_type = booking_details.get("activity_type", "")
             
-            providers = []
-            
-            # Check each provider
+            # Query every enabled provider at once
             for provider_name, config in self.providers.items():
-                if not config.get("enabled", False):
-                    continue
+                if config.get("enabled", False):
+                    task = asyncio.create_task(self._query_provider(provider_name, destination, activity_type, booking_details))
+                    tasks[task] = provider_name
+            
+            providers = []
+            pending = set(tasks)
+            deadline = asyncio.get_running_loop().time() + self.fanout_deadline
+            
+            while pending:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    logger.warning(f"⏱️ Provider fan-out deadline reached, skipping {[tasks[task] for task in pending]}")
+                    break
+                
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    providers.extend(task.result())
                 
-                if provider_name == "local_partners":
-                    local_providers = await self._check_local_partners(destination, activity_type, booking_details)
-                    providers.extend(local_providers)
-                else:
-                    provider_availability = await self._check_external_provider(provider_name, booking_details)
-                    if provider_availability:
-                        providers.append(provider_availability)
+                # Good enough: stop waiting once the best provider so far clears the bar
+                if pending and providers and self._best_provider_score(providers) >= self.good_enough_score:
+                    logger.info(f"⚡ Good-enough provider found, skipping {[tasks[task] for task in pending]}")
+                    break
+            
+            for task in pending:
+                task.cancel()
             
             return providers
             
         except Exception as e:
             logger.error(f"Provider check error: {e}")
+            for task in tasks:
+                task.cancel()
+            return []
+
+    def _availability_key(self, provider_name: str, booking_details: Dict[str, Any]) -> str:
+        return stable_fingerprint(
+            provider_name,
+            booking_details.get("destination", "").strip().lower(),
+            booking_details.get("activity_type", ""),
+            booking_details.get("travel_date", ""),
+            booking_details.get("travelers", 2)
+        )
+
+    async def _query_provider(self, provider_name: str, destination: str, activity_type: str,
+                              booking_details: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Query one provider with a per-provider timeout, through the availability cache (never raises)"""
+        cache_key = self._availability_key(provider_name, booking_details)
+        cached = self.availability_cache.get(cache_key)
+        if cached is not None:
+            return [dict(provider) for provider in cached]
+        
+        try:
+            if provider_name == "local_partners":
+                providers = await asyncio.wait_for(
+                    self._check_local_partners(destination, activity_type, booking_details),
+                    timeout=self.provider_timeout
+                )
+            else:
+                grace = self.adapter_timeout_grace if provider_name in self.adapters else 0
+                provider_availability = await asyncio.wait_for(
+                    self._check_external_provider(provider_name, booking_details),
+                    timeout=self.provider_timeout + grace
+                )
+                providers = [provider_availability] if provider_availability else []
+            
+            # Empty results are cached briefly (negative caching)
+            self.availability_cache.set(cache_key, providers, ttl=None if providers else self.negative_cache_ttl)
+            return [dict(provider) for provider in providers]
+            
+        except asyncio.TimeoutError:
+            logger.warning(f"Provider {provider_name} timed out after {self.provider_timeout}s")
+            if provider_name == "local_partners":
+                return self._get_fallback_local_partners(destination)
+            return []
+        except Exception as e:
+            logger.error(f"Provider query error for {provider_name}: {e}")
             return []
 
     async def _check_local_partners(self, destination: str, activity_type: str, booking_details: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Check local partner availability using LLM"""
+        """Check local partner availability from the partner directory"""
         try:
-            context = f"""
-            Generate realistic local travel partners for {destination} that could handle {activity_type} activities.
-            
-            Destination: {destination}
-            Activity Type: {activity_type}
-            Booking Details: {booking_details}
-            
-            Generate 2-3 local partners with realistic details for this destination.
-            Each partner should have:
-            - name (realistic local business name)
-            - contact (realistic Indian phone number format)
-            - email (realistic business email)
-            - 3-4 specialties relevant to the destination
-            - rating (4.0-5.0)
-            - response_time
-            
-            Respond in JSON array format:
-            [
-                {{
-                    "name": "Business Name",
-                    "contact": "+91-XXX-XXXX-XXXX",
-                    "email": "contact@business.com",
-                    "specialties": ["specialty1", "specialty2", "specialty3"],
-                    "rating": 4.5,
-                    "response_time": "immediate|1-2 hours|2-4 hours"
-                }}
-            ]
-            """
-            
-            user_msg = UserMessage(text=context)
-            llm_client = self._get_llm_client("temp_session")  # Use temp session for partner analysis
-            response = await llm_client.send_message(user_msg)
-            
-            # Parse JSON response (handle markdown-wrapped JSON)
-            import json
-            import re
-            try:
-                # Remove markdown code blocks if present
-                json_text = response
-                if '```json' in json_text:
-                    json_match = re.search(r'```json\s*(.*?)\s*```', json_text, re.DOTALL)
-                    if json_match:
-                        json_text = json_match.group(1)
-                elif '```' in json_text:
-                    json_match = re.search(r'```\s*(.*?)\s*```', json_text, re.DOTALL)
-                    if json_match:
-                        json_text = json_match.group(1)
-                
-                partners_data = json.loads(json_text.strip())
-                
-                providers = []
-                for partner in partners_data:
-                    providers.append({
-                        "name": f"Local Partner: {partner['name']}",
-                        "type": "local_partner",
-                        "contact_info": {
-                            "phone": partner["contact"],
-                            "email": partner["email"]
-                        },
-                        "rating": partner["rating"],
-                        "response_time": partner["response_time"],
-                        "booking_method": "direct_contact",
-                        "price": await self._estimate_local_partner_price(activity_type, booking_details),
-                        "availability": "high",
-                        "specialties": partner["specialties"]
-                    })
-                
-                return providers
-                
-            except json.JSONDecodeError:
-                logger.error("Failed to parse local partners JSON, using fallback")
+            partners = self.partner_directory.find(destination, activity_type)
+            if not partners:
                 return self._get_fallback_local_partners(destination)
             
+            price = await self._estimate_local_partner_price(activity_type, booking_details)
+            return [
+                {
+                    "name": f"Local Partner: {partner['name']}",
+                    "type": "local_partner",
+                    "contact_info": {
+                        "phone": partner["contact"],
+                        "email": partner["email"]
+                    },
+                    "rating": partner["rating"],
+                    "response_time": partner["response_time"],
+                    "booking_method": "direct_contact",
+                    "price": price,
+                    "availability": "high",
+                    "specialties": partner["specialties"]
+                }
+                for partner in partners
+            ]
+            
         except Exception as e:
             logger.error(f"Local partner check error: {e}")
             return self._get_fallback_local_partners(destination)
 
     def _get_fallback_local_partners(self, destination: str) -> List[Dict[str, Any]]:
-        """Fallback local partners if LLM fails"""
+        """Fallback local partner for destinations outside the directory"""
         return [
             {
                 "name": f"Local Partner: {destination} Tours",
@@ -262,23 +410,15 @@ class ExternalBookingAgent:
     async def _check_external_provider(self, provider_name: str, booking_details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Check external provider availability"""
         try:
-            config = self.providers.get(provider_name, {})
-            
-            if not config.get("api_key"):
-                # Simulate provider availability without actual API calls
-                return await self._simulate_provider_availability(provider_name, booking_details)
-            
-            # In production, would make actual API calls here
-            # Example for Viator:
-            # async with httpx.AsyncClient() as client:
-            #     response = await client.get(
-            #         f"{config['base_url']}/products/search",
-            #         headers={"Authorization": f"Bearer {config['api_key']}"},
-            #         params={"destination": booking_details.get("destination")}
-            #     )
-            #     return self._parse_provider_response(provider_name, response.json())
+            adapter = self.adapters.get(provider_name)
+            if adapter:
+                return await adapter.check_availability(booking_details, budget=self.provider_timeout)
             
-            return None
+            # Simulate provider availability without actual API calls
+            config = self.providers.get(provider_name, {})
+            if config.get("simulated_latency"):
+                await asyncio.sleep(config["simulated_latency"])
+            return await self._simulate_provider_availability(provider_name, booking_details)
             
         except Exception as e:
             logger.error(f"External provider check error for {provider_name}: {e}")
@@ -337,32 +477,10 @@ class ExternalBookingAgent:
             if not providers:
                 raise ValueError("No providers available")
             
-            # Scoring criteria
-            def score_provider(provider):
-                score = 0
-                
-                # Rating weight (40%)
-                score += provider.get("rating", 3.0) * 0.4
-                
-                # Price weight (30%) - lower price is better
-                price = provider.get("price", 10000)
-                max_price = max(p.get("price", 10000) for p in providers)
-                if max_price > 0:
-                    price_score = (max_price - price) / max_price * 5  # Convert to 0-5 scale
-                    score += price_score * 0.3
-                
-                # Availability weight (20%)
-                availability_scores = {"high": 5, "medium": 3, "low": 1}
-                score += availability_scores.get(provider.get("availability", "medium"), 3) * 0.2
-                
-                # Response time weight (10%)
-                response_scores = {"immediate": 5, "instant": 5, "1-2 hours": 4, "2-4 hours": 3, "4+ hours": 2}
-                score += response_scores.get(provider.get("response_time", "2-4 hours"), 3) * 0.1
-                
-                return score
+            max_price = max(p.get("price", 10000) for p in providers)
             
             # Score all providers
-            scored_providers = [(provider, score_provider(provider)) for provider in providers]
+            scored_providers = [(provider, self._score_provider(provider, max_price)) for provider in providers]
             
             # Sort by score (highest first)
             scored_providers.sort(key=lambda x: x[1], reverse=True)
@@ -376,6 +494,34 @@ class ExternalBookingAgent:
             logger.error(f"Provider selection error: {e}")
             return providers[0] if providers else {}
 
+    def _score_provider(self, provider: Dict[str, Any], max_price: float) -> float:
+        """Score a provider against the most expensive of the candidates"""
+        score = 0
+        
+        # Rating weight (40%)
+        score += provider.get("rating", 3.0) * 0.4
+        
+        # Price weight (30%) - lower price is better
+        price = provider.get("price", 10000)
+        if max_price > 0:
+            price_score = (max_price - price) / max_price * 5  # Convert to 0-5 scale
+            score += price_score * 0.3
+        
+        # Availability weight (20%)
+        availability_scores = {"high": 5, "medium": 3, "low": 1}
+        score += availability_scores.get(provider.get("availability", "medium"), 3) * 0.2
+        
+        # Response time weight (10%)
+        response_scores = {"immediate": 5, "instant": 5, "1-2 hours": 4, "2-4 hours": 3, "4+ hours": 2}
+        score += response_scores.get(provider.get("response_time", "2-4 hours"), 3) * 0.1
+        
+        return score
+
+    def _best_provider_score(self, providers: List[Dict[str, Any]]) -> float:
+        """Best score among providers collected so far"""
+        max_price = max(p.get("price", 10000) for p in providers)
+        return max(self._score_provider(provider, max_price) for provider in providers)
+
     async def _attempt_booking(self, provider: Dict[str, Any], booking_details: Dict[str, Any]) -> Dict[str, Any]:
         """Attempt to make a booking with the selected provider"""
         try:
@@ -393,12 +539,48 @@ class ExternalBookingAgent:
             logger.error(f"Booking attempt error: {e}")
             return {"status": "error", "message": str(e)}
 
+    async def _attempt_batch_booking(self, provider: Dict[str, Any], items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Book several items with one provider in a single call"""
+        booking_method = provider.get("booking_method", "direct_contact")
+        
+        if booking_method == "api":
+            adapter = self.adapters.get(provider.get("name", "").lower())
+            if adapter:
+                return await adapter.book_batch(items)
+            
+            # Mock API batch booking when the provider has no adapter configured
+            await asyncio.sleep(0.5)  # Simulate one API call for the whole group
+            import uuid
+            results = []
+            for item in items:
+                booking_ref = f"{provider['name'].upper()[:3]}-{str(uuid.uuid4())[:8].upper()}"
+                results.append({
+                    "status": "confirmed",
+                    "reference": booking_ref,
+                    "url": f"https://booking.{provider['name'].lower()}.com/confirm/{booking_ref}",
+                    "message": f"Booking confirmed with {provider['name']}",
+                    "additional_info": {"confirmation_email": "sent"}
+                })
+            return results
+        
+        if booking_method == "direct_contact":
+            # One inquiry per partner covering every item
+            inquiry = await self._direct_contact_booking(provider, {
+                **items[0],
+                "activity_name": ", ".join(item.get("activity_name", "an activity") for item in items)
+            })
+            return [inquiry] * len(items)
+        
+        return [{"status": "pending_manual", "message": "Manual booking required"}] * len(items)
+
     async def _api_booking(self, provider: Dict[str, Any], booking_details: Dict[str, Any]) -> Dict[str, Any]:
         """Handle API-based bookings"""
         try:
-            # Mock API booking - in production would make actual API calls
+            adapter = self.adapters.get(provider.get("name", "").lower())
+            if adapter:
+                return await adapter.book(booking_details)
             
-            # Simulate booking process
+            # Mock API booking when the provider has no adapter configured
             await asyncio.sleep(0.5)  # Simulate API call delay
             
             # Generate mock booking reference
@@ -550,6 +732,20 @@ class ExternalBookingAgent:
             logger.error(f"Booking cancellation error: {e}")
             return {"error": str(e)}
 
+    def invalidate_availability(self, provider: Optional[Dict[str, Any]] = None,
+                                booking_details: Optional[Dict[str, Any]] = None):
+        """Drop one provider's cached availability for a booked slot, or everything when no slot is given"""
+        if provider is None or booking_details is None:
+            self.availability_cache.clear()
+            return
+        provider_name = "local_partners" if provider.get("type") == "local_partner" else provider.get("name", "").lower()
+        self.availability_cache.invalidate(self._availability_key(provider_name, booking_details))
+
+    async def aclose(self):
+        """Close pooled provider connections"""
+        for adapter in self.adapters.values():
+            await adapter.aclose()
+
     def get_provider_statistics(self) -> Dict[str, Any]:
         """Get provider performance statistics"""
         try:
@@ -573,6 +769,7 @@ class ExternalBookingAgent:
                         "customer_satisfaction": 4.3
                     }
                 },
+                "availability_cache": self.availability_cache.stats(),
                 "last_updated": datetime.now(timezone.utc).isoformat()
             }
             
@@ -13,6 +13,7 @@ from emergentintegrations.llm.chat import LlmChat, UserMessage
 from models.schemas import ItineraryVariant, DayItinerary, Activity, ActivityType, ItineraryVariantType
 from utils.event_bus import EventBus, EventTypes
 from utils.context_store import ContextStore
+from utils.geo import get_gazetteer
 
 logger = logging.getLogger(__name__)
 
@@ -109,6 +110,12 @@ class BaseItineraryAgent:
             
             # Enhance activities with required fields
             for day in data.get('daily_itinerary', []):
+                # Add logistics from gazetteer travel-time matrix
+                get_gazetteer().fill_travel_logistics(
+                    day.get('activities', []),
+                    trip_details.get('destination', '')
+                )
+                
                 for activity in day.get('activities', []):
                     # Add image if missing
                     if 'image' not in activity:
@@ -122,16 +129,6 @@ class BaseItineraryAgent:
                     if 'alternatives' not in activity:
                         activity['alternatives'] = self._generate_default_alternatives(activity)
                     
-                    # Add logistics
-                    if 'travel_logistics' not in activity:
-                        activity['travel_logistics'] = {
-                            "from_previous": "Previous location",
-                            "distance_km": 2.0,
-                            "travel_time": "15 minutes",
-                            "transport_mode": "Taxi",
-                            "transport_cost": 150
-                        }
-                    
                     # Add booking info
                     if 'booking_info' not in activity:
                         activity['booking_info'] = {
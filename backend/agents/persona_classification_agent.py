@@ -4,16 +4,32 @@ Feeds persona tags to downstream agents for personalized itinerary generation
 """
 
 import os
+import copy
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 from models.schemas import PersonaClassificationResponse, PersonaType, UIAction
 from utils.event_bus import EventBus, EventTypes
 from utils.context_store import ContextStore
+from utils.cache import MISSING, TTLCache, stable_fingerprint
+from utils.persona_scoring import SCORED_PERSONAS, SCORED_PERSONA_VALUES, score_profiles
 
 logger = logging.getLogger(__name__)
 
+BEHAVIORAL_TAGS = {
+    PersonaType.ADVENTURER: ["thrill_seeker", "outdoor_enthusiast", "risk_tolerant"],
+    PersonaType.CULTURAL_EXPLORER: ["heritage_focused", "authentic_experiences", "local_culture"],
+    PersonaType.LUXURY_CONNOISSEUR: ["premium_experiences", "comfort_priority", "exclusive_access"],
+    PersonaType.BUDGET_BACKPACKER: ["cost_conscious", "local_experiences", "flexible_traveler"],
+    PersonaType.ECO_CONSCIOUS: ["sustainable_travel", "nature_conservation", "responsible_tourism"],
+    PersonaType.FAMILY_ORIENTED: ["kid_friendly", "safety_priority", "educational_focus"]
+}
+
+# Profile and trip fields that influence classification (cache key inputs)
+PROFILE_FINGERPRINT_KEYS = ("vacation_style", "experience_type", "attraction_preference", "accommodation", "interests", "custom_inputs")
+TRIP_FINGERPRINT_KEYS = ("destination", "start_date", "end_date", "adults", "children", "budget_per_night")
+
 class PersonaClassificationAgent:
     """Agent responsible for classifying travelers into personas and triggering itinerary generation"""
     
@@ -22,6 +38,14 @@ class PersonaClassificationAgent:
         self.event_bus = event_bus
         self.api_key = os.environ.get('EMERGENT_LLM_KEY')
         
+        # Rule-first gating: the LLM is only consulted when the top two rule scores are this close
+        self.llm_margin_threshold = 2
+        
+        # Classification results shared across sessions, keyed by profile/trip fingerprint.
+        # A changed profile hashes to a new key, so stale results are never served.
+        self.result_cache = TTLCache(ttl=7200, max_entries=2000)
+        self.fallback_cache_ttl = 60  # rule fallback after an LLM failure; retry the LLM soon
+        
         # Subscribe to profile intake completion events
         self.event_bus.subscribe(EventTypes.PROFILE_INTAKE_COMPLETED, self._handle_profile_completion)
     
@@ -144,7 +168,50 @@ Default to 'balanced_traveler' if classification is unclear."""
             )
 
     async def classify_persona(self, session_id: str, profile_data: Dict[str, Any], trip_details: Dict[str, Any]) -> Dict[str, Any]:
-        """Classify traveler persona based on profile and trip data using LLM"""
+        """Classify traveler persona: cached result, then rules, LLM only for close calls"""
+        fingerprint = self._profile_fingerprint(profile_data, trip_details)
+        cached = self.result_cache.get(fingerprint, MISSING)
+        if cached is not MISSING:
+            logger.info(f"🎯 Cached persona {cached['persona_type']} for profile {fingerprint[:8]}")
+            return copy.deepcopy(cached)
+        
+        rule_based = await self._perform_rule_based_classification(profile_data, trip_details)
+        if rule_based["score_margin"] >= self.llm_margin_threshold:
+            logger.info(f"⚡ Rule-based persona {rule_based['persona_type']} (margin {rule_based['score_margin']})")
+            self.result_cache.set(fingerprint, rule_based)
+            return copy.deepcopy(rule_based)
+        
+        classification = await self._classify_with_llm(session_id, profile_data, trip_details, rule_based)
+        if classification is not None:
+            self.result_cache.set(fingerprint, classification)
+            return copy.deepcopy(classification)
+        
+        self.result_cache.set(fingerprint, rule_based, ttl=self.fallback_cache_ttl)
+        return copy.deepcopy(rule_based)
+
+    def invalidate_cached_classification(self, profile_data: Optional[Dict[str, Any]] = None, trip_details: Optional[Dict[str, Any]] = None):
+        """Drop the cached result for one profile, or every cached result when no profile is given"""
+        if profile_data is None and trip_details is None:
+            self.result_cache.clear()
+            return
+        self.result_cache.invalidate(self._profile_fingerprint(profile_data or {}, trip_details or {}))
+
+    def _profile_fingerprint(self, profile_data: Dict[str, Any], trip_details: Dict[str, Any]) -> str:
+        """Canonical hash of the profile and trip fields that drive classification"""
+        def canonical(value):
+            # Multi-select answers are order independent
+            if isinstance(value, list):
+                return sorted(value, key=str)
+            return value
+        
+        return stable_fingerprint(
+            {key: canonical(profile_data.get(key)) for key in PROFILE_FINGERPRINT_KEYS},
+            {key: canonical(trip_details.get(key)) for key in TRIP_FINGERPRINT_KEYS}
+        )
+
+    async def _classify_with_llm(self, session_id: str, profile_data: Dict[str, Any], trip_details: Dict[str, Any],
+                                 rule_based_backup: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """LLM classification combined with the rule-based result (None on failure)"""
         try:
             # Prepare comprehensive analysis context
             analysis_context = f"""
@@ -221,9 +288,6 @@ Default to 'balanced_traveler' if classification is unclear."""
                 confidence = max(0.1, min(1.0, float(llm_result.get("confidence", 0.5))))
                 propensity_to_pay = max(0.1, min(1.0, float(llm_result.get("propensity_to_pay", 0.5))))
                 
-                # Add additional analysis
-                rule_based_backup = await self._perform_rule_based_classification(profile_data, trip_details)
-                
                 # Combine LLM and rule-based insights
                 final_classification = {
                     "persona_type": persona_type,
@@ -239,104 +303,60 @@ Default to 'balanced_traveler' if classification is unclear."""
                 
             except json.JSONDecodeError:
                 logger.error("Failed to parse persona classification JSON, using rule-based fallback")
-                return await self._perform_rule_based_classification(profile_data, trip_details)
+                return None
             
         except Exception as e:
             logger.error(f"LLM persona classification error: {e}")
-            return await self._perform_rule_based_classification(profile_data, trip_details)
+            return None
 
     async def _perform_rule_based_classification(self, profile_data: Dict[str, Any], trip_details: Dict[str, Any]) -> Dict[str, Any]:
         """Perform rule-based persona classification"""
-        persona_scores = {
-            PersonaType.ADVENTURER: 0,
-            PersonaType.CULTURAL_EXPLORER: 0,
-            PersonaType.LUXURY_CONNOISSEUR: 0,
-            PersonaType.BUDGET_BACKPACKER: 0,
-            PersonaType.ECO_CONSCIOUS: 0,
-            PersonaType.FAMILY_ORIENTED: 0,
-            PersonaType.BUSINESS_TRAVELER: 0
-        }
-        
-        # Analyze vacation style
-        vacation_style = profile_data.get('vacation_style', '')
-        if vacation_style == 'adventurous':
-            persona_scores[PersonaType.ADVENTURER] += 3
-        elif vacation_style == 'relaxing':
-            persona_scores[PersonaType.LUXURY_CONNOISSEUR] += 2
-        elif vacation_style == 'balanced':
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 2
-        
-        # Analyze experience type
-        experience_type = profile_data.get('experience_type', '')
-        if experience_type == 'nature':
-            persona_scores[PersonaType.ADVENTURER] += 2
-            persona_scores[PersonaType.ECO_CONSCIOUS] += 2
-        elif experience_type == 'culture':
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 3
-        
-        # Analyze attraction preference
-        attraction_pref = profile_data.get('attraction_preference', '')
-        if attraction_pref == 'local':
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 2
-            persona_scores[PersonaType.BUDGET_BACKPACKER] += 1
-        elif attraction_pref == 'popular':
-            persona_scores[PersonaType.LUXURY_CONNOISSEUR] += 1
-        
-        # Analyze accommodation preferences
-        accommodations = profile_data.get('accommodation', [])
-        if 'luxury_hotels' in accommodations:
-            persona_scores[PersonaType.LUXURY_CONNOISSEUR] += 3
-        if 'budget_hotels' in accommodations or 'hostels' in accommodations:
-            persona_scores[PersonaType.BUDGET_BACKPACKER] += 3
-        if 'boutique_hotels' in accommodations or 'bnb' in accommodations:
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 2
-        
-        # Analyze interests
-        interests = profile_data.get('interests', [])
-        if 'hiking' in interests:
-            persona_scores[PersonaType.ADVENTURER] += 2
-            persona_scores[PersonaType.ECO_CONSCIOUS] += 1
-        if 'museums' in interests:
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 2
-        if 'nightlife' in interests:
-            persona_scores[PersonaType.ADVENTURER] += 1
-        if 'shopping' in interests:
-            persona_scores[PersonaType.LUXURY_CONNOISSEUR] += 1
-        if 'food' in interests:
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 1
-        
-        # Analyze budget
-        budget_per_night = trip_details.get('budget_per_night', 0)
-        if budget_per_night > 15000:
-            persona_scores[PersonaType.LUXURY_CONNOISSEUR] += 3
-        elif budget_per_night < 5000:
-            persona_scores[PersonaType.BUDGET_BACKPACKER] += 3
-        else:
-            persona_scores[PersonaType.CULTURAL_EXPLORER] += 1
-        
-        # Analyze group composition
-        children = trip_details.get('children', 0)
-        if children > 0:
-            persona_scores[PersonaType.FAMILY_ORIENTED] += 4
+        return self.classify_batch([(profile_data, trip_details)])[0]
+
+    def classify_batch(self, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]], include_reasoning: bool = True) -> List[Dict[str, Any]]:
+        """
+        Rule-based classification of many profiles at once (no LLM)
         
-        # Determine primary persona
-        primary_persona = max(persona_scores, key=persona_scores.get)
-        confidence = min(persona_scores[primary_persona] / 10.0, 1.0)
+        Args:
+            pairs: (profile_data, trip_details) pairs
+            include_reasoning: Add a reasoning string per result
         
-        # Generate persona tags
-        persona_tags = self._generate_persona_tags(persona_scores, primary_persona)
+        Returns:
+            Classification per pair, in input order
+        """
+        scored = score_profiles(pairs)
+        score_rows = scored["scores"].astype(int).tolist()
+        rankings = scored["ranking"].tolist()
+        margins = scored["margin"].astype(int).tolist()
+        confidences = scored["confidence"].tolist()
+        propensities = scored["propensity"].tolist()
         
-        # Calculate propensity to pay
-        propensity_to_pay = self._calculate_propensity_to_pay(primary_persona, budget_per_night, accommodations)
+        results = []
+        for idx, (profile_data, trip_details) in enumerate(pairs):
+            scores, ranking = score_rows[idx], rankings[idx]
+            primary_persona = SCORED_PERSONAS[ranking[0]]
+            
+            # Primary persona, up to two significant secondary traits, then behavioral tags
+            persona_tags = [primary_persona.value]
+            persona_tags.extend(
+                f"secondary_{SCORED_PERSONA_VALUES[col]}" for col in ranking[1:3] if scores[col] > 2
+            )
+            persona_tags.extend(BEHAVIORAL_TAGS.get(primary_persona, []))
+            
+            result = {
+                "persona_type": primary_persona.value,
+                "persona_tags": persona_tags,
+                "confidence": round(confidences[idx], 3),
+                "score_margin": margins[idx],
+                "persona_scores": dict(zip(SCORED_PERSONA_VALUES, scores)),
+                "propensity_to_pay": round(propensities[idx], 3)
+            }
+            if include_reasoning:
+                persona_scores = dict(zip(SCORED_PERSONAS, scores))
+                result["reasoning"] = self._generate_reasoning(primary_persona, persona_scores, profile_data or {}, trip_details or {})
+            results.append(result)
         
-        return {
-            "persona_type": primary_persona.value,
-            "persona_tags": persona_tags,
-            "confidence": confidence,
-            "persona_scores": {k.value: v for k, v in persona_scores.items()},
-            "propensity_to_pay": propensity_to_pay,
-            "reasoning": self._generate_reasoning(primary_persona, persona_scores, profile_data, trip_details)
-        }
+        return results
 
     def _combine_classifications(self, rule_based: Dict[str, Any], llm_response: str) -> Dict[str, Any]:
         """Combine rule-based and LLM classifications"""
@@ -344,63 +364,6 @@ Default to 'balanced_traveler' if classification is unclear."""
         # In production, would implement more sophisticated fusion
         return rule_based
 
-    def _generate_persona_tags(self, persona_scores: Dict[PersonaType, int], primary_persona: PersonaType) -> List[str]:
-        """Generate persona tags based on scores"""
-        tags = [primary_persona.value]
-        
-        # Add secondary traits
-        sorted_personas = sorted(persona_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        for persona, score in sorted_personas[1:3]:  # Top 2 secondary traits
-            if score > 2:  # Significant score
-                tags.append(f"secondary_{persona.value}")
-        
-        # Add specific behavioral tags
-        if primary_persona == PersonaType.ADVENTURER:
-            tags.extend(["thrill_seeker", "outdoor_enthusiast", "risk_tolerant"])
-        elif primary_persona == PersonaType.CULTURAL_EXPLORER:
-            tags.extend(["heritage_focused", "authentic_experiences", "local_culture"])
-        elif primary_persona == PersonaType.LUXURY_CONNOISSEUR:
-            tags.extend(["premium_experiences", "comfort_priority", "exclusive_access"])
-        elif primary_persona == PersonaType.BUDGET_BACKPACKER:
-            tags.extend(["cost_conscious", "local_experiences", "flexible_traveler"])
-        elif primary_persona == PersonaType.ECO_CONSCIOUS:
-            tags.extend(["sustainable_travel", "nature_conservation", "responsible_tourism"])
-        elif primary_persona == PersonaType.FAMILY_ORIENTED:
-            tags.extend(["kid_friendly", "safety_priority", "educational_focus"])
-        
-        return tags
-
-    def _calculate_propensity_to_pay(self, persona: PersonaType, budget: float, accommodations: List[str]) -> float:
-        """Calculate propensity to pay for pricing strategy"""
-        base_propensity = 0.5
-        
-        # Persona-based adjustments
-        if persona == PersonaType.LUXURY_CONNOISSEUR:
-            base_propensity = 0.9
-        elif persona == PersonaType.BUDGET_BACKPACKER:
-            base_propensity = 0.2
-        elif persona == PersonaType.ADVENTURER:
-            base_propensity = 0.7
-        elif persona == PersonaType.CULTURAL_EXPLORER:
-            base_propensity = 0.6
-        elif persona == PersonaType.FAMILY_ORIENTED:
-            base_propensity = 0.5
-        
-        # Budget-based adjustments
-        if budget > 15000:
-            base_propensity += 0.2
-        elif budget < 5000:
-            base_propensity -= 0.2
-        
-        # Accommodation-based adjustments
-        if 'luxury_hotels' in accommodations:
-            base_propensity += 0.1
-        elif 'hostels' in accommodations:
-            base_propensity -= 0.1
-        
-        return min(max(base_propensity, 0.1), 1.0)
-
     def _generate_reasoning(self, primary_persona: PersonaType, persona_scores: Dict[PersonaType, int], 
                           profile_data: Dict[str, Any], trip_details: Dict[str, Any]) -> str:
         """Generate reasoning for classification"""
@@ -4,11 +4,13 @@ propensity-to-pay discounts, and transparent pricing breakdown
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, timezone
 import random
 from models.schemas import ItineraryVariant, PricingResponse
+from models.internal import VariantData
 from utils.event_bus import EventBus, EventTypes
+from utils.seasonality import get_seasonality_table, parse_travel_date
 from utils.context_store import ContextStore
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,9 @@ class PricingAgent:
             "low": 0.8        # 20% discount during low season
         }
         
+        # Shared (destination, month) season table
+        self.seasonality = get_seasonality_table()
+        
         # Subscribe to pricing events
         self.event_bus.subscribe(EventTypes.PRICING_UPDATE_REQUESTED, self._handle_pricing_update)
     
@@ -95,7 +100,8 @@ class PricingAgent:
             if not itinerary_data:
                 raise ValueError(f"Itinerary {itinerary_id} not found")
             
-            variant = ItineraryVariant(**itinerary_data)
+            # Stored itineraries were validated when created; skip re-validating on every reprice
+            variant = VariantData.from_dict(itinerary_data)
             
             # Get current context
             persona = self.context_store.get_persona(session_id)
@@ -112,7 +118,7 @@ class PricingAgent:
             price_breakdown = await self._generate_price_breakdown(updated_variant, pricing_factors)
             
             # Store updated itinerary
-            self.context_store.add_itinerary(session_id, itinerary_id, updated_variant.dict())
+            self.context_store.add_itinerary(session_id, itinerary_id, updated_variant.to_dict())
             
             return PricingResponse(
                 updated_pricing={"total_cost": updated_variant.total_cost},
@@ -187,8 +193,10 @@ class PricingAgent:
         
         return factors
 
-    async def _apply_variant_pricing(self, variant: ItineraryVariant, factors: Dict[str, Any]) -> ItineraryVariant:
-        """Apply pricing factors to a variant"""
+    async def _apply_variant_pricing(self,
+                                     variant: Union[ItineraryVariant, VariantData],
+                                     factors: Dict[str, Any]) -> Union[ItineraryVariant, VariantData]:
+        """Apply pricing factors to a variant in place (API models from apply_pricing, internal data from update_pricing)"""
         try:
             # Calculate overall multiplier
             multiplier = (
@@ -221,18 +229,11 @@ class PricingAgent:
     async def _determine_season(self, travel_date: str, destination: str) -> str:
         """Determine travel season for pricing"""
         try:
-            date = datetime.fromisoformat(travel_date)
-            month = date.month
-            
-            # General Indian tourism seasons (simplified)
-            if month in [12, 1, 2]:  # Winter - peak season
-                return "peak"
-            elif month in [3, 4, 11]:  # Pleasant weather
-                return "high"
-            elif month in [5, 6]:  # Hot season
-                return "low"
-            else:  # Monsoon and post-monsoon
-                return "normal"
+            date = parse_travel_date(travel_date)
+            if not date:
+                raise ValueError(f"Invalid travel date: {travel_date}")
+            
+            return self.seasonality.lookup(destination, date.month)["pricing_season"]
                 
         except Exception as e:
             logger.error(f"Season determination error: {e}")
@@ -278,7 +279,7 @@ class PricingAgent:
             logger.error(f"Urgency factor calculation error: {e}")
             return 1.0
 
-    async def _generate_price_breakdown(self, variant: ItineraryVariant, factors: Dict[str, Any]) -> Dict[str, Any]:
+    async def _generate_price_breakdown(self, variant: VariantData, factors: Dict[str, Any]) -> Dict[str, Any]:
         """Generate detailed price breakdown"""
         try:
             # Calculate base cost (before markups)
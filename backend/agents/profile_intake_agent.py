@@ -7,12 +7,14 @@ import os
 import logging
 import asyncio
 import json
-import hashlib
 from typing import Dict, List, Any, Optional
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 from models.schemas import ChatResponse, UIAction, ProfileIntakeResponse
 from utils.event_bus import EventBus, EventTypes
 from utils.context_store import ContextStore
+from utils.keyword_matcher import KeywordMatches, get_keyword_matcher
+from utils.intent_classifier import get_intent_classifier
+from utils.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
@@ -24,45 +26,23 @@ class ProfileIntakeAgent:
         self.event_bus = event_bus
         self.api_key = os.environ.get('EMERGENT_LLM_KEY')
         
-        # Response cache for performance optimization
-        self.response_cache = {}
-        self.cache_ttl = 3600  # 1 hour cache TTL
+        # Semantic response cache (near-duplicate messages share entries)
+        self.semantic_cache = SemanticCache(ttl=3600, max_entries=1000)
+        
+        # Compiled once; every chat message is matched in a single pass
+        self.keyword_matcher = get_keyword_matcher()
+        
+        # Local classifier handles confident cases; only the rest go to the LLM
+        self.intent_classifier = get_intent_classifier()
         
         # LLM client will be initialized per session
     
-    def _get_cache_key(self, message: str, user_profile: Dict) -> str:
-        """Generate cache key for response caching"""
-        cache_data = {
-            'message': message.lower().strip(),
-            'profile_keys': sorted(user_profile.keys()) if user_profile else []
+    def _intent_cache_slots(self, matches: KeywordMatches, profile: Dict) -> Dict[str, Any]:
+        """Slots that must agree for two messages to share an intent cache entry"""
+        return {
+            "destination": matches.first("destination"),
+            "profile_keys": sorted(profile.keys()) if profile else []
         }
-        return hashlib.md5(json.dumps(cache_data, sort_keys=True).encode()).hexdigest()
-    
-    def _get_cached_response(self, cache_key: str) -> Optional[Dict]:
-        """Get cached response if still valid"""
-        if cache_key in self.response_cache:
-            cached_data = self.response_cache[cache_key]
-            import time
-            if time.time() - cached_data['timestamp'] < self.cache_ttl:
-                return cached_data['response']
-            else:
-                # Remove expired cache
-                del self.response_cache[cache_key]
-        return None
-    
-    def _cache_response(self, cache_key: str, response: Dict):
-        """Cache response for future use"""
-        import time
-        self.response_cache[cache_key] = {
-            'response': response,
-            'timestamp': time.time()
-        }
-        
-        # Limit cache size (keep only last 100 entries)
-        if len(self.response_cache) > 100:
-            oldest_key = min(self.response_cache.keys(), 
-                           key=lambda k: self.response_cache[k]['timestamp'])
-            del self.response_cache[oldest_key]
     
     def _get_llm_client(self, session_id: str) -> LlmChat:
         """Get LLM client for session"""
@@ -142,61 +122,80 @@ Always provide helpful, specific, and engaging responses that move the conversat
     async def _analyze_intent(self, message: str, profile: Dict, trip_details: Dict) -> Dict[str, Any]:
         """Analyze user message intent using LLM with caching and optimization"""
         try:
+            # Single keyword pass feeds both the cache slots and the heuristics
+            matches = self.keyword_matcher.match(message)
+            cache_slots = self._intent_cache_slots(matches, profile)
+            
             # Check cache first
-            cache_key = self._get_cache_key(message, profile)
-            cached_result = self._get_cached_response(cache_key)
+            cached_result = self.semantic_cache.get("intent", message, cache_slots)
             if cached_result:
                 logger.info(f"🚀 Using cached intent analysis for: {message[:50]}...")
                 return cached_result
             
             # Quick heuristic checks before LLM call
-            message_lower = message.lower().strip()
+            intent = matches.best("intent")
             
             # Fast pattern matching for common cases
-            if any(word in message_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good evening']):
+            if intent == "greeting":
                 result = {
                     "intent": "general",
                     "confidence": 0.9,
                     "reasoning": "Greeting detected",
                     "extracted_info": {}
                 }
-                self._cache_response(cache_key, result)
+                self.semantic_cache.set("intent", message, cache_slots, result)
                 return result
             
-            if any(phrase in message_lower for phrase in ['plan a trip', 'want to visit', 'travel to', 'vacation to', 'trip to']):
-                # Extract destination if mentioned
-                destinations = ['goa', 'kerala', 'mumbai', 'delhi', 'rajasthan', 'bangalore', 'chennai', 'kolkata', 'hyderabad', 'pune']
-                found_destination = next((dest for dest in destinations if dest in message_lower), None)
-                
+            if intent == "trip_planning":
+                extracted_info = self._extract_trip_info(matches)
                 result = {
                     "intent": "trip_planning",
                     "confidence": 0.95,
                     "reasoning": "Trip planning keywords detected",
-                    "extracted_info": {
-                        "destination": found_destination.title() if found_destination else None
-                    }
+                    "destination": extracted_info.get("destination"),
+                    "extracted_info": extracted_info
                 }
-                self._cache_response(cache_key, result)
+                self.semantic_cache.set("intent", message, cache_slots, result)
                 return result
             
-            if any(word in message_lower for word in ['hotel', 'resort', 'accommodation', 'stay', 'lodging']):
+            if intent == "accommodation":
+                extracted_info = self._extract_trip_info(matches)
                 result = {
                     "intent": "accommodation",
                     "confidence": 0.9,
                     "reasoning": "Accommodation keywords detected",
-                    "extracted_info": {}
+                    "destination": extracted_info.get("destination"),
+                    "extracted_info": extracted_info
                 }
-                self._cache_response(cache_key, result)
+                self.semantic_cache.set("intent", message, cache_slots, result)
                 return result
             
-            # Use LLM for complex cases with timeout
+            # Local classifier for confident cases
+            prediction = self.intent_classifier.predict(message)
+            if prediction["confident"]:
+                extracted_info = self._extract_trip_info(matches)
+                result = {
+                    "intent": prediction["intent"],
+                    "confidence": prediction["confidence"],
+                    "reasoning": "Local intent classifier",
+                    "destination": extracted_info.get("destination"),
+                    "extracted_info": extracted_info
+                }
+                self.semantic_cache.set("intent", message, cache_slots, result)
+                return result
+            
+            # Use LLM for low-confidence cases with timeout
             result = await asyncio.wait_for(
                 self._llm_intent_analysis(message, profile, trip_details),
                 timeout=4.0  # Aggressive 4 second timeout
             )
             
+            # Confident LLM labels become training data for the local classifier
+            if result.get("intent") and result.get("confidence", 0) >= 0.8:
+                self.intent_classifier.log_example(message, result["intent"])
+            
             # Cache successful result
-            self._cache_response(cache_key, result)
+            self.semantic_cache.set("intent", message, cache_slots, result)
             return result
             
         except asyncio.TimeoutError:
@@ -389,15 +388,12 @@ Rules:
         """Handle general travel inquiries and greetings using LLM"""
         try:
             # Determine query type for better LLM response
-            query_type = "general"
-            if any(word in message.lower() for word in ["destination", "place", "where to go", "suggest", "recommend"]):
-                query_type = "destination_suggestion"
-            elif any(word in message.lower() for word in ["hotel", "accommodation", "stay", "resort", "lodge"]):
-                query_type = "accommodation_suggestion"
-            elif any(word in message.lower() for word in ["beach", "beaches", "coastal", "seaside"]):
-                query_type = "beach_suggestion"
-            elif any(word in message.lower() for word in ["hello", "hi", "hey", "good morning", "good evening"]):
-                query_type = "greeting"
+            matches = self.keyword_matcher.match(message)
+            query_type = matches.best("query_type") or "general"
+            
+            # Answers are written to the user's wording, so only the same normalized question reuses one
+            cache_slots = {"query_type": query_type, "destination": matches.first("destination")}
+            cached = self.semantic_cache.get("general_inquiry", message, cache_slots, semantic=False)
             
             context = f"""
             You are Travello.ai, a friendly AI travel assistant. The user said: "{message}"
@@ -420,9 +416,12 @@ Rules:
             Don't use JSON format - just respond naturally as Travello.ai.
             """
             
-            user_msg = UserMessage(text=context)
-            llm_client = self._get_llm_client(session_id)
-            response = await llm_client.send_message(user_msg)
+            if cached:
+                response = cached["response"]
+            else:
+                user_msg = UserMessage(text=context)
+                llm_client = self._get_llm_client(session_id)
+                response = await llm_client.send_message(user_msg)
             
             # Generate contextual follow-up questions based on query type
             if query_type == "destination_suggestion":
@@ -456,6 +455,8 @@ Rules:
             
             # Generate dynamic recommendation cards based on query type using LLM
             ui_actions = []
+            llm_recommendations = cached["recommendations"] if cached else []
+            recommendations_ok = True
             if query_type in ["destination_suggestion", "beach_suggestion", "accommodation_suggestion"]:
                 # Only generate recommendations for specific travel queries, not general conversation
                 recommendations_prompt = f"""
@@ -513,84 +514,88 @@ Rules:
                 IMPORTANT: Copy the image URLs exactly as shown above. Do not create new URLs.
                 """
                 
-                try:
-                    rec_client = self._get_llm_client(session_id)
-                    rec_response = await rec_client.send_message(UserMessage(text=recommendations_prompt))
+                if not cached:
+                    try:
+                        rec_client = self._get_llm_client(session_id)
+                        rec_response = await rec_client.send_message(UserMessage(text=recommendations_prompt))
                     
-                    # Parse LLM recommendations
-                    import json
-                    import re
-                    json_text = rec_response
-                    if '```json' in json_text:
-                        json_match = re.search(r'```json\s*(.*?)\s*```', json_text, re.DOTALL)
-                        if json_match:
-                            json_text = json_match.group(1)
-                    elif '```' in json_text:
-                        json_match = re.search(r'```\s*(.*?)\s*```', json_text, re.DOTALL)
-                        if json_match:
-                            json_text = json_match.group(1)
+                        # Parse LLM recommendations
+                        import json
+                        import re
+                        json_text = rec_response
+                        if '```json' in json_text:
+                            json_match = re.search(r'```json\s*(.*?)\s*```', json_text, re.DOTALL)
+                            if json_match:
+                                json_text = json_match.group(1)
+                        elif '```' in json_text:
+                            json_match = re.search(r'```\s*(.*?)\s*```', json_text, re.DOTALL)
+                            if json_match:
+                                json_text = json_match.group(1)
                     
-                    recommendations = json.loads(json_text.strip())
+                        recommendations = json.loads(json_text.strip())
                     
-                    # Validate and fix image URLs
-                    image_map = {
-                        "beach": "https://images.unsplash.com/photo-1596402184320-417e7178b2cd?w=400&h=300&fit=crop",
-                        "goa": "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400&h=300&fit=crop", 
-                        "kerala": "https://images.unsplash.com/photo-1580490006164-4d93fc09ea97?w=400&h=300&fit=crop",
-                        "hotel": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=400&h=300&fit=crop",
-                        "luxury": "https://images.unsplash.com/photo-1578645510447-e20b4311e3ce?w=400&h=300&fit=crop",
-                        "mountain": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=400&h=300&fit=crop",
-                        "city": "https://images.unsplash.com/photo-1524492412937-b28074a5d7da?w=400&h=300&fit=crop",
-                        "cultural": "https://images.unsplash.com/photo-1591640140449-bfb5d00b8c3b?w=400&h=300&fit=crop",
-                        "default": "https://images.unsplash.com/photo-1488646953014-85cb44e25828?w=400&h=300&fit=crop"
-                    }
+                        # Validate and fix image URLs
+                        image_map = {
+                            "beach": "https://images.unsplash.com/photo-1596402184320-417e7178b2cd?w=400&h=300&fit=crop",
+                            "goa": "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400&h=300&fit=crop", 
+                            "kerala": "https://images.unsplash.com/photo-1580490006164-4d93fc09ea97?w=400&h=300&fit=crop",
+                            "hotel": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=400&h=300&fit=crop",
+                            "luxury": "https://images.unsplash.com/photo-1578645510447-e20b4311e3ce?w=400&h=300&fit=crop",
+                            "mountain": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=400&h=300&fit=crop",
+                            "city": "https://images.unsplash.com/photo-1524492412937-b28074a5d7da?w=400&h=300&fit=crop",
+                            "cultural": "https://images.unsplash.com/photo-1591640140449-bfb5d00b8c3b?w=400&h=300&fit=crop",
+                            "default": "https://images.unsplash.com/photo-1488646953014-85cb44e25828?w=400&h=300&fit=crop"
+                        }
                     
-                    for rec in recommendations:
-                        # Fix invalid image URLs
-                        if rec.get("image") and not rec["image"].startswith("https://images.unsplash.com/photo-"):
-                            # Try to find appropriate image based on title/category
-                            title_lower = rec.get("title", "").lower()
-                            category_lower = rec.get("category", "").lower()
+                        for rec in recommendations:
+                            # Fix invalid image URLs
+                            if rec.get("image") and not rec["image"].startswith("https://images.unsplash.com/photo-"):
+                                # Try to find appropriate image based on title/category
+                                title_lower = rec.get("title", "").lower()
+                                category_lower = rec.get("category", "").lower()
                             
-                            if any(word in title_lower for word in ["beach", "coastal", "seaside"]):
-                                rec["image"] = image_map["beach"]
-                            elif any(word in title_lower for word in ["goa", "anjuna", "baga"]):
-                                rec["image"] = image_map["goa"]  
-                            elif any(word in title_lower for word in ["kerala", "backwater", "alleppey", "varkala"]):
-                                rec["image"] = image_map["kerala"]
-                            elif any(word in title_lower for word in ["hotel", "resort", "accommodation"]):
-                                if "luxury" in title_lower or "premium" in title_lower:
-                                    rec["image"] = image_map["luxury"]
+                                if any(word in title_lower for word in ["beach", "coastal", "seaside"]):
+                                    rec["image"] = image_map["beach"]
+                                elif any(word in title_lower for word in ["goa", "anjuna", "baga"]):
+                                    rec["image"] = image_map["goa"]  
+                                elif any(word in title_lower for word in ["kerala", "backwater", "alleppey", "varkala"]):
+                                    rec["image"] = image_map["kerala"]
+                                elif any(word in title_lower for word in ["hotel", "resort", "accommodation"]):
+                                    if "luxury" in title_lower or "premium" in title_lower:
+                                        rec["image"] = image_map["luxury"]
+                                    else:
+                                        rec["image"] = image_map["hotel"]
+                                elif any(word in title_lower for word in ["mountain", "hill", "trek"]):
+                                    rec["image"] = image_map["mountain"]
+                                elif any(word in title_lower for word in ["city", "urban", "metro"]):
+                                    rec["image"] = image_map["city"]
+                                elif any(word in title_lower for word in ["temple", "heritage", "cultural"]):
+                                    rec["image"] = image_map["cultural"]
                                 else:
-                                    rec["image"] = image_map["hotel"]
-                            elif any(word in title_lower for word in ["mountain", "hill", "trek"]):
-                                rec["image"] = image_map["mountain"]
-                            elif any(word in title_lower for word in ["city", "urban", "metro"]):
-                                rec["image"] = image_map["city"]
-                            elif any(word in title_lower for word in ["temple", "heritage", "cultural"]):
-                                rec["image"] = image_map["cultural"]
-                            else:
+                                    rec["image"] = image_map["default"]
+                            elif not rec.get("image"):
+                                # If no image provided, set default
                                 rec["image"] = image_map["default"]
-                        elif not rec.get("image"):
-                            # If no image provided, set default
-                            rec["image"] = image_map["default"]
                         
-                        # Double-check: if image still doesn't start with proper URL, use default
-                        if not rec["image"].startswith("https://images.unsplash.com/photo-"):
-                            rec["image"] = image_map["default"]
+                            # Double-check: if image still doesn't start with proper URL, use default
+                            if not rec["image"].startswith("https://images.unsplash.com/photo-"):
+                                rec["image"] = image_map["default"]
                     
-                    for rec in recommendations:
-                        ui_actions.append(
-                            UIAction(
-                                type="card_add",
-                                payload=rec
-                            ).dict()
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"LLM recommendations error: {e}")
-                    # Fallback to default recommendations if LLM fails
-                    pass
+                        llm_recommendations = recommendations
+                    
+                    except Exception as e:
+                        logger.error(f"LLM recommendations error: {e}")
+                        # Fallback to default recommendations if LLM fails
+                        recommendations_ok = False
+                
+                for rec in llm_recommendations:
+                    ui_actions.append(
+                        UIAction(
+                            type="card_add",
+                            payload=rec
+                        ).dict()
+                    )
+                
                 # Add popular destination cards to showcase capabilities
                 sample_destinations = [
                     {
@@ -639,6 +644,12 @@ Rules:
                         ).dict()
                     )
             
+            if not cached and recommendations_ok:
+                self.semantic_cache.set("general_inquiry", message, cache_slots, {
+                    "response": response,
+                    "recommendations": llm_recommendations
+                })
+            
             return ChatResponse(
                 chat_text=response,  # Use the LLM response directly
                 ui_actions=ui_actions,
@@ -729,40 +740,23 @@ Rules:
                 ui_actions=[]
             )
 
-    def _extract_destination(self, message: str) -> Optional[str]:
-        """Extract destination from message"""
-        destinations = [
-            "Goa", "Kerala", "Rajasthan", "Manali", "Rishikesh", "Kashmir", "Ladakh",
-            "Andaman Islands", "Pondicherry", "Himachal Pradesh", "Mumbai", "Delhi",
-            "Bangalore", "Chennai", "Hyderabad", "Pune", "Jaipur", "Udaipur", "Jodhpur"
-        ]
-        
-        message_lower = message.lower()
-        for dest in destinations:
-            if dest.lower() in message_lower:
-                return dest
-        return None
+    def _extract_destination(self, matches: KeywordMatches) -> Optional[str]:
+        """Extract destination from keyword matches"""
+        return matches.first("destination")
 
-    def _extract_trip_info(self, message: str) -> Dict[str, Any]:
-        """Extract trip information from message"""
+    def _extract_trip_info(self, matches: KeywordMatches) -> Dict[str, Any]:
+        """Extract trip information from keyword matches"""
         info = {}
-        message_lower = message.lower()
         
-        # Extract budget indicators
-        if any(word in message_lower for word in ["luxury", "premium", "high-end"]):
-            info["budget_preference"] = "luxury"
-        elif any(word in message_lower for word in ["budget", "cheap", "affordable"]):
-            info["budget_preference"] = "budget"
-        elif any(word in message_lower for word in ["mid-range", "moderate"]):
-            info["budget_preference"] = "mid-range"
+        destination = self._extract_destination(matches)
+        if destination:
+            info["destination"] = destination
         
-        # Extract travel style
-        if any(word in message_lower for word in ["adventure", "exciting", "thrill"]):
-            info["travel_style"] = "adventurous"
-        elif any(word in message_lower for word in ["culture", "heritage", "history"]):
-            info["travel_style"] = "cultural"
-        elif any(word in message_lower for word in ["relax", "spa", "peaceful"]):
-            info["travel_style"] = "relaxation"
+        # Budget indicators and travel style
+        for field in ("budget_preference", "travel_style"):
+            value = matches.best(field)
+            if value:
+                info[field] = value
         
         return info
 
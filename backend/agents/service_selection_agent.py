@@ -7,8 +7,8 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
 import logging
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-import os
+from utils.service_catalog import get_service_catalog, price_band
+from utils.service_vectors import get_service_vectorizer
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +21,10 @@ class ServiceSelectionAgent:
             "activities": ["adventure", "culture", "nature", "food", "shopping", "wellness"],
             "transportation": ["private_cab", "shared_cab", "public_transport", "rental_car", "luxury_transport"]
         }
-    
-    def _get_llm_client(self, session_id: str) -> LlmChat:
-        """Get LLM client for service analysis"""
-        return LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=session_id,
-            system_message="You are a travel service expert who ranks and recommends services based on traveler profiles."
-        ).with_model("openai", "gpt-4o-mini")
+        
+        # Local catalog loaded once (index lookups instead of per-request generation)
+        self.catalog = get_service_catalog()
+        self.vectorizer = get_service_vectorizer()
     
     async def get_service_recommendations(self, 
                                        session_id: str,
@@ -50,97 +46,58 @@ class ServiceSelectionAgent:
             List of top 10 ranked services
         """
         try:
-            # Use fallback services first for speed, then enhance with LLM if time allows
-            fallback_services = self._generate_fallback_services(service_type, location, 10)
-            
-            # Quick LLM enhancement with simplified prompt
-            try:
-                enhanced_services = await asyncio.wait_for(
-                    self._enhance_services_with_llm(session_id, service_type, location, traveler_profile, fallback_services),
-                    timeout=15.0  # 15 second timeout
-                )
-                return enhanced_services
-            except asyncio.TimeoutError:
-                logger.warning(f"LLM enhancement timed out, using fallback services for {service_type} in {location}")
-                # Rank fallback services by simple heuristics
-                return self._rank_fallback_services(fallback_services, traveler_profile)
+            # Catalog index lookup first; synthesized services only for locations not in the catalog
+            services = self._get_catalog_services(service_type, location, traveler_profile, activity_context or {})
+            if services:
+                return services
+            return self._rank_fallback_services(self._generate_fallback_services(service_type, location, 10), traveler_profile)
             
         except Exception as e:
             logger.error(f"Service recommendation error: {e}")
             return self._generate_fallback_services(service_type, location, 10)
     
-    async def _enhance_services_with_llm(self, session_id: str, service_type: str, location: str, 
-                                       traveler_profile: Dict, fallback_services: List[Dict]) -> List[Dict]:
-        """Enhanced services with LLM ranking (with timeout protection)"""
+    def _get_catalog_services(self, service_type: str, location: str, traveler_profile: Dict,
+                              activity_context: Dict, count: int = 10) -> List[Dict]:
+        """Get top services from the catalog for a location, scored by profile similarity"""
         try:
-            # Simplified prompt for faster processing
-            prompt = f"""
-            Rank these {service_type} services in {location} for this traveler:
-            Profile: {traveler_profile.get('vacation_style', 'balanced')} style, {traveler_profile.get('budget_level', 'moderate')} budget
-            
-            Services: {[s['name'] for s in fallback_services[:5]]}  # Only rank top 5 for speed
-            
-            Return ONLY a JSON array of rankings [1,2,3,4,5] where 1=best match:
-            """
+            budget_level = traveler_profile.get('budget_level', 'moderate')
+            profile_vector = self.vectorizer.encode_profile(traveler_profile)
             
-            llm_client = self._get_llm_client(session_id)
-            response = await llm_client.send_message(UserMessage(text=prompt))
+            services = self.catalog.query(
+                location,
+                service_type,
+                score_fn=lambda row_ids: self.catalog.similarity(row_ids, profile_vector),
+                k=count,
+                price_band=activity_context.get('price_band'),
+                features=activity_context.get('required_features')
+            )
             
-            # Simple parsing
-            import json
-            import re
-            
-            json_match = re.search(r'\[[\d,\s]+\]', response)
-            if json_match:
-                rankings = json.loads(json_match.group(0))
-                
-                # Apply rankings to services
-                ranked_services = []
-                for rank in rankings:
-                    if 1 <= rank <= len(fallback_services):
-                        service = fallback_services[rank-1].copy()
-                        service['similarity_score'] = 1.0 - (rank-1) * 0.1  # Convert rank to score
-                        ranked_services.append(service)
-                
-                # Add remaining services
-                for i, service in enumerate(fallback_services):
-                    if i+1 not in rankings:
-                        service_copy = service.copy()
-                        service_copy['similarity_score'] = 0.5
-                        ranked_services.append(service_copy)
-                
-                # Sort by similarity score (descending) to ensure proper ranking
-                ranked_services.sort(key=lambda x: x['similarity_score'], reverse=True)
-                return ranked_services[:10]
+            for service in services:
+                service['match_reasons'] = self.vectorizer.match_reasons(
+                    self.catalog.vectors[self.catalog.row_by_id[service['id']]], profile_vector, budget_level
+                )
+                if service['rating'] >= 4.5:
+                    service['match_reasons'].append(f"Highly rated ({service['rating']}★)")
             
-            # Fallback to original services if parsing fails
-            return self._rank_fallback_services(fallback_services, traveler_profile)
+            return services
             
         except Exception as e:
-            logger.error(f"LLM enhancement failed: {e}")
-            return self._rank_fallback_services(fallback_services, traveler_profile)
+            logger.error(f"Catalog lookup error: {e}")
+            return []
     
     def _rank_fallback_services(self, services: List[Dict], traveler_profile: Dict) -> List[Dict]:
-        """Rank services using simple heuristics"""
+        """Rank services by profile similarity of their feature vectors"""
         budget_level = traveler_profile.get('budget_level', 'moderate')
-        vacation_style = traveler_profile.get('vacation_style', 'balanced')
+        profile_vector = self.vectorizer.encode_profile(traveler_profile)
         
-        for i, service in enumerate(services):
-            score = 0.8 - i * 0.05  # Base descending score
-            
-            # Budget matching
-            if budget_level == 'luxury' and service['price'] > 3000:
-                score += 0.1
-            elif budget_level == 'budget' and service['price'] < 2000:
-                score += 0.1
-            elif budget_level == 'moderate' and 2000 <= service['price'] <= 4000:
-                score += 0.1
-            
-            # Style matching  
-            if vacation_style == 'adventurous' and service.get('rating', 4.0) > 4.2:
-                score += 0.05
-            
-            service['similarity_score'] = max(0.1, min(1.0, score))
+        for service in services:
+            service.setdefault('price_band', price_band(service.get('type', ''), service.get('price', 0)))
+        
+        vectors = self.vectorizer.encode_services(services)
+        scores = vectors @ profile_vector
+        for service, vector, score in zip(services, vectors, scores):
+            service['similarity_score'] = round(float(score), 3)
+            service['match_reasons'] = self.vectorizer.match_reasons(vector, profile_vector, budget_level)
         
         # Sort by similarity score
         return sorted(services, key=lambda x: x['similarity_score'], reverse=True)
@@ -12,6 +12,7 @@ from emergentintegrations.llm.chat import LlmChat, UserMessage
 from models.schemas import ItineraryVariant, Activity
 from utils.event_bus import EventBus, EventTypes
 from utils.context_store import ContextStore
+from utils.seasonality import get_seasonality_table, parse_travel_date
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,10 @@ class SustainabilitySeasonalityAgent:
         self.context_store = context_store
         self.event_bus = event_bus
         self.api_key = os.environ.get('EMERGENT_LLM_KEY')
+        
+        # Shared (destination, month) season table
+        self.seasonality = get_seasonality_table()
+        self.seasonal_data = self.seasonality.seasonal_data
     
     def _get_llm_client(self, session_id: str) -> LlmChat:
         """Get LLM client for session"""
@@ -401,7 +406,9 @@ class SustainabilitySeasonalityAgent:
             if not travel_date:
                 return variant
             
-            date_obj = datetime.fromisoformat(travel_date)
+            date_obj = parse_travel_date(travel_date)
+            if not date_obj:
+                raise ValueError(f"Invalid travel date: {travel_date}")
             month = date_obj.month
             
             # Get destination seasonal data
@@ -427,66 +434,12 @@ class SustainabilitySeasonalityAgent:
     def _get_seasonal_info(self, destination: str, month: int) -> Optional[Dict[str, Any]]:
         """Get seasonal information for destination and month"""
         try:
-            # Find matching destination
-            dest_key = None
-            for key in self.seasonal_data.keys():
-                if key in destination:
-                    dest_key = key
-                    break
-            
-            if not dest_key:
-                return None
-            
-            dest_data = self.seasonal_data[dest_key]
-            seasonal_info = {"destination": dest_key, "month": month}
-            
-            # Determine season type
-            if self._is_in_season_range(month, dest_data.get("peak_season", [])):
-                seasonal_info["season_type"] = "peak"
-            elif self._is_in_season_range(month, dest_data.get("monsoon", [])):
-                seasonal_info["season_type"] = "monsoon"
-            elif self._is_in_season_range(month, dest_data.get("best_weather", [])):
-                seasonal_info["season_type"] = "ideal"
-            else:
-                seasonal_info["season_type"] = "normal"
-            
-            # Check for events
-            seasonal_info["events"] = []
-            for event_name, event_data in dest_data.get("events", {}).items():
-                for date_range in event_data["dates"]:
-                    if self._is_date_in_range(month, date_range):
-                        seasonal_info["events"].append({
-                            "name": event_name,
-                            "impact": event_data["impact"]
-                        })
-            
-            return seasonal_info
+            return self.seasonality.get_seasonal_info(destination, month)
             
         except Exception as e:
             logger.error(f"Seasonal info retrieval error: {e}")
             return None
 
-    def _is_in_season_range(self, month: int, season_ranges: List[tuple]) -> bool:
-        """Check if month is in season range"""
-        for start_month, end_month in season_ranges:
-            if start_month <= end_month:  # Same year range
-                if start_month <= month <= end_month:
-                    return True
-            else:  # Cross-year range (e.g., Nov to Mar)
-                if month >= start_month or month <= end_month:
-                    return True
-        return False
-
-    def _is_date_in_range(self, month: int, date_range: tuple) -> bool:
-        """Check if date is in event range"""
-        if len(date_range) == 4:  # (start_month, start_day, end_month, end_day)
-            start_month, start_day, end_month, end_day = date_range
-            if start_month <= end_month:  # Same year
-                return start_month <= month <= end_month
-            else:  # Cross-year
-                return month >= start_month or month <= end_month
-        return False
-
     async def _adjust_activities_for_season(self, variant: ItineraryVariant, seasonal_info: Dict[str, Any], travel_date: datetime) -> ItineraryVariant:
         """Adjust activities based on seasonal information"""
         try:
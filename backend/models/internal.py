@@ -0,0 +1,144 @@
+"""
+Lightweight internal itinerary models used inside agents
+Slotted dataclasses mirroring the Activity/DayItinerary/ItineraryVariant schemas; data is validated once
+by Pydantic at the API boundary (models/schemas.py), so conversion here only checks required keys and enums
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models.schemas import ActivityType, ItineraryVariantType
+
+
+def _required(data: Dict[str, Any], key: str) -> Any:
+    try:
+        return data[key]
+    except KeyError:
+        raise ValueError(f"Missing required field: {key}") from None
+
+
+@dataclass(slots=True)
+class ActivityData:
+    id: str
+    name: str
+    type: ActivityType
+    time: str
+    duration: str
+    location: str
+    description: str
+    cost: float
+    image: Optional[str] = None
+    booking_url: Optional[str] = None
+    sustainability_tags: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ActivityData":
+        return cls(
+            id=_required(data, "id"),
+            name=_required(data, "name"),
+            type=ActivityType(_required(data, "type")),
+            time=_required(data, "time"),
+            duration=_required(data, "duration"),
+            location=_required(data, "location"),
+            description=_required(data, "description"),
+            cost=float(_required(data, "cost")),
+            image=data.get("image"),
+            booking_url=data.get("booking_url"),
+            sustainability_tags=list(data.get("sustainability_tags") or [])
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "time": self.time,
+            "duration": self.duration,
+            "location": self.location,
+            "description": self.description,
+            "cost": self.cost,
+            "image": self.image,
+            "booking_url": self.booking_url,
+            "sustainability_tags": list(self.sustainability_tags)
+        }
+
+
+@dataclass(slots=True)
+class DayData:
+    day: int
+    date: str
+    theme: str
+    activities: List[ActivityData]
+    total_cost: float
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DayData":
+        return cls(
+            day=int(_required(data, "day")),
+            date=_required(data, "date"),
+            theme=_required(data, "theme"),
+            activities=[ActivityData.from_dict(activity) for activity in _required(data, "activities")],
+            total_cost=float(_required(data, "total_cost"))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "day": self.day,
+            "date": self.date,
+            "theme": self.theme,
+            "activities": [activity.to_dict() for activity in self.activities],
+            "total_cost": self.total_cost
+        }
+
+
+@dataclass(slots=True)
+class VariantData:
+    id: str
+    type: ItineraryVariantType
+    title: str
+    description: str
+    days: int
+    total_cost: float
+    daily_itinerary: List[DayData]
+    highlights: List[str]
+    persona_match: float
+    sustainability_score: float
+    total_activities: int
+    activity_types: List[str]
+    recommended: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VariantData":
+        return cls(
+            id=_required(data, "id"),
+            type=ItineraryVariantType(_required(data, "type")),
+            title=_required(data, "title"),
+            description=_required(data, "description"),
+            days=int(_required(data, "days")),
+            total_cost=float(_required(data, "total_cost")),
+            daily_itinerary=[DayData.from_dict(day) for day in _required(data, "daily_itinerary")],
+            highlights=list(_required(data, "highlights")),
+            persona_match=float(_required(data, "persona_match")),
+            sustainability_score=float(_required(data, "sustainability_score")),
+            total_activities=int(_required(data, "total_activities")),
+            activity_types=list(_required(data, "activity_types")),
+            recommended=bool(data.get("recommended", False))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape as ItineraryVariant.dict()"""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "title": self.title,
+            "description": self.description,
+            "days": self.days,
+            "total_cost": self.total_cost,
+            "daily_itinerary": [day.to_dict() for day in self.daily_itinerary],
+            "highlights": list(self.highlights),
+            "persona_match": self.persona_match,
+            "sustainability_score": self.sustainability_score,
+            "recommended": self.recommended,
+            "total_activities": self.total_activities,
+            "activity_types": list(self.activity_types)
+        }
@@ -53,6 +53,15 @@ class PersonaClassificationRequest(BaseModel):
     trip_details: Dict[str, Any] = Field(..., description="Trip details")
     profile_data: Dict[str, Any] = Field(..., description="Profile data")
 
+class PersonaClassificationBatchItem(BaseModel):
+    id: Optional[str] = Field(None, description="Caller-supplied item ID")
+    trip_details: Dict[str, Any] = Field(default_factory=dict, description="Trip details")
+    profile_data: Dict[str, Any] = Field(default_factory=dict, description="Profile data")
+
+class PersonaClassificationBatchRequest(BaseModel):
+    items: List[PersonaClassificationBatchItem] = Field(..., description="Profiles to classify")
+    include_reasoning: bool = Field(False, description="Include reasoning per item")
+
 class ItineraryGenerationRequest(BaseModel):
     session_id: str = Field(..., description="Session ID")
     trip_details: Dict[str, Any] = Field(..., description="Trip details")
@@ -63,6 +72,10 @@ class CustomizationRequest(BaseModel):
     itinerary_id: str = Field(..., description="Itinerary ID")
     customizations: List[Dict[str, Any]] = Field(..., description="Customizations")
 
+class CustomizationHistoryRequest(BaseModel):
+    session_id: str = Field(..., description="Session ID")
+    itinerary_id: str = Field(..., description="Itinerary ID")
+
 class PricingUpdateRequest(BaseModel):
     session_id: str = Field(..., description="Session ID")
     itinerary_id: str = Field(..., description="Itinerary ID")
@@ -71,6 +84,14 @@ class ExternalBookingRequest(BaseModel):
     session_id: str = Field(..., description="Session ID")
     booking_details: Dict[str, Any] = Field(..., description="Booking details")
 
+class BatchBookingRequest(BaseModel):
+    session_id: str = Field(..., description="Session ID")
+    items: List[Dict[str, Any]] = Field(default_factory=list, description="Booking items (activities or cart components)")
+    cart: Optional[Dict[str, Any]] = Field(None, description="Checkout cart, booked from its booking_components when items is empty")
+    cart_id: Optional[str] = Field(None, description="Cart ID")
+    booking_defaults: Dict[str, Any] = Field(default_factory=dict, description="Fields shared by all items")
+    max_concurrency: int = Field(4, ge=1, le=16, description="Maximum concurrent provider calls")
+
 # Response Models
 class UIAction(BaseModel):
     type: str = Field(..., description="UI action type")
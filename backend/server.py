@@ -13,6 +13,7 @@ import time
 import uuid
 import httpx
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from pydantic import BaseModel, Field
@@ -24,8 +25,14 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App lifecycle: close pooled provider connections on shutdown"""
+    yield
+    await booking_agent.aclose()
+
 # FastAPI app with CORS
-app = FastAPI(title="Travello.ai Backend", version="2.0.0")
+app = FastAPI(title="Travello.ai Backend", version="2.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,14 +51,29 @@ from agents.pricing_agent import PricingAgent
 from agents.service_selection_agent import ServiceSelectionAgent
 from agents.conflict_detection_agent import ConflictDetectionAgent
 from agents.dynamic_pricing_agent import DynamicPricingAgent
+from agents.external_booking_agent import ExternalBookingAgent
 from utils.context_store import ContextStore
 from utils.event_bus import EventBus
+from utils.frozen_itinerary import freeze, changed_indices, reorder_days, move_activity, insert_day, remove_day, lock_activity
+from utils.itinerary_versions import ItineraryVersionStore, VersionConflictError
+from utils.json_patch import PatchError, apply_patch, make_patch
+from utils.operation_log import OperationLogStore
+from utils.geo import get_gazetteer
+from utils.route_optimizer import get_route_optimizer
 from models.schemas import *
 
 # Initialize context store and event bus
 context_store = ContextStore()
 event_bus = EventBus()
 
+# Shared gazetteer (POI index and travel-time matrices)
+gazetteer = get_gazetteer()
+route_optimizer = get_route_optimizer()
+
+# Server-held itinerary versions for delta edits
+itinerary_versions = ItineraryVersionStore()
+operation_logs = OperationLogStore()
+
 # Initialize all agents with required dependencies
 profile_intake = ProfileIntakeAgent(context_store, event_bus)
 persona_classifier = PersonaClassificationAgent(context_store, event_bus)
@@ -63,12 +85,12 @@ pricing_agent = PricingAgent(context_store, event_bus)
 service_selector = ServiceSelectionAgent()
 conflict_detector = ConflictDetectionAgent()
 dynamic_pricing_agent = DynamicPricingAgent()
+booking_agent = ExternalBookingAgent(context_store, event_bus)
 
 # Initialize placeholder agents (to be implemented later)
 class PlaceholderAgent:
     pass
 
-booking_agent = PlaceholderAgent()
 sustainability_agent = PlaceholderAgent()
 
 # Register agents with event bus
@@ -206,6 +228,27 @@ async def persona_classification_endpoint(request: PersonaClassificationRequest)
             ui_actions=[]
         )
 
+@app.post("/api/persona-classification/batch")
+async def persona_classification_batch_endpoint(request: PersonaClassificationBatchRequest):
+    """Rule-based persona classification for many profiles in one scoring pass"""
+    try:
+        logger.info(f"🎭 Batch persona classification for {len(request.items)} profiles")
+        
+        classifications = persona_classifier.classify_batch(
+            [(item.profile_data, item.trip_details) for item in request.items],
+            include_reasoning=request.include_reasoning
+        )
+        results = [
+            {"id": item.id if item.id is not None else str(idx), **classification}
+            for idx, (item, classification) in enumerate(zip(request.items, classifications))
+        ]
+        
+        return {"results": results, "count": len(results)}
+        
+    except Exception as e:
+        logger.error(f"Batch persona classification error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/generate-itinerary")
 async def generate_itinerary_endpoint(request: ItineraryGenerationRequest):
     """Generate enhanced itinerary variants using parallel Master Travel Planner agents"""
@@ -426,12 +469,14 @@ async def check_itinerary_conflicts(request: dict):
     try:
         session_id = request.get("session_id")
         itinerary = request.get("itinerary", [])
+        defer_llm = request.get("defer_llm", False)
         
         logger.info(f"🚨 Checking conflicts for {len(itinerary)}-day itinerary")
         
         conflict_results = await conflict_detector.check_itinerary_conflicts(
             session_id=session_id,
-            itinerary=itinerary
+            itinerary=itinerary,
+            defer_llm=defer_llm
         )
         
         # Get resolution suggestions if conflicts exist
@@ -453,75 +498,298 @@ async def check_itinerary_conflicts(request: dict):
         logger.error(f"Conflict check error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/conflict-analysis/{analysis_id}")
+async def get_conflict_analysis(analysis_id: str):
+    """Poll for background LLM conflict analysis"""
+    result = conflict_detector.get_conflict_analysis(analysis_id)
+    if result["status"] == "not_found":
+        raise HTTPException(status_code=404, detail=f"Conflict analysis {analysis_id} not found")
+    return result
+
+@app.get("/api/conflict-analysis/{analysis_id}/stream")
+async def stream_conflict_analysis(analysis_id: str):
+    """Stream background LLM conflict analysis as a server-sent event once ready"""
+    from fastapi.responses import StreamingResponse
+    import json
+    
+    async def event_stream():
+        result = await conflict_detector.wait_for_conflict_analysis(analysis_id)
+        yield f"event: conflict_analysis\ndata: {json.dumps(result)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/api/itineraries")
+async def hold_itinerary(request: dict):
+    """Hold an itinerary server-side so clients can send delta edits against its version"""
+    record = itinerary_versions.create(request.get("itinerary", []), request.get("session_id"))
+    operation_logs.start(record["itinerary_id"], record["itinerary"], record["version"])
+    return {"itinerary_id": record["itinerary_id"], "version": record["version"]}
+
+@app.get("/api/itineraries/{itinerary_id}")
+async def get_held_itinerary(itinerary_id: str, version: Optional[int] = None):
+    """Full current version of a held itinerary (e.g. to resync after a 409), or an earlier `version` from its edit log"""
+    record = itinerary_versions.get(itinerary_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Itinerary {itinerary_id} not found")
+    if version is None or version == record["version"]:
+        return {"itinerary_id": itinerary_id, "version": record["version"], "itinerary": record["itinerary"]}
+    
+    log = operation_logs.get(itinerary_id)
+    itinerary = log.state_at_version(version) if log else None
+    if itinerary is None:
+        raise HTTPException(status_code=404, detail=f"Version {version} of itinerary {itinerary_id} is no longer available")
+    return {"itinerary_id": itinerary_id, "version": version, "itinerary": itinerary}
+
+@app.get("/api/itineraries/{itinerary_id}/history")
+async def get_itinerary_history(itinerary_id: str):
+    """Logged edits of a held itinerary, oldest first"""
+    record = itinerary_versions.get(itinerary_id)
+    log = operation_logs.get(itinerary_id)
+    if record is None or log is None:
+        raise HTTPException(status_code=404, detail=f"Itinerary {itinerary_id} not found")
+    return {
+        "itinerary_id": itinerary_id,
+        "version": record["version"],
+        "history": log.history(),
+        "can_undo": log.can_undo,
+        "can_redo": log.can_redo
+    }
+
+@app.post("/api/itineraries/{itinerary_id}/undo")
+async def undo_itinerary_edit(itinerary_id: str, request: dict):
+    """Undo the last edit of a held itinerary; the restored state is committed as a new version"""
+    return await _step_itinerary_history(itinerary_id, request, "undo")
+
+@app.post("/api/itineraries/{itinerary_id}/redo")
+async def redo_itinerary_edit(itinerary_id: str, request: dict):
+    """Redo the last undone edit of a held itinerary; the restored state is committed as a new version"""
+    return await _step_itinerary_history(itinerary_id, request, "redo")
+
+async def _step_itinerary_history(itinerary_id: str, request: dict, direction: str) -> dict:
+    """Move a held itinerary one step through its operation log, responding like a delta edit"""
+    try:
+        session_id = request.get("session_id")
+        base_version = request.get("version")
+        record = itinerary_versions.get(itinerary_id)
+        log = operation_logs.get(itinerary_id)
+        if record is None or log is None:
+            raise HTTPException(status_code=404, detail=f"Itinerary {itinerary_id} not found")
+        if base_version != record["version"]:
+            raise HTTPException(status_code=409, detail={
+                "message": f"Itinerary {itinerary_id} is at version {record['version']}",
+                "current_version": record["version"]
+            })
+        if not (log.can_undo if direction == "undo" else log.can_redo):
+            raise HTTPException(status_code=409, detail=f"Nothing to {direction}")
+        
+        itinerary = record["itinerary"]
+        step = log.undo if direction == "undo" else log.redo
+        restored_itinerary = step(base_version + 1)
+        record = itinerary_versions.commit(itinerary_id, base_version, restored_itinerary)
+        logger.info(f"↩️ {direction.capitalize()} on itinerary {itinerary_id} -> version {record['version']}")
+        
+        conflict_check = await conflict_detector.check_itinerary_conflicts(
+            session_id, list(restored_itinerary), defer_llm=True,
+            modified_days=changed_indices(itinerary, restored_itinerary)
+        )
+        
+        return {
+            "operation": direction,
+            "conflict_check": conflict_check,
+            "success": True,
+            "session_id": session_id,
+            "itinerary_id": itinerary_id,
+            "base_version": base_version,
+            "version": record["version"],
+            "patch": make_patch(itinerary, restored_itinerary),
+            "can_undo": log.can_undo,
+            "can_redo": log.can_redo
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Itinerary {direction} error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def apply_itinerary_operation(itinerary: tuple, operation: str, operation_data: dict,
+                              destination: str = "", optimize_route: bool = False) -> tuple:
+    """Apply one named edit operation to a frozen itinerary, returning the edited copy"""
+    if operation == "reorder_days":
+        edited_itinerary = reorder_days(itinerary, operation_data.get("new_order", []))
+        
+    elif operation == "move_activity":
+        edited_itinerary = move_activity(
+            itinerary,
+            operation_data.get("from_day"),
+            operation_data.get("to_day"),
+            operation_data.get("activity_index")
+        )
+            
+    elif operation == "add_destination":
+        new_destination = operation_data.get("destination")
+        day_index = operation_data.get("day_index", len(itinerary))
+        
+        new_day = {
+            "day": day_index + 1,
+            "date": operation_data.get("date"),
+            "title": f"Day {day_index + 1}: {new_destination} Exploration",
+            "activities": []
+        }
+        
+        edited_itinerary = insert_day(itinerary, day_index, new_day)
+        
+    elif operation == "remove_destination":
+        edited_itinerary = remove_day(itinerary, operation_data.get("day_index"))
+        
+    elif operation == "lock_service":
+        edited_itinerary = lock_activity(
+            itinerary,
+            operation_data.get("day_index"),
+            operation_data.get("activity_index"),
+            operation_data.get("service_id")
+        )
+    
+    elif operation == "optimize_day":
+        day_index = operation_data.get("day_index")
+        edited_itinerary = freeze(route_optimizer.optimize_itinerary(list(itinerary), destination, [day_index]))
+    
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown operation: {operation}")
+    
+    # Optionally re-optimize routes of days touched by the edit
+    if optimize_route and operation in ("move_activity", "reorder_days"):
+        touched_days = None
+        if operation == "move_activity":
+            touched_days = [operation_data.get("from_day"), operation_data.get("to_day")]
+        edited_itinerary = freeze(route_optimizer.optimize_itinerary(list(edited_itinerary), destination, touched_days))
+    
+    return edited_itinerary
 
 @app.post("/api/edit-itinerary")
 async def edit_itinerary(request: dict):
-    """Handle itinerary editing operations"""
+    """
+    Handle itinerary editing operations
+    
+    Either send the full `itinerary` (full itinerary returned), or an `itinerary_id` held via
+    /api/itineraries plus the `version` the edit is based on: the response then carries only an
+    RFC 6902 `patch` and the new version, and a stale version is rejected with 409.
+    Edits are a named `operation` with `operation_data`, a raw RFC 6902 `patch`, or a batch of
+    `operations` ([{operation, operation_data}, ...]) applied atomically and conflict-checked once,
+    only on the days they touched.
+    """
     try:
         session_id = request.get("session_id")
-        operation = request.get("operation")  # 'reorder_days', 'move_activity', 'add_destination', 'remove_destination', 'lock_service'
-        itinerary = request.get("itinerary", [])
+        operation = request.get("operation")  # 'reorder_days', 'move_activity', 'add_destination', 'remove_destination', 'lock_service', 'optimize_day'
         operation_data = request.get("operation_data", {})
+        itinerary_id = request.get("itinerary_id")
+        base_version = request.get("version")
+        
+        if itinerary_id:
+            record = itinerary_versions.get(itinerary_id)
+            if record is None:
+                raise HTTPException(status_code=404, detail=f"Itinerary {itinerary_id} not found")
+            if base_version != record["version"]:
+                raise HTTPException(status_code=409, detail={
+                    "message": f"Itinerary {itinerary_id} is at version {record['version']}",
+                    "current_version": record["version"]
+                })
+            itinerary = record["itinerary"]
+        else:
+            # Frozen copy: edits share untouched days and never mutate the caller's data
+            itinerary = freeze(request.get("itinerary", []))
+        
+        if request.get("patch") is not None:
+            operation = "patch"
+            try:
+                edited_itinerary = apply_patch(itinerary, request["patch"])
+            except PatchError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        elif request.get("operations") is not None:
+            # Batch: applied in order on frozen data, so a failing step leaves nothing applied
+            operation = "batch"
+            edited_itinerary = itinerary
+            for position, step in enumerate(request["operations"]):
+                try:
+                    edited_itinerary = apply_itinerary_operation(
+                        edited_itinerary, step.get("operation"), step.get("operation_data", {}),
+                        destination=request.get("destination", ""),
+                        optimize_route=bool(request.get("optimize_route"))
+                    )
+                except HTTPException as e:
+                    raise HTTPException(status_code=400, detail=f"Operation {position} ({step.get('operation')}): {e.detail}")
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"Operation {position} ({step.get('operation')}) failed: {e}")
+        else:
+            edited_itinerary = apply_itinerary_operation(
+                itinerary, operation, operation_data,
+                destination=request.get("destination", ""),
+                optimize_route=bool(request.get("optimize_route"))
+            )
         
-        logger.info(f"✏️ Editing itinerary: {operation}")
+        logger.info(f"✏️ Edited itinerary: {operation}")
         
-        # Handle different edit operations
-        if operation == "reorder_days":
-            new_order = operation_data.get("new_order", [])
-            edited_itinerary = [itinerary[i] for i in new_order if i < len(itinerary)]
-            
-        elif operation == "move_activity":
-            from_day = operation_data.get("from_day")
-            to_day = operation_data.get("to_day")
-            activity_index = operation_data.get("activity_index")
-            
-            edited_itinerary = itinerary.copy()
-            if from_day < len(edited_itinerary) and to_day < len(edited_itinerary):
-                activity = edited_itinerary[from_day]["activities"].pop(activity_index)
-                edited_itinerary[to_day]["activities"].append(activity)
-                
-        elif operation == "add_destination":
-            new_destination = operation_data.get("destination")
-            day_index = operation_data.get("day_index", len(itinerary))
-            
-            new_day = {
-                "day": day_index + 1,
-                "date": operation_data.get("date"),
-                "title": f"Day {day_index + 1}: {new_destination} Exploration",
-                "activities": []
-            }
-            
-            edited_itinerary = itinerary.copy()
-            edited_itinerary.insert(day_index, new_day)
-            
-        elif operation == "remove_destination":
-            day_index = operation_data.get("day_index")
-            edited_itinerary = [day for i, day in enumerate(itinerary) if i != day_index]
-            
-        elif operation == "lock_service":
-            service_id = operation_data.get("service_id")
-            day_index = operation_data.get("day_index")
-            activity_index = operation_data.get("activity_index")
+        patch = None
+        if itinerary_id:
+            try:
+                record = itinerary_versions.commit(itinerary_id, base_version, edited_itinerary)
+            except VersionConflictError as e:
+                raise HTTPException(status_code=409, detail={"message": str(e), "current_version": e.current_version})
             
-            edited_itinerary = itinerary.copy()
-            if day_index < len(edited_itinerary) and activity_index < len(edited_itinerary[day_index]["activities"]):
-                edited_itinerary[day_index]["activities"][activity_index]["locked"] = True
-                edited_itinerary[day_index]["activities"][activity_index]["locked_service_id"] = service_id
+            # Undo history keeps the compact patch, not a copy of the itinerary
+            patch = make_patch(itinerary, edited_itinerary)
+            operation_logs.record(
+                itinerary_id, itinerary, base_version,
+                operation, request.get("operations") if operation == "batch" else operation_data,
+                patch, edited_itinerary, record["version"]
+            )
         
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown operation: {operation}")
+        # Days whose content or position changed; batches are checked once, on those days only
+        modified_days = changed_indices(itinerary, edited_itinerary)
+        touched_days = modified_days if operation == "batch" else None
         
-        # Check conflicts in edited itinerary
-        conflict_check = await conflict_detector.check_itinerary_conflicts(session_id, edited_itinerary)
+        # Rule-based conflict check returns immediately; LLM analysis is delivered via /api/conflict-analysis.
+        # Unchanged days reuse cached per-day results.
+        conflict_check = await conflict_detector.check_itinerary_conflicts(
+            session_id, list(edited_itinerary), defer_llm=True,
+            day_indices=touched_days, modified_days=modified_days
+        )
         
-        return {
-            "edited_itinerary": edited_itinerary,
+        # Reprice only the edited line items when the client holds a quote
+        pricing = None
+        quote_id = request.get("quote_id")
+        if quote_id:
+            pricing = await dynamic_pricing_agent.reprice_itinerary(
+                session_id=session_id,
+                quote_id=quote_id,
+                itinerary=list(edited_itinerary),
+                traveler_profile=request.get("traveler_profile", {}),
+                travel_dates=request.get("travel_dates", {})
+            )
+        
+        response = {
             "operation": operation,
             "conflict_check": conflict_check,
+            "pricing": pricing,
             "success": True,
             "session_id": session_id
         }
+        if touched_days is not None:
+            response["touched_days"] = [idx + 1 for idx in touched_days]
+        if itinerary_id:
+            response.update({
+                "itinerary_id": itinerary_id,
+                "base_version": base_version,
+                "version": record["version"],
+                "patch": patch
+            })
+        else:
+            response["edited_itinerary"] = edited_itinerary
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Itinerary edit error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -544,6 +812,34 @@ async def customize_itinerary_endpoint(request: CustomizationRequest):
         logger.error(f"Customization error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/customize-itinerary/history")
+async def customization_history_endpoint(session_id: str, itinerary_id: str):
+    """Logged customizations of a session itinerary"""
+    history = customization_agent.get_history(session_id, itinerary_id)
+    return {"session_id": session_id, "itinerary_id": itinerary_id, "history": history}
+
+@app.post("/api/customize-itinerary/undo")
+async def undo_customization_endpoint(request: CustomizationHistoryRequest):
+    """Undo the last customization of a session itinerary"""
+    return _step_customization(request, "undo")
+
+@app.post("/api/customize-itinerary/redo")
+async def redo_customization_endpoint(request: CustomizationHistoryRequest):
+    """Redo the last undone customization of a session itinerary"""
+    return _step_customization(request, "redo")
+
+def _step_customization(request: CustomizationHistoryRequest, direction: str) -> dict:
+    try:
+        result = customization_agent.step_history(request.session_id, request.itinerary_id, direction)
+        return {"operation": direction, "session_id": request.session_id, "itinerary_id": request.itinerary_id, **result}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No customization history for itinerary {request.itinerary_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Customization {direction} error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/update-pricing")
 async def update_pricing_endpoint(request: PricingUpdateRequest):
     """Update pricing endpoint"""
@@ -570,17 +866,45 @@ async def external_booking_endpoint(request: ExternalBookingRequest):
         
         logger.info(f"🎫 Processing external booking for session {session_id}")
         
-        # Mock booking response
+        # Provider fan-out, availability cache and adapters (mock providers when none are configured)
+        result = await booking_agent.handle_booking(session_id, booking_details)
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"External booking error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/batch-booking")
+async def batch_booking_endpoint(request: BatchBookingRequest):
+    """Book all cart items, one provider call per provider group"""
+    try:
+        session_id = request.session_id
+        cart = request.cart or {}
+        items = request.items or cart.get("booking_components", [])
+        
+        if not items:
+            raise HTTPException(status_code=400, detail="No items to book")
+        
+        logger.info(f"🧺 Batch booking {len(items)} items for session {session_id}")
+        
+        result = await booking_agent.handle_batch_booking(
+            session_id=session_id,
+            items=items,
+            booking_defaults=request.booking_defaults,
+            max_concurrency=request.max_concurrency
+        )
+        
         return {
-            "booking_id": f"booking_{session_id}_{int(time.time())}",
-            "status": "confirmed",
-            "booking_details": booking_details,
-            "confirmation_code": f"TRV{uuid.uuid4().hex[:8].upper()}",
-            "session_id": session_id
+            "session_id": session_id,
+            "cart_id": request.cart_id or cart.get("cart_id"),
+            **result
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"External booking error: {e}")
+        logger.error(f"Batch booking error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/image-proxy")
@@ -679,7 +1003,11 @@ async def process_parallel_results(successful_results: List[Tuple], trip_details
             for day_data in agent_result.get("daily_itinerary", []):
                 day_activities = []
                 
-                for activity in day_data.get("activities", []):
+                # Order activities by travel time, then fill missing logistics from the gazetteer
+                route = route_optimizer.optimize_day(day_data.get("activities", []), trip_details.get("destination", ""))
+                gazetteer.fill_travel_logistics(route["activities"], trip_details.get("destination", ""))
+                
+                for activity in route["activities"]:
                     # Ensure enhanced fields are present
                     enhanced_activity = {
                         "time": activity.get("time_slot", activity.get("time", "10:00 AM")),
@@ -839,6 +1167,32 @@ async def calculate_dynamic_pricing(request: dict):
         logger.error(f"Dynamic pricing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/dynamic-pricing/reprice")
+async def reprice_itinerary(request: dict):
+    """Reprice an edited itinerary incrementally against a previous quote"""
+    try:
+        session_id = request.get("session_id")
+        quote_id = request.get("quote_id")
+        itinerary = request.get("itinerary", [])
+        traveler_profile = request.get("traveler_profile", {})
+        travel_dates = request.get("travel_dates", {})
+        
+        logger.info(f"💰 Repricing {len(itinerary)}-day itinerary against quote {quote_id}")
+        
+        pricing_data = await dynamic_pricing_agent.reprice_itinerary(
+            session_id=session_id,
+            quote_id=quote_id,
+            itinerary=itinerary,
+            traveler_profile=traveler_profile,
+            travel_dates=travel_dates
+        )
+        
+        return {**pricing_data, "session_id": session_id}
+        
+    except Exception as e:
+        logger.error(f"Dynamic repricing error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/create-checkout-cart")
 async def create_checkout_cart(request: dict):
     """Create checkout cart with bundled services"""
@@ -847,6 +1201,7 @@ async def create_checkout_cart(request: dict):
         pricing_data = request.get("pricing_data", {})
         itinerary = request.get("itinerary", [])
         user_details = request.get("user_details", {})
+        quote_id = request.get("quote_id")
         
         logger.info(f"🛒 Creating checkout cart for session {session_id}")
         
@@ -854,7 +1209,8 @@ async def create_checkout_cart(request: dict):
             session_id=session_id,
             pricing_data=pricing_data,
             itinerary=itinerary,
-            user_details=user_details
+            user_details=user_details,
+            quote_id=quote_id
         )
         
         return cart
@@ -1024,11 +1380,6 @@ def generate_immediate_variant_fallback(trip_details: dict, variant_type: str) -
         "daily_itinerary": daily_itinerary
     }
 
-async def cache_user_profile_embedding(session_id: str, persona_tags: List[str], profile_data: Dict):
-    """Cache user profile data"""
-    cache_key = f"profile_{session_id}_{hash(tuple(sorted(persona_tags)))}"
-    await cache_itinerary(cache_key, profile_data, ttl=7200)  # 2 hour cache
-
 async def get_destination_data_cache(destination: str) -> Optional[Dict]:
     """Cache common destination data"""
     cache_key = f"destination_{destination.lower().replace(' ', '_')}"
@@ -1096,7 +1447,11 @@ async def process_parallel_results(successful_results: list, trip_details: dict)
             for day_data in agent_result.get("daily_itinerary", []):
                 day_activities = []
                 
-                for activity in day_data.get("activities", []):
+                # Order activities by travel time, then fill missing logistics from the gazetteer
+                route = route_optimizer.optimize_day(day_data.get("activities", []), trip_details.get("destination", ""))
+                gazetteer.fill_travel_logistics(route["activities"], trip_details.get("destination", ""))
+                
+                for activity in route["activities"]:
                     # Ensure enhanced fields are present
                     enhanced_activity = {
                         "time": activity.get("time_slot", activity.get("time", "10:00 AM")),
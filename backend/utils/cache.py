@@ -0,0 +1,79 @@
+"""
+Shared in-memory caching helpers for agents
+"""
+
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import time
+
+# Sentinel for callers that need to cache falsy values
+MISSING = object()
+
+
+def stable_fingerprint(*parts: Any) -> str:
+    """Build a stable hash for JSON-like data (dict key order independent)"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class TTLCache:
+    """Bounded in-memory cache with per-entry TTL and oldest-first eviction"""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 100):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get cached value if still valid"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            # Remove expired entry
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Cache value, evicting the oldest entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        """Remove a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        self._entries.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,415 @@
+"""
+Array-based conflict engine for itinerary validation
+Parses an itinerary once into per-activity arrays and runs all feasibility checks over them;
+per-day results are cached by day content so re-checks after an edit only parse changed days
+"""
+
+from typing import Any, Dict, List, Callable, Iterable, Optional, Set, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import copy
+import re
+import numpy as np
+
+from utils.cache import MISSING, TTLCache, stable_fingerprint
+from utils.frozen_itinerary import FrozenDict
+
+# Day key stride so (day, minute) pairs sort and search as a single integer
+DAY_STRIDE = 1_000_000
+
+_TIME_PATTERN = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([ap])\.?\s*m\.?", re.IGNORECASE)
+_CLOCK_PATTERN = re.compile(r"^\s*(\d{1,2}):(\d{2})\b")
+
+
+@lru_cache(maxsize=2048)
+def parse_clock_time(time_str: str) -> int:
+    """Parse "9:00 AM", "2:30 PM", "14:30" or "9:00 AM - 11:00 AM" to minutes after midnight (-1 if unparseable)"""
+    if not time_str:
+        return -1
+
+    match = _TIME_PATTERN.match(time_str)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return -1
+        hour = hour % 12 + (12 if match.group(3).lower() == "p" else 0)
+        return hour * 60 + minute
+
+    match = _CLOCK_PATTERN.match(time_str)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour > 23 or minute > 59:
+            return -1
+        return hour * 60 + minute
+
+    return -1
+
+
+@lru_cache(maxsize=2048)
+def parse_duration_minutes(duration_str: str) -> int:
+    """Parse duration string to minutes (defaults to 2 hours)"""
+    try:
+        duration_str = duration_str.lower()
+        if 'hour' in duration_str:
+            hours = float(duration_str.split()[0])
+            return int(hours * 60)
+        elif 'minute' in duration_str:
+            minutes = float(duration_str.split()[0])
+            return int(minutes)
+        else:
+            return 120  # Default 2 hours
+    except Exception:
+        return 120
+
+
+class ParsedItinerary:
+    """Flat per-activity arrays for an itinerary (or a subset of its days), grouped by day via offsets"""
+
+    def __init__(self, itinerary: List[Dict], day_indices: Optional[List[int]] = None):
+        if day_indices is None:
+            day_indices = list(range(len(itinerary)))
+        itinerary = [itinerary[idx] for idx in day_indices]
+
+        self.num_days = len(itinerary)
+        self.day_numbers: List[int] = [idx + 1 for idx in day_indices]  # parsed day -> itinerary day number
+        self.titles: List[str] = []
+        self.duration_labels: List[str] = []
+        self.locations: List[str] = []  # location_id -> name
+        self.day_titles: List[str] = []
+
+        location_ids: Dict[str, int] = {}
+        day_index, start, duration, location = [], [], [], []
+        counts = []
+
+        for day_idx, day in enumerate(itinerary):
+            activities = day.get('activities', [])
+            counts.append(len(activities))
+            self.day_titles.append(day.get('title', ''))
+
+            for activity in activities:
+                duration_label = activity.get('duration', '2 hours')
+                location_name = activity.get('location') or ''
+
+                if location_name and location_name not in location_ids:
+                    location_ids[location_name] = len(self.locations)
+                    self.locations.append(location_name)
+
+                day_index.append(day_idx)
+                start.append(parse_clock_time(activity.get('time') or ''))
+                duration.append(parse_duration_minutes(duration_label))
+                location.append(location_ids[location_name] if location_name else -1)
+                self.titles.append(activity.get('title', 'Activity'))
+                self.duration_labels.append(duration_label)
+
+        self.day_index = np.asarray(day_index, dtype=np.int64)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.duration = np.asarray(duration, dtype=np.int64)
+        self.end = self.start + self.duration
+        self.location_id = np.asarray(location, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts))).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+
+class ConflictEngine:
+    """Runs itinerary feasibility checks over parsed activity arrays"""
+
+    def __init__(self,
+                 travel_time: Callable[[str, str], int],
+                 max_activities_per_day: int = 4,
+                 min_activity_duration: int = 30,
+                 max_activity_duration: int = 12 * 60,
+                 max_leg_travel_minutes: int = 120,
+                 max_overnight_travel_minutes: int = 180,
+                 max_cached_days: int = 5000):
+        self.travel_time = travel_time
+        self.max_activities_per_day = max_activities_per_day
+        self.min_activity_duration = min_activity_duration
+        self.max_activity_duration = max_activity_duration
+        self.max_leg_travel_minutes = max_leg_travel_minutes
+        self.max_overnight_travel_minutes = max_overnight_travel_minutes
+
+        # Results keyed by day hash + day number and by day hash + next day hash + day number:
+        # issue messages carry day numbers, so a day that moves is checked again
+        self.max_cached_days = max_cached_days
+        self.day_cache = TTLCache(ttl=3600, max_entries=max_cached_days)
+        self.boundary_cache = TTLCache(ttl=3600, max_entries=max_cached_days)
+        self._hash_memo: "OrderedDict[int, Tuple[Dict, str]]" = OrderedDict()
+
+    def parse(self, itinerary: List[Dict], day_indices: Optional[List[int]] = None) -> ParsedItinerary:
+        """Parse itinerary (or the given days) into arrays (done once per check)"""
+        return ParsedItinerary(itinerary, day_indices)
+
+    def check(self, itinerary: List[Dict], day_indices: Optional[Iterable[int]] = None,
+              modified_days: Optional[Iterable[int]] = None) -> Dict[str, List]:
+        """
+        Run all checks and return conflicts, warnings and suggestions in day order,
+        plus an itinerary fingerprint built from the day hashes
+
+        Per-day and day-boundary results are cached by day content hash, so only days that
+        changed (and the boundaries next to them) are parsed and checked again.
+
+        Args:
+            itinerary: Day-wise itinerary
+            day_indices: Only report these days and the boundaries next to them
+            modified_days: Days changed since the caller's last check; the other days are
+                trusted to be the same objects with unchanged content
+        """
+        hashes = self._day_hashes(itinerary, modified_days)
+        if day_indices is None:
+            reported_days = list(range(len(itinerary)))
+        else:
+            reported_days = sorted({idx for idx in day_indices if 0 <= idx < len(itinerary)})
+        reported = set(reported_days)
+        boundaries = [idx for idx in range(len(itinerary) - 1) if idx in reported or idx + 1 in reported]
+
+        day_keys = {idx: self._day_key(hashes, idx) for idx in reported_days}
+        boundary_keys = {idx: self._boundary_key(hashes, idx) for idx in boundaries}
+        day_results = {idx: self.day_cache.get(key, MISSING) for idx, key in day_keys.items()}
+        boundary_results = {idx: self.boundary_cache.get(key, MISSING) for idx, key in boundary_keys.items()}
+
+        stale_days = {idx for idx, result in day_results.items() if result is MISSING}
+        stale_boundaries = [idx for idx, result in boundary_results.items() if result is MISSING]
+        if stale_days or stale_boundaries:
+            self._recheck(itinerary, hashes, stale_days, stale_boundaries, day_results, boundary_results)
+
+        # Issues are copied out so callers can annotate them without touching the cached results
+        conflicts, warnings, suggestions = [], [], []
+        for idx in reported_days:
+            conflicts.extend(day_results[idx]['conflicts'])
+            warnings.extend(day_results[idx]['warnings'])
+            suggestions.extend(day_results[idx]['suggestions'])
+        for idx in boundaries:
+            warnings.extend(boundary_results[idx])
+
+        return {
+            "conflicts": copy.deepcopy(conflicts),
+            "warnings": copy.deepcopy(warnings),
+            "suggestions": copy.deepcopy(suggestions),
+            "fingerprint": stable_fingerprint(hashes)
+        }
+
+    def _recheck(self, itinerary: List[Dict], hashes: List[str], stale_days: Set[int], stale_boundaries: List[int],
+                 day_results: Dict[int, Dict[str, List]], boundary_results: Dict[int, List[Dict]]):
+        """Parse and check only the stale days (plus both sides of stale boundaries), caching the results"""
+        days_to_parse = set(stale_days)
+        for idx in stale_boundaries:
+            days_to_parse.update((idx, idx + 1))
+
+        parsed = self.parse(itinerary, sorted(days_to_parse))
+        for day_number, result in zip(parsed.day_numbers, self.check_days(parsed)):
+            idx = day_number - 1
+            self.day_cache.set(self._day_key(hashes, idx), result)
+            if idx in stale_days:
+                day_results[idx] = result
+
+        overnight: Dict[int, List[Dict]] = {}
+        for warning in self.check_inter_day(parsed)['warnings']:
+            overnight.setdefault(warning['days'][0] - 1, []).append(warning)
+        for idx in stale_boundaries:
+            boundary_results[idx] = overnight.get(idx, [])
+            self.boundary_cache.set(self._boundary_key(hashes, idx), boundary_results[idx])
+
+    def _day_key(self, hashes: List[str], idx: int) -> str:
+        return f"{hashes[idx]}:{idx + 1}"
+
+    def _boundary_key(self, hashes: List[str], idx: int) -> str:
+        return f"{hashes[idx]}:{hashes[idx + 1]}:{idx + 1}"
+
+    def _day_hashes(self, itinerary: List[Dict], modified_days: Optional[Iterable[int]]) -> List[str]:
+        """Content hash per day; frozen (or caller-vouched unmodified) days reuse the hash by identity"""
+        modified = None if modified_days is None else set(modified_days)
+        hashes = []
+        for idx, day in enumerate(itinerary):
+            trusted = isinstance(day, FrozenDict) or (modified is not None and idx not in modified)
+            memo = self._hash_memo.get(id(day)) if trusted else None
+            if memo is not None and memo[0] is day:
+                hashes.append(memo[1])
+                continue
+
+            day_hash = stable_fingerprint(day)
+            # Keep the day alive with its hash so the id cannot be reused by another object
+            self._hash_memo[id(day)] = (day, day_hash)
+            self._hash_memo.move_to_end(id(day))
+            while len(self._hash_memo) > self.max_cached_days:
+                self._hash_memo.popitem(last=False)
+            hashes.append(day_hash)
+        return hashes
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get per-day and boundary cache statistics"""
+        return {"days": self.day_cache.stats(), "boundaries": self.boundary_cache.stats()}
+
+    def check_days(self, parsed: ParsedItinerary) -> List[Dict[str, List]]:
+        """Run per-day checks for every day, vectorized across the whole trip"""
+        day_results = [{"conflicts": [], "warnings": [], "suggestions": []} for _ in range(parsed.num_days)]
+        if parsed.num_days == 0:
+            return day_results
+
+        # Check 1: Too many activities
+        for day_idx in np.flatnonzero(parsed.counts > self.max_activities_per_day):
+            day_number = parsed.day_numbers[day_idx]
+            count = int(parsed.counts[day_idx])
+            day_results[day_idx]['conflicts'].append({
+                "type": "too_many_activities",
+                "severity": "high",
+                "day": day_number,
+                "message": f"Day {day_number} has {count} activities (max recommended: {self.max_activities_per_day})",
+                "suggestion": f"Consider moving {count - self.max_activities_per_day} activities to other days"
+            })
+
+        # Check 2: Time overlaps (all overlapping pairs, not just neighbours)
+        for first, second in self._find_overlaps(parsed):
+            day_results[parsed.day_index[first]]['conflicts'].append({
+                "type": "time_overlap",
+                "severity": "high",
+                "day": parsed.day_numbers[parsed.day_index[first]],
+                "message": f"Activity '{parsed.titles[first]}' overlaps with '{parsed.titles[second]}'",
+                "activities": [parsed.titles[first], parsed.titles[second]],
+                "suggestion": "Adjust timing or reduce duration of activities"
+            })
+
+        # Check 3: Travel between consecutive locations
+        for idx, travel_minutes in self._find_long_legs(parsed):
+            day_number = parsed.day_numbers[parsed.day_index[idx]]
+            day_results[parsed.day_index[idx]]['warnings'].append({
+                "type": "long_travel_time",
+                "severity": "medium",
+                "day": day_number,
+                "message": f"Long travel time (~{travel_minutes//60}h) from {parsed.locations[parsed.location_id[idx]]} to {parsed.locations[parsed.location_id[idx + 1]]}",
+                "suggestion": "Consider grouping activities by location or adding buffer time"
+            })
+
+        # Check 4: Activity duration reasonableness
+        too_short = parsed.duration < self.min_activity_duration
+        too_long = parsed.duration > self.max_activity_duration
+        for idx in np.flatnonzero(too_short | too_long):
+            day_number = parsed.day_numbers[parsed.day_index[idx]]
+            if too_short[idx]:
+                warning = {
+                    "type": "too_short_activity",
+                    "severity": "low",
+                    "day": day_number,
+                    "message": f"Activity '{parsed.titles[idx]}' duration ({parsed.duration_labels[idx]}) seems too short",
+                    "suggestion": "Consider extending duration or combining with nearby activities"
+                }
+            else:
+                warning = {
+                    "type": "too_long_activity",
+                    "severity": "medium",
+                    "day": day_number,
+                    "message": f"Activity '{parsed.titles[idx]}' duration ({parsed.duration_labels[idx]}) seems too long",
+                    "suggestion": "Consider breaking into multiple activities or reducing duration"
+                }
+            day_results[parsed.day_index[idx]]['warnings'].append(warning)
+
+        # Check 5: Day overload (total time)
+        total_hours = np.bincount(parsed.day_index, weights=parsed.duration, minlength=parsed.num_days) / 60
+        for day_idx in np.flatnonzero(total_hours > 10):
+            day_number = parsed.day_numbers[day_idx]
+            hours = float(total_hours[day_idx])
+            if hours > 14:  # More than 14 hours of activities
+                warning = {
+                    "type": "day_overload",
+                    "severity": "high",
+                    "day": day_number,
+                    "message": f"Day {day_number} has {hours:.1f} hours of activities (very packed)",
+                    "suggestion": "Consider reducing activities or spreading across multiple days"
+                }
+            else:
+                warning = {
+                    "type": "busy_day",
+                    "severity": "medium",
+                    "day": day_number,
+                    "message": f"Day {day_number} has {hours:.1f} hours of activities (quite busy)",
+                    "suggestion": "Ensure adequate rest time between activities"
+                }
+            day_results[day_idx]['warnings'].append(warning)
+
+        return day_results
+
+    def check_inter_day(self, parsed: ParsedItinerary) -> Dict[str, List]:
+        """Check overnight travel between the last and first activity of consecutive days"""
+        warnings = []
+
+        if parsed.num_days > 1:
+            # Last activity of each day and first activity of the next (both days non-empty and adjacent)
+            day_numbers = np.asarray(parsed.day_numbers)
+            boundary = np.flatnonzero(
+                (parsed.counts[:-1] > 0) & (parsed.counts[1:] > 0) & (day_numbers[1:] == day_numbers[:-1] + 1)
+            )
+            last_idx = parsed.offsets[boundary + 1] - 1
+            first_idx = parsed.offsets[boundary + 1]
+
+            for day_idx, travel_minutes in zip(boundary, self._travel_times(parsed, last_idx, first_idx)):
+                if travel_minutes > self.max_overnight_travel_minutes:
+                    day_number = parsed.day_numbers[day_idx]
+                    warnings.append({
+                        "type": "overnight_travel",
+                        "severity": "medium",
+                        "days": [day_number, day_number + 1],
+                        "message": f"Long travel required between Day {day_number} and Day {day_number + 1}",
+                        "suggestion": "Consider overnight stay or early start time"
+                    })
+
+        return {"conflicts": [], "warnings": warnings, "suggestions": []}
+
+    def _find_overlaps(self, parsed: ParsedItinerary) -> List[Tuple[int, int]]:
+        """Find every overlapping activity pair per day with a sorted sweep"""
+        timed = np.flatnonzero((parsed.start >= 0) & (parsed.duration > 0))
+        if len(timed) < 2:
+            return []
+
+        # Sort by (day, start); stable so equal starts keep itinerary order
+        start_keys = parsed.day_index[timed] * DAY_STRIDE + parsed.start[timed]
+        order = np.argsort(start_keys, kind="stable")
+        ordered = timed[order]
+        sorted_starts = start_keys[order]
+        end_keys = parsed.day_index[ordered] * DAY_STRIDE + parsed.end[ordered]
+
+        # Every later activity that starts before this one ends overlaps with it
+        first_clear = np.searchsorted(sorted_starts, end_keys, side="left")
+        positions = np.arange(len(ordered))
+        overlap_counts = np.maximum(first_clear - positions - 1, 0)
+        if not overlap_counts.any():
+            return []
+
+        first_pos = np.repeat(positions, overlap_counts)
+        run_starts = np.cumsum(overlap_counts) - overlap_counts
+        second_pos = first_pos + 1 + (np.arange(overlap_counts.sum()) - np.repeat(run_starts, overlap_counts))
+
+        return [(int(ordered[first]), int(ordered[second])) for first, second in zip(first_pos, second_pos)]
+
+    def _find_long_legs(self, parsed: ParsedItinerary) -> List[Tuple[int, int]]:
+        """Find consecutive same-day legs whose travel time exceeds the limit"""
+        if len(parsed) < 2:
+            return []
+
+        current = np.arange(len(parsed) - 1)
+        legs = current[
+            (parsed.day_index[:-1] == parsed.day_index[1:]) &
+            (parsed.location_id[:-1] >= 0) &
+            (parsed.location_id[1:] >= 0) &
+            (parsed.location_id[:-1] != parsed.location_id[1:])
+        ]
+
+        travel_minutes = self._travel_times(parsed, legs, legs + 1)
+        return [(int(idx), minutes) for idx, minutes in zip(legs, travel_minutes) if minutes > self.max_leg_travel_minutes]
+
+    def _travel_times(self, parsed: ParsedItinerary, from_idx: np.ndarray, to_idx: np.ndarray) -> List[int]:
+        """Travel minutes between activity locations (each location pair estimated once)"""
+        pair_minutes: Dict[Tuple[int, int], int] = {}
+        results = []
+
+        for source, target in zip(parsed.location_id[from_idx], parsed.location_id[to_idx]):
+            if source < 0 or target < 0 or source == target:
+                results.append(0)
+                continue
+            key = (int(source), int(target))
+            if key not in pair_minutes:
+                pair_minutes[key] = self.travel_time(parsed.locations[source], parsed.locations[target])
+            results.append(pair_minutes[key])
+
+        return results
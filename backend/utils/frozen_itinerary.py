@@ -0,0 +1,163 @@
+"""
+Immutable itinerary data with structural sharing
+Edits copy only the containers on the path to the change; everything else is shared,
+so keeping an old reference is a free snapshot
+"""
+
+from typing import Any, Callable, List, Sequence, Tuple, Union
+
+PathKey = Union[str, int]
+Path = Sequence[PathKey]
+
+
+class FrozenDict(dict):
+    """Read-only dict (JSON-serializable like a plain dict); edits return new instances"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only; use assoc_in/update_in to derive a new value")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def set(self, key: str, value: Any) -> "FrozenDict":
+        """New dict with one key set (value is frozen)"""
+        items = dict(self)
+        items[key] = freeze(value)
+        return FrozenDict(items)
+
+    def merge(self, changes: dict) -> "FrozenDict":
+        """New dict with several keys set (values are frozen)"""
+        items = dict(self)
+        for key, value in changes.items():
+            items[key] = freeze(value)
+        return FrozenDict(items)
+
+    def without(self, key: str) -> "FrozenDict":
+        """New dict without one key"""
+        return FrozenDict({k: v for k, v in self.items() if k != key})
+
+
+def freeze(value: Any) -> Any:
+    """Deep-freeze JSON-like data: dicts become FrozenDicts, lists become tuples"""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        frozen = tuple(freeze(item) for item in value)
+        # Reuse fully frozen tuples so repeated freezing shares structure
+        if isinstance(value, tuple) and all(a is b for a, b in zip(frozen, value)):
+            return value
+        return frozen
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Deep mutable copy: FrozenDicts become dicts, tuples become lists"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def get_in(root: Any, path: Path) -> Any:
+    """Value at path (raises KeyError/IndexError when missing)"""
+    node = root
+    for key in path:
+        node = node[key]
+    return node
+
+
+def _replace(node: Any, key: PathKey, value: Any) -> Any:
+    if isinstance(node, tuple):
+        index = key if key >= 0 else len(node) + key
+        if not 0 <= index < len(node):
+            raise IndexError(f"Index {key} out of range")
+        return node[:index] + (value,) + node[index + 1:]
+    if not isinstance(node, FrozenDict):
+        raise TypeError(f"Cannot edit {type(node).__name__}; freeze() the data first")
+    return node.set(key, value)
+
+
+def update_in(root: Any, path: Path, fn: Callable[[Any], Any]) -> Any:
+    """New root with fn applied to the value at path; only the path is copied"""
+    if not path:
+        return freeze(fn(root))
+    child = root[path[0]]
+    new_child = update_in(child, path[1:], fn)
+    return root if new_child is child else _replace(root, path[0], new_child)
+
+
+def assoc_in(root: Any, path: Path, value: Any) -> Any:
+    """New root with value stored at path (the last dict key may be new)"""
+    if not path:
+        return freeze(value)
+    if len(path) == 1:
+        return _replace(root, path[0], freeze(value))
+    return _replace(root, path[0], assoc_in(root[path[0]], path[1:], value))
+
+
+def insert_in(root: Any, path: Path, index: int, value: Any) -> Any:
+    """New root with value inserted into the sequence at path (list.insert semantics)"""
+    return update_in(root, path, lambda seq: seq[:index] + (freeze(value),) + seq[index:])
+
+
+def remove_in(root: Any, path: Path, index: int) -> Tuple[Any, Any]:
+    """New root without the sequence item at path[index], plus the removed item"""
+    sequence = get_in(root, path)
+    removed = sequence[index]
+    position = index if index >= 0 else len(sequence) + index
+    return update_in(root, path, lambda seq: seq[:position] + seq[position + 1:]), removed
+
+
+def changed_indices(before: Sequence[Any], after: Sequence[Any]) -> List[int]:
+    """Indices of `after` whose item is not the very same object as in `before`"""
+    return [
+        index for index, item in enumerate(after)
+        if index >= len(before) or item is not before[index]
+    ]
+
+
+# Day-level edits on a frozen itinerary (tuple of day dicts)
+
+def reorder_days(days: Tuple, new_order: Sequence[int]) -> Tuple:
+    """Days in the new order (out-of-range indices are dropped)"""
+    return tuple(days[i] for i in new_order if i < len(days))
+
+
+def move_activity(days: Tuple, from_day: int, to_day: int, activity_index: int) -> Tuple:
+    """Move an activity to the end of another day (no-op when a day is out of range)"""
+    if from_day >= len(days) or to_day >= len(days):
+        return days
+    days, activity = remove_in(days, (from_day, "activities"), activity_index)
+    return insert_in(days, (to_day, "activities"), len(days[to_day]["activities"]), activity)
+
+
+def insert_day(days: Tuple, day_index: int, day: dict) -> Tuple:
+    """Insert a new day (list.insert semantics)"""
+    return insert_in(days, (), day_index, day)
+
+
+def remove_day(days: Tuple, day_index: int) -> Tuple:
+    """Days without the given index"""
+    return tuple(day for i, day in enumerate(days) if i != day_index)
+
+
+def lock_activity(days: Tuple, day_index: int, activity_index: int, service_id: Any) -> Tuple:
+    """Mark an activity as locked to a service (no-op when out of range)"""
+    if day_index >= len(days) or activity_index >= len(days[day_index]["activities"]):
+        return days
+    return update_in(days, (day_index, "activities", activity_index),
+                     lambda activity: activity.merge({"locked": True, "locked_service_id": service_id}))
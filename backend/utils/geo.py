@@ -0,0 +1,245 @@
+"""
+Local gazetteer with spatial index and cached travel-time matrices
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import logging
+import math
+import os
+import numpy as np
+
+from utils.seasonality import normalize_destination
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.json")
+
+EARTH_RADIUS_KM = 6371.0
+GRID_CELL_DEGREES = 0.1  # ~11 km cells
+
+# Default logistics when a location cannot be resolved
+DEFAULT_TRAVEL_LOGISTICS = {
+    "from_previous": "Previous location",
+    "distance_km": 2.0,
+    "travel_time": "15 minutes",
+    "transport_mode": "Taxi",
+    "transport_cost": 150
+}
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in km"""
+    lat_rad = np.radians(lat)[:, None]
+    lon_rad = np.radians(lon)[:, None]
+    dlat = lat_rad - lat_rad.T
+    dlon = lon_rad - lon_rad.T
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat_rad) * np.cos(lat_rad.T) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def road_minutes(road_km: np.ndarray) -> np.ndarray:
+    """Driving minutes for road distances (slower in town, faster on highways)"""
+    speed_kmh = np.select([road_km <= 10, road_km <= 50], [20.0, 35.0], default=50.0)
+    minutes = np.ceil(road_km / speed_kmh * 60)
+    return np.where(road_km > 0, np.maximum(minutes, 5), 0).astype(np.int64)
+
+
+class Gazetteer:
+    """Destination POIs with name index, grid index and per-destination travel matrices"""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.road_factor = data.get("road_factor", 1.3)
+        self.names: List[str] = []
+        self.types: List[str] = []
+        self.poi_destination: List[str] = []
+        self.destination_pois: Dict[str, np.ndarray] = {}
+        self._name_index: Dict[str, int] = {}
+        self._max_name_words = 1
+
+        lat, lon = [], []
+        for dest_key, dest_data in data.get("destinations", {}).items():
+            first_idx = len(self.names)
+            for poi in dest_data.get("pois", []):
+                idx = len(self.names)
+                self.names.append(poi["name"])
+                self.types.append(poi.get("type", "poi"))
+                self.poi_destination.append(dest_key)
+                lat.append(poi["lat"])
+                lon.append(poi["lon"])
+                for name in [poi["name"]] + poi.get("aliases", []):
+                    self._add_name(name, idx)
+            self.destination_pois[dest_key] = np.arange(first_idx, len(self.names))
+
+            # First POI is the destination's central reference point
+            self._add_name(dest_key, first_idx)
+
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+
+        # Grid index for nearest-POI lookups
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for idx, cell in enumerate(zip(*self._cells(self.lat, self.lon))):
+            self._grid.setdefault(cell, []).append(idx)
+
+        self._matrices: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._resolved: Dict[str, Optional[int]] = {}
+
+        logger.info(f"🗺️ Gazetteer loaded: {len(self.names)} POIs across {len(self.destination_pois)} destinations")
+
+    def _add_name(self, name: str, idx: int):
+        normalized = normalize_destination(name)
+        if normalized and normalized not in self._name_index:
+            self._name_index[normalized] = idx
+            self._max_name_words = max(self._max_name_words, len(normalized.split()))
+
+    def _cells(self, lat, lon):
+        return (np.floor(np.asarray(lat) / GRID_CELL_DEGREES).astype(int),
+                np.floor(np.asarray(lon) / GRID_CELL_DEGREES).astype(int))
+
+    def resolve(self, location: str) -> Optional[int]:
+        """Resolve free-text location to a POI index (longest name match wins)"""
+        if not location:
+            return None
+        if location in self._resolved:
+            return self._resolved[location]
+
+        words = normalize_destination(location).split()
+        poi_idx = None
+        for size in range(min(self._max_name_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                poi_idx = self._name_index.get(" ".join(words[start:start + size]))
+                if poi_idx is not None:
+                    break
+            if poi_idx is not None:
+                break
+
+        if len(self._resolved) >= 5000:
+            self._resolved.clear()
+        self._resolved[location] = poi_idx
+        return poi_idx
+
+    def nearest(self, lat: float, lon: float, max_km: float = 25.0) -> Optional[int]:
+        """Nearest POI to coordinates using the grid index"""
+        cell_lat, cell_lon = (int(c) for c in self._cells(lat, lon))
+        rings = int(math.ceil(max_km / (GRID_CELL_DEGREES * 111.0)))
+
+        candidates = []
+        for dlat in range(-rings, rings + 1):
+            for dlon in range(-rings, rings + 1):
+                candidates.extend(self._grid.get((cell_lat + dlat, cell_lon + dlon), []))
+        if not candidates:
+            return None
+
+        candidates = np.asarray(candidates)
+        distances = self._distance_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        best = int(np.argmin(distances))
+        return int(candidates[best]) if distances[best] <= max_km else None
+
+    def _distance_km(self, lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        lat1, lon1, lat2, lon2 = np.radians(lat), np.radians(lon), np.radians(lats), np.radians(lons)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def travel_matrix(self, destination: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached (road_km, minutes) matrices over a destination's POIs"""
+        if destination not in self._matrices:
+            pois = self.destination_pois[destination]
+            road_km = haversine_matrix(self.lat[pois], self.lon[pois]) * self.road_factor
+            self._matrices[destination] = (road_km, road_minutes(road_km))
+        return self._matrices[destination]
+
+    def travel_between(self, from_poi: int, to_poi: int) -> Tuple[float, int]:
+        """Road km and minutes between two POIs"""
+        destination = self.poi_destination[from_poi]
+        if destination == self.poi_destination[to_poi]:
+            offset = int(self.destination_pois[destination][0])
+            road_km, minutes = self.travel_matrix(destination)
+            return float(road_km[from_poi - offset, to_poi - offset]), int(minutes[from_poi - offset, to_poi - offset])
+
+        # Cross-destination legs are rare; compute directly
+        road_km = float(self._distance_km(self.lat[from_poi], self.lon[from_poi],
+                                          self.lat[to_poi:to_poi + 1], self.lon[to_poi:to_poi + 1])[0]) * self.road_factor
+        return road_km, int(road_minutes(np.asarray([road_km]))[0])
+
+    def minutes_matrix(self, poi_indices: List[Optional[int]], unknown_minutes: int = 15) -> np.ndarray:
+        """Travel minutes between the given POIs (unknown locations get a flat estimate)"""
+        size = len(poi_indices)
+        known = np.asarray([idx is not None for idx in poi_indices], dtype=bool)
+        pois = np.asarray([idx if idx is not None else 0 for idx in poi_indices], dtype=np.int64)
+        matrix = np.full((size, size), unknown_minutes, dtype=np.int64)
+
+        if known.any():
+            known_pois = pois[known]
+            destinations = {self.poi_destination[idx] for idx in known_pois}
+            if len(destinations) == 1:
+                # Slice the cached destination matrix
+                destination = destinations.pop()
+                offset = int(self.destination_pois[destination][0])
+                local = known_pois - offset
+                sub_matrix = self.travel_matrix(destination)[1][np.ix_(local, local)]
+            else:
+                sub_matrix = road_minutes(haversine_matrix(self.lat[known_pois], self.lon[known_pois]) * self.road_factor)
+            matrix[np.ix_(known, known)] = sub_matrix
+
+        np.fill_diagonal(matrix, 0)
+        return matrix
+
+    def estimate_travel(self, from_location: str, to_location: str) -> Optional[Tuple[float, int]]:
+        """Road km and minutes between free-text locations (None if either is unknown)"""
+        from_poi = self.resolve(from_location)
+        to_poi = self.resolve(to_location)
+        if from_poi is None or to_poi is None:
+            return None
+        return self.travel_between(from_poi, to_poi)
+
+    def resolve_activity(self, activity: Dict[str, Any], fallback_location: str = "") -> Optional[int]:
+        """Resolve activity to a POI by coordinates, location or title"""
+        coordinates = activity.get("coordinates")
+        if isinstance(coordinates, dict) and "lat" in coordinates and "lon" in coordinates:
+            poi_idx = self.nearest(coordinates["lat"], coordinates["lon"])
+            if poi_idx is not None:
+                return poi_idx
+
+        for text in (activity.get("location"), activity.get("title"), fallback_location):
+            poi_idx = self.resolve(text or "")
+            if poi_idx is not None:
+                return poi_idx
+        return None
+
+    def fill_travel_logistics(self, activities: List[Dict[str, Any]], destination: str = "", overwrite: bool = False):
+        """Fill travel_logistics for each activity from the previous one (first leg starts at destination center)"""
+        previous_poi = self.resolve(destination)
+
+        for activity in activities:
+            poi_idx = self.resolve_activity(activity, destination)
+
+            if overwrite or "travel_logistics" not in activity:
+                if poi_idx is not None and previous_poi is not None:
+                    road_km, minutes = self.travel_between(previous_poi, poi_idx)
+                    activity["travel_logistics"] = {
+                        "from_previous": self.names[previous_poi],
+                        "distance_km": round(road_km, 1),
+                        "travel_time": f"{minutes} minutes",
+                        "transport_mode": "Walk" if road_km < 1.0 else "Taxi",
+                        "transport_cost": 0 if road_km < 1.0 else int(max(100, round(road_km * 18, -1)))
+                    }
+                else:
+                    activity["travel_logistics"] = dict(DEFAULT_TRAVEL_LOGISTICS)
+
+            if poi_idx is not None:
+                previous_poi = poi_idx
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Get shared gazetteer (loaded once per process)"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,155 @@
+"""
+Local intent classifier - hashed n-gram features with NumPy logistic regression
+Trained at startup from seed examples plus logged intents; low-confidence messages escalate to the LLM
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import logging
+import os
+import re
+import zlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+SEED_PATH = os.path.join(DATA_DIR, "intent_seed.jsonl")
+
+INTENTS = ["trip_planning", "accommodation", "general", "profile_continuation"]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def hashed_features(text: str, dims: int) -> np.ndarray:
+    """L2-normalized hashed word unigrams/bigrams and character trigrams"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = f"<{token}>"
+        grams.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+
+    vector = np.zeros(dims, dtype=np.float32)
+    for gram in grams:
+        vector[zlib.crc32(gram.encode("utf-8")) % dims] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-gram features"""
+
+    def __init__(self,
+                 seed_path: str = SEED_PATH,
+                 log_path: Optional[str] = None,
+                 dims: int = 2 ** 12,
+                 confidence_threshold: float = 0.8,
+                 max_log_bytes: int = 5 * 1024 * 1024):
+        self.seed_path = seed_path
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes  # log rolls over to a single ".1" backup at this size
+        self.dims = dims
+        self.confidence_threshold = confidence_threshold
+        self.weights = np.zeros((dims, len(INTENTS)), dtype=np.float32)
+        self.bias = np.zeros(len(INTENTS), dtype=np.float32)
+        self.trained_examples = 0
+
+    @property
+    def backup_log_path(self) -> Optional[str]:
+        return f"{self.log_path}.1" if self.log_path else None
+
+    def load_examples(self) -> List[Tuple[str, str]]:
+        """Seed examples plus logged intents (current log and its backup, if a log is configured)"""
+        examples = []
+        for path in (self.seed_path, self.backup_log_path, self.log_path):
+            if not path or not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get("intent") in INTENTS and record.get("text"):
+                        examples.append((record["text"], record["intent"]))
+        return examples
+
+    def train(self, examples: Optional[List[Tuple[str, str]]] = None,
+              epochs: int = 300, learning_rate: float = 2.0, l2: float = 1e-4):
+        """Full-batch gradient descent on class-balanced cross-entropy"""
+        examples = examples if examples is not None else self.load_examples()
+        if not examples:
+            logger.warning("Intent classifier has no training examples")
+            return
+
+        features = np.stack([hashed_features(text, self.dims) for text, _ in examples])
+        labels = np.asarray([INTENTS.index(intent) for _, intent in examples])
+        targets = np.eye(len(INTENTS), dtype=np.float32)[labels]
+
+        # Balance classes so small intents are not drowned out
+        counts = np.bincount(labels, minlength=len(INTENTS)).astype(np.float32)
+        sample_weights = (len(labels) / (len(INTENTS) * np.maximum(counts, 1)))[labels][:, None]
+
+        weights = np.zeros((self.dims, len(INTENTS)), dtype=np.float32)
+        bias = np.zeros(len(INTENTS), dtype=np.float32)
+        for _ in range(epochs):
+            probabilities = self._softmax(features @ weights + bias)
+            error = (probabilities - targets) * sample_weights / len(labels)
+            weights -= learning_rate * (features.T @ error + l2 * weights)
+            bias -= learning_rate * error.sum(axis=0)
+
+        self.weights, self.bias = weights, bias
+        self.trained_examples = len(examples)
+        logger.info(f"🧠 Intent classifier trained on {len(examples)} examples")
+
+    def _softmax(self, logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict(self, message: str) -> Dict[str, Any]:
+        """Intent, confidence and whether the prediction is confident enough to use"""
+        probabilities = self._softmax(hashed_features(message, self.dims) @ self.weights + self.bias)
+        best = int(np.argmax(probabilities))
+        confidence = float(probabilities[best])
+        return {
+            "intent": INTENTS[best],
+            "confidence": round(confidence, 3),
+            "confident": self.trained_examples > 0 and confidence >= self.confidence_threshold,
+            "probabilities": {intent: round(float(p), 3) for intent, p in zip(INTENTS, probabilities)}
+        }
+
+    def log_example(self, message: str, intent: str):
+        """Append a labelled message (e.g. a confident LLM result) for the next training run"""
+        if not self.log_path or intent not in INTENTS:
+            return
+        try:
+            self._rotate_log()
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"text": message, "intent": intent}) + "\n")
+        except OSError as e:
+            logger.error(f"Intent log write error: {e}")
+
+    def _rotate_log(self):
+        """Keep the log under max_log_bytes by replacing the previous backup"""
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.max_log_bytes:
+            os.replace(self.log_path, self.backup_log_path)
+            logger.info(f"🧠 Intent log rotated at {self.max_log_bytes} bytes")
+
+
+_intent_classifier: Optional[IntentClassifier] = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Get shared intent classifier (trained once per process)"""
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = IntentClassifier(
+            log_path=os.environ.get("INTENT_LOG_PATH"),
+            max_log_bytes=int(os.environ.get("INTENT_LOG_MAX_BYTES", 5 * 1024 * 1024))
+        )
+        _intent_classifier.train()
+    return _intent_classifier
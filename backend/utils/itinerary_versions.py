@@ -0,0 +1,61 @@
+"""
+Server-held itinerary versions for delta edits
+Clients edit by itinerary ID and version number; a stale version is rejected (optimistic concurrency)
+"""
+
+from typing import Any, Dict, Optional
+import uuid
+
+from utils.cache import MISSING, TTLCache
+from utils.frozen_itinerary import freeze
+
+
+class VersionConflictError(Exception):
+    """Edit based on a version that is no longer current"""
+
+    def __init__(self, itinerary_id: str, expected_version: int, current_version: int):
+        super().__init__(f"Itinerary {itinerary_id} is at version {current_version}, not {expected_version}")
+        self.itinerary_id = itinerary_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+class ItineraryVersionStore:
+    """Latest frozen version of each held itinerary (bounded, idle entries expire)"""
+
+    def __init__(self, ttl: float = 6 * 3600, max_entries: int = 5000):
+        self._entries = TTLCache(ttl=ttl, max_entries=max_entries)
+
+    def create(self, itinerary: Any, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Hold a new itinerary at version 1"""
+        record = {
+            "itinerary_id": uuid.uuid4().hex,
+            "version": 1,
+            "itinerary": freeze(itinerary),
+            "session_id": session_id
+        }
+        self._entries.set(record["itinerary_id"], record)
+        return record
+
+    def get(self, itinerary_id: str) -> Optional[Dict[str, Any]]:
+        """Current record ({itinerary_id, version, itinerary, session_id}) or None"""
+        record = self._entries.get(itinerary_id, MISSING)
+        return None if record is MISSING else record
+
+    def commit(self, itinerary_id: str, expected_version: int, itinerary: Any) -> Dict[str, Any]:
+        """
+        Store a new version if the caller edited the current one
+
+        Raises:
+            KeyError: Unknown or expired itinerary
+            VersionConflictError: expected_version is stale
+        """
+        current = self.get(itinerary_id)
+        if current is None:
+            raise KeyError(itinerary_id)
+        if current["version"] != expected_version:
+            raise VersionConflictError(itinerary_id, expected_version, current["version"])
+
+        record = {**current, "version": current["version"] + 1, "itinerary": freeze(itinerary)}
+        self._entries.set(itinerary_id, record)
+        return record
@@ -0,0 +1,179 @@
+"""
+RFC 6902 JSON Patch for frozen itinerary data
+apply_patch edits copy-on-write; make_patch diffs two versions, skipping shared (identical) subtrees
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from utils.frozen_itinerary import freeze, get_in, assoc_in, insert_in, remove_in, update_in
+
+
+class PatchError(ValueError):
+    """Invalid patch operation or failed test"""
+
+
+def escape_pointer_token(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """JSON Pointer to unescaped tokens ("" is the whole document)"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _resolve_path(root: Any, tokens: List[str], allow_append: bool = False) -> Tuple[Any, ...]:
+    """Tokens to concrete keys/indices ("-" only as the last token of an add)"""
+    path: List[Any] = []
+    node = root
+    for position, token in enumerate(tokens):
+        last = position == len(tokens) - 1
+        if isinstance(node, tuple):
+            if token == "-" and last and allow_append:
+                path.append(len(node))
+                break
+            if not token.isdigit() or (token != "0" and token.startswith("0")):
+                raise PatchError(f"Invalid array index: {token!r}")
+            index = int(token)
+            limit = len(node) + (1 if last and allow_append else 0)
+            if index >= limit:
+                raise PatchError(f"Array index out of range: {index}")
+            path.append(index)
+            node = node[index] if index < len(node) else None
+        elif isinstance(node, dict):
+            if token not in node and not (last and allow_append):
+                raise PatchError(f"Path not found: {token!r}")
+            path.append(token)
+            node = node.get(token)
+        else:
+            raise PatchError(f"Cannot traverse into {type(node).__name__} at {token!r}")
+    return tuple(path)
+
+
+def _add(root: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return freeze(value)
+    path = _resolve_path(root, tokens, allow_append=True)
+    parent = get_in(root, path[:-1])
+    if isinstance(parent, tuple):
+        return insert_in(root, path[:-1], path[-1], value)
+    return assoc_in(root, path, value)
+
+
+def _remove(root: Any, tokens: List[str]) -> Tuple[Any, Any]:
+    if not tokens:
+        raise PatchError("Cannot remove the whole document")
+    path = _resolve_path(root, tokens)
+    parent = get_in(root, path[:-1])
+    if isinstance(parent, tuple):
+        return remove_in(root, path[:-1], path[-1])
+    removed = parent[path[-1]]
+    return update_in(root, path[:-1], lambda node: node.without(path[-1])), removed
+
+
+def apply_patch(root: Any, operations: List[Dict[str, Any]]) -> Any:
+    """
+    Apply RFC 6902 operations to frozen data
+
+    Returns:
+        New frozen root; the input is never modified, so a failed patch leaves nothing half-applied
+    """
+    root = freeze(root)
+    for operation in operations:
+        op = operation.get("op")
+        if "path" not in operation:
+            raise PatchError(f"Operation {op!r} is missing 'path'")
+        tokens = parse_pointer(operation["path"])
+
+        if op == "add":
+            root = _add(root, tokens, operation.get("value"))
+        elif op == "remove":
+            root, _ = _remove(root, tokens)
+        elif op == "replace":
+            path = _resolve_path(root, tokens)
+            root = assoc_in(root, path, operation.get("value"))
+        elif op in ("move", "copy"):
+            from_tokens = parse_pointer(operation.get("from", ""))
+            if op == "move":
+                if tokens[:len(from_tokens)] == from_tokens and tokens != from_tokens:
+                    raise PatchError("Cannot move a value into itself")
+                root, value = _remove(root, from_tokens)
+            else:
+                value = get_in(root, _resolve_path(root, from_tokens))
+            root = _add(root, tokens, value)
+        elif op == "test":
+            if get_in(root, _resolve_path(root, tokens)) != freeze(operation.get("value")):
+                raise PatchError(f"Test failed at {operation['path']!r}")
+        else:
+            raise PatchError(f"Unknown patch operation: {op!r}")
+    return root
+
+
+def make_patch(before: Any, after: Any, pointer: str = "") -> List[Dict[str, Any]]:
+    """
+    RFC 6902 operations turning `before` into `after`
+
+    Identical objects (shared by copy-on-write edits) are skipped without being walked;
+    reordered sequence items become moves.
+    """
+    if before is after:
+        return []
+    if isinstance(before, dict) and isinstance(after, dict):
+        return _diff_dict(before, after, pointer)
+    if isinstance(before, (list, tuple)) and isinstance(after, (list, tuple)):
+        return _diff_sequence(before, after, pointer)
+    if before == after and type(before) is type(after):
+        return []
+    return [{"op": "replace", "path": pointer, "value": after}]
+
+
+def _diff_dict(before: dict, after: dict, pointer: str) -> List[Dict[str, Any]]:
+    operations = []
+    for key in before:
+        if key not in after:
+            operations.append({"op": "remove", "path": f"{pointer}/{escape_pointer_token(key)}"})
+    for key, value in after.items():
+        path = f"{pointer}/{escape_pointer_token(key)}"
+        if key not in before:
+            operations.append({"op": "add", "path": path, "value": value})
+        else:
+            operations.extend(make_patch(before[key], value, path))
+    return operations
+
+
+def _diff_sequence(before: Tuple, after: Tuple, pointer: str) -> List[Dict[str, Any]]:
+    operations = []
+    current = list(before)
+    after_ids = {id(item) for item in after}
+
+    index = 0
+    while index < len(after):
+        item = after[index]
+        if index < len(current) and current[index] is item:
+            index += 1
+            continue
+
+        later = next((j for j in range(index + 1, len(current)) if current[j] is item), None)
+        if index < len(current) and id(current[index]) not in after_ids:
+            if later is not None:
+                # The item here was dropped; the wanted one follows
+                operations.append({"op": "remove", "path": f"{pointer}/{index}"})
+                current.pop(index)
+                continue
+            # The item at this position was edited
+            operations.extend(make_patch(current[index], item, f"{pointer}/{index}"))
+            current[index] = item
+        elif later is not None:
+            operations.append({"op": "move", "from": f"{pointer}/{later}", "path": f"{pointer}/{index}"})
+            current.insert(index, current.pop(later))
+        else:
+            operations.append({"op": "add", "path": f"{pointer}/{index}", "value": item})
+            current.insert(index, item)
+        index += 1
+
+    for index in range(len(current) - 1, len(after) - 1, -1):
+        operations.append({"op": "remove", "path": f"{pointer}/{index}"})
+    return operations
@@ -0,0 +1,127 @@
+"""
+Compiled multi-pattern keyword matcher for chat messages
+One shared vocabulary, one regex alternation with word boundaries, one pass per message;
+phrases ending in "*" are stems and also match inflected forms ("relax*" matches "relaxing")
+"""
+
+from typing import Dict, List, Optional, Tuple
+import re
+
+# Shared vocabulary: category -> label -> phrases (lowercase)
+KEYWORD_VOCABULARY: Dict[str, Dict[str, List[str]]] = {
+    "intent": {
+        "greeting": ["hello", "hi", "hey", "good morning", "good evening"],
+        "trip_planning": ["plan a trip", "want to visit", "travel to", "vacation to", "trip to"],
+        "accommodation": ["hotel*", "resort*", "accommodation*", "stay*", "lodging*"]
+    },
+    "query_type": {
+        "destination_suggestion": ["destination*", "place*", "where to go", "suggest*", "recommend*"],
+        "accommodation_suggestion": ["hotel*", "accommodation*", "stay*", "resort*", "lodge*"],
+        "beach_suggestion": ["beach*", "coastal", "seaside"],
+        "greeting": ["hello", "hi", "hey", "good morning", "good evening"]
+    },
+    "destination": {
+        "Goa": ["goa"],
+        "Kerala": ["kerala"],
+        "Rajasthan": ["rajasthan"],
+        "Manali": ["manali"],
+        "Rishikesh": ["rishikesh"],
+        "Kashmir": ["kashmir"],
+        "Ladakh": ["ladakh", "leh"],
+        "Andaman Islands": ["andaman islands", "andaman"],
+        "Pondicherry": ["pondicherry", "puducherry"],
+        "Himachal Pradesh": ["himachal pradesh", "himachal"],
+        "Mumbai": ["mumbai", "bombay"],
+        "Delhi": ["delhi", "new delhi"],
+        "Bangalore": ["bangalore", "bengaluru"],
+        "Chennai": ["chennai"],
+        "Kolkata": ["kolkata", "calcutta"],
+        "Hyderabad": ["hyderabad"],
+        "Pune": ["pune"],
+        "Jaipur": ["jaipur"],
+        "Udaipur": ["udaipur"],
+        "Jodhpur": ["jodhpur"]
+    },
+    "budget_preference": {
+        "luxury": ["luxur*", "premium", "high-end"],
+        "budget": ["budget*", "cheap*", "affordab*"],
+        "mid-range": ["mid-range", "moderate*"]
+    },
+    "travel_style": {
+        "adventurous": ["adventur*", "excit*", "thrill*"],
+        "cultural": ["cultur*", "heritage", "histor*"],
+        "relaxation": ["relax*", "spa", "spas", "peace*"]
+    }
+}
+
+# Label priority within a category when several match (vocabulary order)
+CATEGORY_PRIORITY = {
+    category: {label: rank for rank, label in enumerate(labels)}
+    for category, labels in KEYWORD_VOCABULARY.items()
+}
+
+
+class KeywordMatches:
+    """Matches of one message, grouped by category"""
+
+    def __init__(self, found: Dict[str, List[str]]):
+        self.found = found
+
+    def labels(self, category: str) -> List[str]:
+        """Matched labels in order of first appearance"""
+        return self.found.get(category, [])
+
+    def has(self, category: str, label: str) -> bool:
+        return label in self.found.get(category, [])
+
+    def first(self, category: str) -> Optional[str]:
+        """First label in the message"""
+        labels = self.found.get(category)
+        return labels[0] if labels else None
+
+    def best(self, category: str) -> Optional[str]:
+        """Highest-priority label (earliest in the vocabulary)"""
+        labels = self.found.get(category)
+        if not labels:
+            return None
+        return min(labels, key=CATEGORY_PRIORITY[category].get)
+
+
+class KeywordMatcher:
+    """Single compiled regex alternation over the whole vocabulary"""
+
+    def __init__(self, vocabulary: Dict[str, Dict[str, List[str]]] = KEYWORD_VOCABULARY):
+        self.phrase_labels: Dict[str, List[Tuple[str, str]]] = {}
+        for category, labels in vocabulary.items():
+            for label, phrases in labels.items():
+                for phrase in phrases:
+                    self.phrase_labels.setdefault(phrase, []).append((category, label))
+
+        # Longest phrases first so "andaman islands" wins over "andaman"; stems take any word ending.
+        # An empty group would match everywhere, so it becomes "(?!)" which never matches
+        phrases = sorted(self.phrase_labels, key=len, reverse=True)
+        exact = "|".join(re.escape(phrase) for phrase in phrases if not phrase.endswith("*")) or "(?!)"
+        stems = "|".join(re.escape(phrase[:-1]) for phrase in phrases if phrase.endswith("*")) or "(?!)"
+        self.pattern = re.compile(r"\b(?:(" + exact + r")|(" + stems + r")\w*)\b")
+
+    def match(self, message: str) -> KeywordMatches:
+        """All categories matched in one pass over the lowercased message"""
+        found: Dict[str, List[str]] = {}
+        for match in self.pattern.finditer(message.lower()):
+            phrase = match.group(1) or match.group(2) + "*"
+            for category, label in self.phrase_labels[phrase]:
+                labels = found.setdefault(category, [])
+                if label not in labels:
+                    labels.append(label)
+        return KeywordMatches(found)
+
+
+_keyword_matcher: Optional[KeywordMatcher] = None
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """Get shared keyword matcher (compiled once per process)"""
+    global _keyword_matcher
+    if _keyword_matcher is None:
+        _keyword_matcher = KeywordMatcher()
+    return _keyword_matcher
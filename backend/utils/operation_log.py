@@ -0,0 +1,140 @@
+"""
+Per-itinerary operation log for undo/redo
+Each edit is stored as a compact record (operation name, its data and the RFC 6902 patch it produced);
+frozen snapshots every few records let any logged state be rebuilt by replaying a handful of patches
+"""
+
+from typing import Any, Dict, List, Optional
+
+from utils.cache import MISSING, TTLCache
+from utils.frozen_itinerary import freeze
+from utils.json_patch import apply_patch
+
+
+class OperationLog:
+    """Edit history of one itinerary: position 0 is the oldest kept state, `cursor` the current one"""
+
+    def __init__(self, itinerary: Any, version: int, snapshot_interval: int = 10, max_records: int = 100):
+        self.snapshot_interval = snapshot_interval
+        self.max_records = max(max_records, snapshot_interval)
+        self.base = 0  # Position of the oldest state that can still be rebuilt
+        self.cursor = 0
+        self.records: List[Dict[str, Any]] = []  # records[p - base] turns state p into state p + 1
+        self.snapshots: Dict[int, Any] = {0: freeze(itinerary)}
+        self.positions: Dict[int, int] = {version: 0}  # version -> position of its state
+
+    def append(self, operation: str, operation_data: Any, patch: List[Dict[str, Any]],
+               itinerary: Any, version: int):
+        """Record an edit from the current state; anything that could have been redone is dropped"""
+        if self.cursor < self.base + len(self.records):
+            del self.records[self.cursor - self.base:]
+            self.snapshots = {p: s for p, s in self.snapshots.items() if p <= self.cursor}
+            self.positions = {v: p for v, p in self.positions.items() if p <= self.cursor}
+
+        self.records.append({"operation": operation, "operation_data": operation_data, "patch": patch, "version": version})
+        self.cursor += 1
+        self.positions[version] = self.cursor
+        if self.cursor % self.snapshot_interval == 0:
+            # Frozen itineraries share structure, so a snapshot costs only a reference
+            self.snapshots[self.cursor] = freeze(itinerary)
+        self._trim()
+
+    def undo(self, version: int) -> Optional[Any]:
+        """Step back one edit (the restored state becomes `version`), or None if nothing is left to undo"""
+        if self.cursor <= self.base:
+            return None
+        self.cursor -= 1
+        self.positions[version] = self.cursor
+        return self.state_at(self.cursor)
+
+    def redo(self, version: int) -> Optional[Any]:
+        """Re-apply the next undone edit (the restored state becomes `version`), or None if there is none"""
+        if self.cursor >= self.base + len(self.records):
+            return None
+        self.cursor += 1
+        self.positions[version] = self.cursor
+        return self.state_at(self.cursor)
+
+    def state_at(self, position: int) -> Any:
+        """Rebuild a logged state from the nearest earlier snapshot"""
+        if not self.base <= position <= self.base + len(self.records):
+            raise IndexError(f"Position {position} is no longer in the log")
+        start = max(p for p in self.snapshots if p <= position)
+        state = self.snapshots[start]
+        for record in self.records[start - self.base:position - self.base]:
+            state = apply_patch(state, record["patch"])
+        return state
+
+    def state_at_version(self, version: int) -> Optional[Any]:
+        """State of an earlier version, or None if it was trimmed or undone and overwritten"""
+        position = self.positions.get(version)
+        return None if position is None else self.state_at(position)
+
+    @property
+    def version(self) -> int:
+        """Version of the current state (the newest one if undo/redo revisited it)"""
+        return max(v for v, p in self.positions.items() if p == self.cursor)
+
+    @property
+    def can_undo(self) -> bool:
+        return self.cursor > self.base
+
+    @property
+    def can_redo(self) -> bool:
+        return self.cursor < self.base + len(self.records)
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Compact view of the kept records (no patches)"""
+        return [
+            {
+                "position": self.base + offset + 1,
+                "version": record["version"],
+                "operation": record["operation"],
+                "operation_data": record["operation_data"],
+                "undone": self.base + offset >= self.cursor
+            }
+            for offset, record in enumerate(self.records)
+        ]
+
+    def _trim(self):
+        """Keep at most max_records, dropping whole snapshot intervals from the oldest end"""
+        while len(self.records) > self.max_records:
+            next_base = min((p for p in self.snapshots if p > self.base), default=None)
+            if next_base is None or next_base > self.cursor:
+                return
+            del self.records[:next_base - self.base]
+            del self.snapshots[self.base]
+            self.base = next_base
+            self.positions = {v: p for v, p in self.positions.items() if p >= self.base}
+
+
+class OperationLogStore:
+    """Operation logs by itinerary ID (bounded, idle logs expire)"""
+
+    def __init__(self, ttl: float = 6 * 3600, max_entries: int = 5000,
+                 snapshot_interval: int = 10, max_records: int = 100):
+        self._logs = TTLCache(ttl=ttl, max_entries=max_entries)
+        self.snapshot_interval = snapshot_interval
+        self.max_records = max_records
+
+    def start(self, itinerary_id: str, itinerary: Any, version: int) -> OperationLog:
+        """Begin a new log with `itinerary` as its oldest state"""
+        log = OperationLog(itinerary, version, self.snapshot_interval, self.max_records)
+        self._logs.set(itinerary_id, log)
+        return log
+
+    def get(self, itinerary_id: str) -> Optional[OperationLog]:
+        log = self._logs.get(itinerary_id, MISSING)
+        return None if log is MISSING else log
+
+    def record(self, itinerary_id: str, before: Any, before_version: int, operation: str,
+               operation_data: Any, patch: List[Dict[str, Any]], after: Any, after_version: int):
+        """
+        Log one committed edit
+
+        Starts a fresh log from `before` if the itinerary has none (e.g. it expired)
+        """
+        log = self.get(itinerary_id)
+        if log is None or log.positions.get(before_version) != log.cursor:
+            log = self.start(itinerary_id, before, before_version)
+        log.append(operation, operation_data, patch, after, after_version)
@@ -0,0 +1,66 @@
+"""
+Local partner directory - booking partners per destination, loaded once from local data
+"""
+
+from typing import Dict, List, Any, Optional
+import json
+import logging
+import os
+
+from utils.seasonality import get_seasonality_table, normalize_destination
+
+logger = logging.getLogger(__name__)
+
+PARTNERS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "local_partners.json")
+
+
+class PartnerDirectory:
+    """Local partners indexed by destination and specialty"""
+
+    def __init__(self, path: str = PARTNERS_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.partners: Dict[str, List[Dict[str, Any]]] = data.get("destinations", {})
+        self.specialty_index: Dict[str, Dict[str, List[int]]] = {
+            dest_key: self._build_specialty_index(partners) for dest_key, partners in self.partners.items()
+        }
+
+        logger.info(f"🤝 Partner directory loaded: {sum(len(p) for p in self.partners.values())} partners across {len(self.partners)} destinations")
+
+    def _build_specialty_index(self, partners: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        index: Dict[str, List[int]] = {}
+        for idx, partner in enumerate(partners):
+            for specialty in partner.get("specialties", []):
+                index.setdefault(specialty, []).append(idx)
+        return index
+
+    def resolve_destination(self, destination: str) -> Optional[str]:
+        """Map free-text destination to a directory key"""
+        normalized = normalize_destination(destination)
+        if normalized in self.partners:
+            return normalized
+        dest_key = get_seasonality_table().resolve_destination(destination)
+        return dest_key if dest_key in self.partners else None
+
+    def find(self, destination: str, activity_type: str = "", limit: int = 3) -> List[Dict[str, Any]]:
+        """Partners for a destination, specialists in the activity type first"""
+        dest_key = self.resolve_destination(destination)
+        if dest_key is None:
+            return []
+
+        partners = self.partners[dest_key]
+        specialists = self.specialty_index[dest_key].get(activity_type, [])
+        order = specialists + [idx for idx in range(len(partners)) if idx not in specialists]
+        return [partners[idx] for idx in order[:limit]]
+
+
+_partner_directory: Optional[PartnerDirectory] = None
+
+
+def get_partner_directory() -> PartnerDirectory:
+    """Get shared partner directory (loaded once per process)"""
+    global _partner_directory
+    if _partner_directory is None:
+        _partner_directory = PartnerDirectory()
+    return _partner_directory
@@ -0,0 +1,152 @@
+"""
+Vectorized rule-based persona scoring
+Profiles become binary feature rows; persona scores are one feature-matrix x weight-matrix product
+"""
+
+from typing import Dict, List, Any, Tuple
+import numpy as np
+
+from models.schemas import PersonaType
+
+# Personas scored by the rules (column order; ties resolve to the earlier persona)
+SCORED_PERSONAS = [
+    PersonaType.ADVENTURER,
+    PersonaType.CULTURAL_EXPLORER,
+    PersonaType.LUXURY_CONNOISSEUR,
+    PersonaType.BUDGET_BACKPACKER,
+    PersonaType.ECO_CONSCIOUS,
+    PersonaType.FAMILY_ORIENTED,
+    PersonaType.BUSINESS_TRAVELER
+]
+
+HIGH_BUDGET_PER_NIGHT = 15000
+LOW_BUDGET_PER_NIGHT = 5000
+
+# Feature -> persona score contributions
+PERSONA_RULES: Dict[str, Dict[PersonaType, int]] = {
+    "vacation_style_adventurous": {PersonaType.ADVENTURER: 3},
+    "vacation_style_relaxing": {PersonaType.LUXURY_CONNOISSEUR: 2},
+    "vacation_style_balanced": {PersonaType.CULTURAL_EXPLORER: 2},
+    "experience_nature": {PersonaType.ADVENTURER: 2, PersonaType.ECO_CONSCIOUS: 2},
+    "experience_culture": {PersonaType.CULTURAL_EXPLORER: 3},
+    "attraction_local": {PersonaType.CULTURAL_EXPLORER: 2, PersonaType.BUDGET_BACKPACKER: 1},
+    "attraction_popular": {PersonaType.LUXURY_CONNOISSEUR: 1},
+    "accommodation_luxury": {PersonaType.LUXURY_CONNOISSEUR: 3},
+    "accommodation_budget": {PersonaType.BUDGET_BACKPACKER: 3},
+    "accommodation_boutique": {PersonaType.CULTURAL_EXPLORER: 2},
+    "interest_hiking": {PersonaType.ADVENTURER: 2, PersonaType.ECO_CONSCIOUS: 1},
+    "interest_museums": {PersonaType.CULTURAL_EXPLORER: 2},
+    "interest_nightlife": {PersonaType.ADVENTURER: 1},
+    "interest_shopping": {PersonaType.LUXURY_CONNOISSEUR: 1},
+    "interest_food": {PersonaType.CULTURAL_EXPLORER: 1},
+    "budget_high": {PersonaType.LUXURY_CONNOISSEUR: 3},
+    "budget_low": {PersonaType.BUDGET_BACKPACKER: 3},
+    "budget_mid": {PersonaType.CULTURAL_EXPLORER: 1},
+    "has_children": {PersonaType.FAMILY_ORIENTED: 4}
+}
+
+SCORED_PERSONA_VALUES = [persona.value for persona in SCORED_PERSONAS]
+
+FEATURES = list(PERSONA_RULES)
+FEATURE_INDEX = {feature: i for i, feature in enumerate(FEATURES)}
+
+WEIGHTS = np.zeros((len(FEATURES), len(SCORED_PERSONAS)), dtype=np.float32)
+for _feature, _contributions in PERSONA_RULES.items():
+    for _persona, _points in _contributions.items():
+        WEIGHTS[FEATURE_INDEX[_feature], SCORED_PERSONAS.index(_persona)] = _points
+
+# Propensity to pay: persona base, then budget and accommodation adjustments
+BASE_PROPENSITY = np.asarray([
+    {PersonaType.LUXURY_CONNOISSEUR: 0.9, PersonaType.BUDGET_BACKPACKER: 0.2, PersonaType.ADVENTURER: 0.7,
+     PersonaType.CULTURAL_EXPLORER: 0.6, PersonaType.FAMILY_ORIENTED: 0.5}.get(persona, 0.5)
+    for persona in SCORED_PERSONAS
+], dtype=np.float32)
+
+
+def _as_number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def encode_profile(profile_data: Dict[str, Any], trip_details: Dict[str, Any]) -> Tuple[List[int], float, List[str]]:
+    """Active feature indices, budget per night and accommodation list for one profile"""
+    active = []
+
+    vacation_style = profile_data.get("vacation_style", "")
+    if vacation_style in ("adventurous", "relaxing", "balanced"):
+        active.append(FEATURE_INDEX[f"vacation_style_{vacation_style}"])
+
+    experience_type = profile_data.get("experience_type", "")
+    if experience_type in ("nature", "culture"):
+        active.append(FEATURE_INDEX[f"experience_{experience_type}"])
+
+    attraction_pref = profile_data.get("attraction_preference", "")
+    if attraction_pref in ("local", "popular"):
+        active.append(FEATURE_INDEX[f"attraction_{attraction_pref}"])
+
+    accommodations = profile_data.get("accommodation", []) or []
+    if "luxury_hotels" in accommodations:
+        active.append(FEATURE_INDEX["accommodation_luxury"])
+    if "budget_hotels" in accommodations or "hostels" in accommodations:
+        active.append(FEATURE_INDEX["accommodation_budget"])
+    if "boutique_hotels" in accommodations or "bnb" in accommodations:
+        active.append(FEATURE_INDEX["accommodation_boutique"])
+
+    interests = profile_data.get("interests", []) or []
+    for interest in ("hiking", "museums", "nightlife", "shopping", "food"):
+        if interest in interests:
+            active.append(FEATURE_INDEX[f"interest_{interest}"])
+
+    budget_per_night = _as_number(trip_details.get("budget_per_night", 0))
+    if budget_per_night > HIGH_BUDGET_PER_NIGHT:
+        active.append(FEATURE_INDEX["budget_high"])
+    elif budget_per_night < LOW_BUDGET_PER_NIGHT:
+        active.append(FEATURE_INDEX["budget_low"])
+    else:
+        active.append(FEATURE_INDEX["budget_mid"])
+
+    if _as_number(trip_details.get("children", 0)) > 0:
+        active.append(FEATURE_INDEX["has_children"])
+
+    return active, budget_per_night, accommodations
+
+
+def score_profiles(pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """
+    Score many (profile_data, trip_details) pairs at once
+
+    Returns:
+        Dict of arrays: scores (n x personas), ranking (n x personas, best first),
+        primary (n), margin (n, top score minus runner-up), confidence (n), propensity (n)
+    """
+    if not pairs:
+        empty = np.zeros(0, dtype=np.float32)
+        grid = np.zeros((0, len(SCORED_PERSONAS)), dtype=np.float32)
+        return {"scores": grid, "ranking": grid.astype(np.int64), "primary": empty.astype(np.int64),
+                "margin": empty, "confidence": empty, "propensity": empty}
+
+    encoded = [encode_profile(profile_data or {}, trip_details or {}) for profile_data, trip_details in pairs]
+    features = np.zeros((len(encoded), len(FEATURES)), dtype=np.float32)
+    for row, (active, _, _) in enumerate(encoded):
+        features[row, active] = 1.0
+    budgets = np.asarray([budget for _, budget, _ in encoded], dtype=np.float32)
+    luxury_stay = np.asarray(["luxury_hotels" in accommodations for _, _, accommodations in encoded])
+    hostel_stay = np.asarray(["hostels" in accommodations for _, _, accommodations in encoded])
+
+    scores = features @ WEIGHTS
+    # Stable descending order: ties keep persona order, matching max() and sorted(reverse=True)
+    ranking = np.argsort(-scores, axis=1, kind="stable")
+    primary = ranking[:, 0]
+    rows = np.arange(len(primary))
+    margin = scores[rows, primary] - scores[rows, ranking[:, 1]]
+    confidence = np.minimum(scores[rows, primary] / 10.0, 1.0)
+
+    propensity = BASE_PROPENSITY[primary].copy()
+    propensity += np.select([budgets > HIGH_BUDGET_PER_NIGHT, budgets < LOW_BUDGET_PER_NIGHT], [0.2, -0.2], 0.0)
+    propensity += np.where(luxury_stay, 0.1, np.where(hostel_stay, -0.1, 0.0))
+    propensity = np.clip(propensity, 0.1, 1.0)
+
+    return {"scores": scores, "ranking": ranking, "primary": primary, "margin": margin,
+            "confidence": confidence, "propensity": propensity}
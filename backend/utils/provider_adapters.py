@@ -0,0 +1,332 @@
+"""
+Booking provider adapters - long-lived pooled HTTP clients per provider
+Retries with jittered backoff, per-provider rate-limit tokens and a local mock server
+"""
+
+from typing import Dict, List, Any, Optional
+import asyncio
+import importlib.util
+import json
+import logging
+import random
+import time
+import uuid
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """Provider request failed after retries"""
+    pass
+
+
+class TokenBucket:
+    """Async token bucket for per-provider request rate limits"""
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait for a token"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class ProviderAdapter:
+    """Base adapter: pooled client, rate limiting and retries; subclasses map provider APIs"""
+
+    name = "provider"
+    base_url = ""
+    availability_path = "/availability"
+    booking_path = "/bookings"
+    batch_booking_path = "/bookings/batch"
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 rate_limit: float = 5.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.2,
+                 backoff_max: float = 3.0,
+                 timeout: float = 5.0,
+                 max_connections: int = 20,
+                 http2: bool = True):
+        self.api_key = api_key
+        self.base_url = base_url or self.base_url
+        self.transport = transport
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.http2 = http2 and HTTP2_AVAILABLE and transport is None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived client (connection pool reused across requests)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers(),
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport
+            )
+        return self._client
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff (Retry-After wins when present)"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method: str, path: str, budget: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Rate-limited request with retries on transient failures
+
+        Args:
+            budget: Total seconds for all attempts and backoff; each attempt's timeout is cut to
+                the time left and retries that cannot start in time are skipped
+        """
+        deadline = None if budget is None else time.monotonic() + budget
+        last_error = None
+        attempts = 0
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+            attempts += 1
+            try:
+                response = await self.client.request(method, path, timeout=timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                last_error = ProviderError(f"{self.name} returned {response.status_code}")
+                retry_after = response.headers.get("Retry-After")
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                last_error = e
+                retry_after = None
+            except httpx.HTTPStatusError as e:
+                raise ProviderError(f"{self.name} returned {e.response.status_code}") from e
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                logger.warning(f"🔁 {self.name} request failed ({last_error}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        raise ProviderError(f"{self.name} request failed after {attempts} attempts: {last_error}")
+
+    async def check_availability(self, booking_details: Dict[str, Any], budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Normalized provider availability (None if not available), retried within `budget` seconds"""
+        data = await self.request("GET", self.availability_path, budget=budget,
+                                  params=self.availability_params(booking_details))
+        return self.parse_availability(data)
+
+    async def book(self, booking_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized booking result"""
+        data = await self.request("POST", self.booking_path, json=self.booking_payload(booking_details))
+        return self.parse_booking(data)
+
+    async def book_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Book several items in one provider call; results follow item order"""
+        data = await self.request("POST", self.batch_booking_path,
+                                  json={"bookings": [self.booking_payload(item) for item in items]})
+        results = data.get("results", [])
+        return [
+            self.parse_booking(results[idx]) if idx < len(results)
+            else {"status": "error", "message": f"{self.name.title()} returned no result for this item"}
+            for idx in range(len(items))
+        ]
+
+    def availability_params(self, booking_details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "destination": booking_details.get("destination", ""),
+            "activity_type": booking_details.get("activity_type", ""),
+            "date": booking_details.get("travel_date", ""),
+            "travelers": booking_details.get("travelers", 2)
+        }
+
+    def booking_payload(self, booking_details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "activity_id": booking_details.get("activity_id"),
+            "activity_name": booking_details.get("activity_name"),
+            "date": booking_details.get("travel_date", ""),
+            "travelers": booking_details.get("travelers", 2)
+        }
+
+    def parse_availability(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not data.get("available"):
+            return None
+        return {
+            "name": self.name.title(),
+            "type": "external_provider",
+            "rating": data.get("rating", 4.0),
+            "response_time": data.get("response_time", "instant"),
+            "booking_method": "api",
+            "price": data.get("price", 0),
+            "availability": data.get("availability", "high"),
+            "commission": data.get("commission", 0.0)
+        }
+
+    def parse_booking(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "status": data.get("status", "confirmed"),
+            "reference": data.get("reference"),
+            "url": data.get("url"),
+            "message": f"Booking {data.get('status', 'confirmed')} with {self.name.title()}",
+            "additional_info": data.get("additional_info", {})
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ViatorAdapter(ProviderAdapter):
+    name = "viator"
+    base_url = "https://api.viator.com/partner"
+    availability_path = "/products/search"
+    booking_path = "/bookings/book"
+    batch_booking_path = "/bookings/book-batch"
+
+
+class GetYourGuideAdapter(ProviderAdapter):
+    name = "getyourguide"
+    base_url = "https://api.getyourguide.com/v1"
+    availability_path = "/tours/availability"
+    booking_path = "/bookings"
+
+
+class KlookAdapter(ProviderAdapter):
+    name = "klook"
+    base_url = "https://api.klook.com/v1"
+    availability_path = "/activities/availability"
+    booking_path = "/orders"
+    batch_booking_path = "/orders/batch"
+
+
+ADAPTER_CLASSES = {
+    "viator": ViatorAdapter,
+    "getyourguide": GetYourGuideAdapter,
+    "klook": KlookAdapter
+}
+
+
+class MockProviderServer:
+    """Local mock of provider APIs served through httpx.MockTransport"""
+
+    def __init__(self,
+                 inventory: Optional[Dict[str, Dict[str, Any]]] = None,
+                 latency: float = 0.0,
+                 failures: Optional[List[int]] = None):
+        # Per-provider availability responses (keyed by adapter name)
+        self.inventory = inventory or {
+            "viator": {"available": True, "rating": 4.4, "price_multiplier": 1.2, "commission": 0.12},
+            "getyourguide": {"available": True, "rating": 4.3, "price_multiplier": 1.15, "commission": 0.15},
+            "klook": {"available": True, "rating": 4.2, "price_multiplier": 1.1, "commission": 0.10}
+        }
+        self.latency = latency
+        self.failures = list(failures or [])  # status codes returned before succeeding
+        self.sold_out = set()  # activity ids that fail to book
+        self.requests: List[httpx.Request] = []
+        self.transport = httpx.MockTransport(self.handle)
+
+    def _provider_for(self, request: httpx.Request) -> str:
+        for name, adapter_class in ADAPTER_CLASSES.items():
+            if request.url.host in adapter_class.base_url:
+                return name
+        return request.url.host
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failures:
+            return httpx.Response(self.failures.pop(0), json={"error": "simulated failure"})
+
+        provider = self._provider_for(request)
+        listing = self.inventory.get(provider, {"available": False})
+
+        if request.method == "GET":
+            travelers = int(request.url.params.get("travelers", 2))
+            return httpx.Response(200, json={
+                "available": listing.get("available", False),
+                "rating": listing.get("rating", 4.0),
+                "response_time": "instant",
+                "price": round(3000 * travelers * listing.get("price_multiplier", 1.0)),
+                "availability": "high",
+                "commission": listing.get("commission", 0.0)
+            })
+
+        if request.url.path.rstrip("/").endswith(("batch", "book-batch")):
+            bookings = json.loads(request.content).get("bookings", [])
+            return httpx.Response(200, json={"results": [
+                self._booking_result(provider, booking) for booking in bookings
+            ]})
+        return httpx.Response(200, json=self._booking_result(provider, json.loads(request.content or b"{}")))
+
+    def _booking_result(self, provider: str, booking: Dict[str, Any]) -> Dict[str, Any]:
+        if booking.get("activity_id") in self.sold_out:
+            return {"status": "failed", "additional_info": {"error": "Sold out"}}
+
+        reference = f"{provider.upper()[:3]}-{uuid.uuid4().hex[:8].upper()}"
+        return {
+            "status": "confirmed",
+            "reference": reference,
+            "url": f"https://booking.{provider}.com/confirm/{reference}",
+            "additional_info": {"confirmation_email": "sent"}
+        }
+
+
+def build_provider_adapters(providers: Dict[str, Dict[str, Any]],
+                            transport: Optional[httpx.AsyncBaseTransport] = None) -> Dict[str, ProviderAdapter]:
+    """Adapters for configured providers (those with an API key, or all when a transport is given)"""
+    adapters = {}
+    for name, adapter_class in ADAPTER_CLASSES.items():
+        config = providers.get(name, {})
+        if config.get("api_key") or transport is not None:
+            adapters[name] = adapter_class(
+                api_key=config.get("api_key"),
+                base_url=config.get("base_url"),
+                transport=transport,
+                rate_limit=config.get("rate_limit", 5.0)
+            )
+    return adapters
@@ -0,0 +1,246 @@
+"""
+Day route optimizer - orders activities by travel time with nearest-neighbour + 2-opt
+Respects locked activities, time windows and a hard per-call time budget
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+import time
+import numpy as np
+
+from utils.conflict_engine import parse_clock_time, parse_duration_minutes
+from utils.geo import Gazetteer, get_gazetteer
+
+logger = logging.getLogger(__name__)
+
+# Meal activities keep to sensible slots when no explicit time window is given
+MEAL_WINDOWS = {
+    "breakfast": (6 * 60, 11 * 60),
+    "brunch": (9 * 60, 13 * 60),
+    "lunch": (11 * 60, 15 * 60 + 30),
+    "dinner": (17 * 60, 23 * 60)
+}
+
+
+class RouteOptimizer:
+    """Orders a day's activities to minimise travel time"""
+
+    def __init__(self, gazetteer: Gazetteer, time_budget_ms: float = 5.0):
+        self.gazetteer = gazetteer
+        self.time_budget_ms = time_budget_ms
+
+    def optimize_day(self,
+                     activities: List[Dict[str, Any]],
+                     destination: str = "",
+                     time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Reorder a day's activities to minimise travel time
+
+        Locked activities (and those with fixed_time) keep their position. Time slots
+        stay with positions, so a moved activity takes the time of the slot it lands in;
+        activities only land in slots inside their time_window and long enough for their
+        duration (ending before the next timed slot starts).
+
+        Args:
+            activities: Day activities in current order
+            destination: Trip destination (route starts from its center)
+            time_budget_ms: Hard time budget for the call
+
+        Returns:
+            Dict with reordered activities, order and travel minutes before/after
+        """
+        deadline = time.perf_counter() + (time_budget_ms or self.time_budget_ms) / 1000
+        size = len(activities)
+        if size < 2:
+            return self._result(activities, list(range(size)), 0, 0, False)
+
+        # Node 0 is the route start (destination center), nodes 1..n are activities
+        start_poi = self.gazetteer.resolve(destination)
+        poi_indices = [start_poi] + [self.gazetteer.resolve_activity(activity, destination) for activity in activities]
+        distance = self.gazetteer.minutes_matrix(poi_indices)
+        if start_poi is None:
+            distance[0, :] = 0  # Open route when the start is unknown
+
+        allowed = self._slot_fit_matrix(activities)
+        fixed = [bool(activity.get("locked") or activity.get("fixed_time")) for activity in activities]
+
+        original = list(range(size))
+        original_cost = self._route_cost(original, distance)
+
+        route = self._nearest_neighbour(distance, allowed, fixed)
+        budget_exceeded = not self._two_opt(route, distance, allowed, fixed, deadline)
+
+        cost = self._route_cost(route, distance)
+        if cost >= original_cost or not self._is_feasible(route, allowed):
+            return self._result(activities, original, original_cost, original_cost, budget_exceeded)
+
+        return self._result(
+            self._apply_route(activities, route, destination),
+            route, original_cost, cost, budget_exceeded
+        )
+
+    def optimize_itinerary(self, itinerary: List[Dict[str, Any]], destination: str = "",
+                           day_indices: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Optimize routes for the given days (all days by default), returning day copies"""
+        optimized = []
+        for day_idx, day in enumerate(itinerary):
+            if day_indices is None or day_idx in day_indices:
+                result = self.optimize_day(day.get("activities", []), destination)
+                if result["reordered"]:
+                    day = {**day, "activities": result["activities"]}
+            optimized.append(day)
+        return optimized
+
+    def _slot_time(self, activity: Dict[str, Any]) -> int:
+        return parse_clock_time(activity.get("time_slot") or activity.get("time") or "")
+
+    def _time_window(self, activity: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """Explicit time_window {"start", "end"} or implied meal window"""
+        window = activity.get("time_window")
+        if isinstance(window, dict):
+            start = parse_clock_time(window.get("start") or "")
+            end = parse_clock_time(window.get("end") or "")
+            return (start if start >= 0 else 0, end if end >= 0 else 24 * 60)
+
+        title = (activity.get("title") or "").lower()
+        for meal, meal_window in MEAL_WINDOWS.items():
+            if meal in title:
+                return meal_window
+        return None
+
+    def _slot_fit_matrix(self, activities: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        allowed[activity, position]: the activity may take the slot at that position
+
+        The slot start must be inside the activity's time window, and the activity must end
+        before the next timed slot starts. Staying in its own slot is always allowed.
+        """
+        size = len(activities)
+        slot_times = np.asarray([self._slot_time(activity) for activity in activities], dtype=np.int64)
+        durations = np.asarray([parse_duration_minutes(activity.get("duration") or "") for activity in activities],
+                               dtype=np.int64)
+
+        # Minutes until the next timed slot (unbounded for the last one or untimed slots)
+        capacity = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+        next_start = -1
+        for position in range(size - 1, -1, -1):
+            if slot_times[position] >= 0 and next_start >= 0:
+                capacity[position] = next_start - slot_times[position]
+            if slot_times[position] >= 0:
+                next_start = slot_times[position]
+
+        allowed = durations[:, None] <= capacity[None, :]
+        for activity_idx, activity in enumerate(activities):
+            window = self._time_window(activity)
+            if window is not None:
+                allowed[activity_idx] &= (slot_times < 0) | ((slot_times >= window[0]) & (slot_times <= window[1]))
+        np.fill_diagonal(allowed, True)
+        return allowed
+
+    def _is_feasible(self, route: List[int], allowed: np.ndarray) -> bool:
+        return all(allowed[activity_idx, position] for position, activity_idx in enumerate(route))
+
+    def _route_cost(self, route: List[int], distance: np.ndarray) -> int:
+        nodes = np.asarray([0] + [idx + 1 for idx in route])
+        return int(distance[nodes[:-1], nodes[1:]].sum())
+
+    def _nearest_neighbour(self, distance: np.ndarray, allowed: np.ndarray, fixed: List[bool]) -> List[int]:
+        """Fill free positions in order with the nearest unplaced activity that fits the slot"""
+        size = len(fixed)
+        unplaced = np.asarray([not is_fixed for is_fixed in fixed], dtype=bool)
+        route = []
+        previous = 0
+
+        for position in range(size):
+            if fixed[position]:
+                activity_idx = position
+            else:
+                candidates = np.flatnonzero(unplaced)
+                fitting = candidates[allowed[candidates, position]]
+                pool = fitting if len(fitting) else candidates
+                activity_idx = int(pool[np.argmin(distance[previous, pool + 1])])
+                unplaced[activity_idx] = False
+            route.append(activity_idx)
+            previous = activity_idx + 1
+
+        return route
+
+    def _two_opt(self, route: List[int], distance: np.ndarray, allowed: np.ndarray,
+                 fixed: List[bool], deadline: float) -> bool:
+        """Improve each run of free positions with segment reversals (False if out of time)"""
+        size = len(route)
+
+        # Runs of consecutive free positions; locked positions act as fixed endpoints
+        runs, run_start = [], None
+        for position in range(size + 1):
+            is_free = position < size and not fixed[position]
+            if is_free and run_start is None:
+                run_start = position
+            elif not is_free and run_start is not None:
+                runs.append((run_start, position - 1))
+                run_start = None
+
+        for run_start, run_end in runs:
+            improved = True
+            while improved:
+                improved = False
+                for i in range(run_start, run_end):
+                    if time.perf_counter() > deadline:
+                        return False
+
+                    before = route[i - 1] + 1 if i > 0 else 0
+                    for j in range(i + 1, run_end + 1):
+                        after = route[j + 1] + 1 if j + 1 < size else None
+                        first, last = route[i] + 1, route[j] + 1
+
+                        delta = distance[before, last] - distance[before, first]
+                        if after is not None:
+                            delta += distance[first, after] - distance[last, after]
+
+                        if delta < 0:
+                            segment = route[i:j + 1][::-1]
+                            if all(allowed[activity_idx, i + offset] for offset, activity_idx in enumerate(segment)):
+                                route[i:j + 1] = segment
+                                improved = True
+                                break
+                    if improved:
+                        break
+
+        return True
+
+    def _apply_route(self, activities: List[Dict[str, Any]], route: List[int], destination: str) -> List[Dict[str, Any]]:
+        """Build reordered activity copies with slot times and refreshed logistics"""
+        reordered = []
+        for position, activity_idx in enumerate(route):
+            activity = dict(activities[activity_idx])
+            if activity_idx != position:
+                slot = activities[position]
+                for key in ("time", "time_slot"):
+                    if key in slot:
+                        activity[key] = slot[key]
+            reordered.append(activity)
+
+        self.gazetteer.fill_travel_logistics(reordered, destination, overwrite=True)
+        return reordered
+
+    def _result(self, activities: List[Dict[str, Any]], route: List[int], original_minutes: int,
+                optimized_minutes: int, budget_exceeded: bool) -> Dict[str, Any]:
+        return {
+            "activities": activities,
+            "order": route,
+            "reordered": route != list(range(len(route))),
+            "original_travel_minutes": original_minutes,
+            "optimized_travel_minutes": optimized_minutes,
+            "time_budget_exceeded": budget_exceeded
+        }
+
+
+_route_optimizer: Optional[RouteOptimizer] = None
+
+
+def get_route_optimizer() -> RouteOptimizer:
+    """Get shared route optimizer"""
+    global _route_optimizer
+    if _route_optimizer is None:
+        _route_optimizer = RouteOptimizer(get_gazetteer())
+    return _route_optimizer
@@ -0,0 +1,263 @@
+"""
+Precomputed destination seasonality table shared by pricing and seasonality agents
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seasons as (start_month, end_month) ranges, events as (start_month, start_day, end_month, end_day)
+SEASONAL_DATA: Dict[str, Dict[str, Any]] = {
+    "goa": {
+        "aliases": ["panaji", "panjim", "north goa", "south goa", "calangute", "baga", "anjuna", "palolem"],
+        "peak_season": [(12, 1)],
+        "monsoon": [(6, 9)],
+        "best_weather": [(11, 3)],
+        "events": {
+            "goa_carnival": {"dates": [(2, 1, 2, 28)], "impact": "cultural_highlight"},
+            "new_year_celebrations": {"dates": [(12, 20, 12, 31)], "impact": "high_demand"}
+        }
+    },
+    "kerala": {
+        "aliases": ["kochi", "cochin", "munnar", "alleppey", "alappuzha", "kumarakom", "thekkady", "varkala", "kovalam", "wayanad", "trivandrum"],
+        "peak_season": [(12, 1)],
+        "monsoon": [(6, 8)],
+        "best_weather": [(9, 3)],
+        "events": {
+            "onam": {"dates": [(8, 15, 9, 15)], "impact": "cultural_highlight"},
+            "nehru_trophy_boat_race": {"dates": [(8, 1, 8, 31)], "impact": "special_attractions"},
+            "monsoon_ayurveda_season": {"dates": [(6, 1, 8, 31)], "impact": "wellness_focus"}
+        }
+    },
+    "rajasthan": {
+        "aliases": ["jaipur", "udaipur", "jodhpur", "jaisalmer", "pushkar", "bikaner", "mount abu", "ranthambore"],
+        "peak_season": [(11, 2)],
+        "monsoon": [(7, 9)],
+        "best_weather": [(10, 3)],
+        "events": {
+            "pushkar_camel_fair": {"dates": [(11, 1, 11, 30)], "impact": "cultural_highlight"},
+            "desert_festival": {"dates": [(2, 1, 2, 28)], "impact": "special_attractions"},
+            "diwali": {"dates": [(10, 15, 11, 15)], "impact": "high_demand"}
+        }
+    },
+    "manali": {
+        "aliases": ["kullu", "solang", "rohtang", "kasol"],
+        "peak_season": [(5, 6), (12, 1)],
+        "monsoon": [(7, 8)],
+        "best_weather": [(3, 6), (9, 11)],
+        "events": {
+            "winter_carnival": {"dates": [(1, 2, 1, 6)], "impact": "special_attractions"},
+            "kullu_dussehra": {"dates": [(10, 1, 10, 31)], "impact": "cultural_highlight"}
+        }
+    },
+    "shimla": {
+        "aliases": ["kufri", "mashobra"],
+        "peak_season": [(4, 6), (12, 1)],
+        "monsoon": [(7, 8)],
+        "best_weather": [(3, 6), (9, 11)],
+        "events": {
+            "summer_festival": {"dates": [(5, 25, 6, 5)], "impact": "cultural_highlight"}
+        }
+    },
+    "ladakh": {
+        "aliases": ["leh", "nubra", "pangong"],
+        "peak_season": [(6, 8)],
+        "monsoon": [],
+        "best_weather": [(5, 9)],
+        "events": {
+            "hemis_festival": {"dates": [(6, 15, 7, 15)], "impact": "cultural_highlight"}
+        }
+    },
+    "rishikesh": {
+        "aliases": ["haridwar"],
+        "peak_season": [(2, 4), (9, 11)],
+        "monsoon": [(7, 8)],
+        "best_weather": [(9, 4)],
+        "events": {
+            "international_yoga_festival": {"dates": [(3, 1, 3, 7)], "impact": "wellness_focus"}
+        }
+    },
+    "mumbai": {
+        "aliases": ["bombay"],
+        "peak_season": [(11, 2)],
+        "monsoon": [(6, 9)],
+        "best_weather": [(11, 2)],
+        "events": {
+            "ganesh_chaturthi": {"dates": [(8, 20, 9, 20)], "impact": "cultural_highlight"}
+        }
+    },
+    "delhi": {
+        "aliases": ["new delhi", "agra"],
+        "peak_season": [(10, 3)],
+        "monsoon": [(7, 9)],
+        "best_weather": [(10, 3)],
+        "events": {
+            "diwali": {"dates": [(10, 15, 11, 15)], "impact": "high_demand"}
+        }
+    },
+    "andaman": {
+        "aliases": ["port blair", "havelock", "neil island", "andaman and nicobar"],
+        "peak_season": [(12, 3)],
+        "monsoon": [(5, 9)],
+        "best_weather": [(11, 4)],
+        "events": {
+            "island_tourism_festival": {"dates": [(1, 1, 1, 15)], "impact": "special_attractions"}
+        }
+    }
+}
+
+# General Indian tourism seasons used for pricing (PricingAgent)
+PRICING_SEASONS = {
+    12: "peak", 1: "peak", 2: "peak",  # Winter - peak season
+    3: "high", 4: "high", 11: "high",  # Pleasant weather
+    5: "low", 6: "low",  # Hot season
+    7: "normal", 8: "normal", 9: "normal", 10: "normal"  # Monsoon and post-monsoon
+}
+
+# Seasonal demand levels used for dynamic pricing (DynamicPricingAgent)
+DEMAND_LEVELS = {
+    12: "high", 1: "high", 4: "high", 5: "high", 10: "high", 11: "high",  # Winter and pleasant months in India
+    6: "low", 7: "low", 8: "low", 9: "low",  # Monsoon
+    2: "medium", 3: "medium"
+}
+
+
+@lru_cache(maxsize=1024)
+def normalize_destination(destination: str) -> str:
+    """Normalize destination name for index lookups"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (destination or "").lower()).split())
+
+
+@lru_cache(maxsize=1024)
+def parse_travel_date(travel_date: str) -> Optional[datetime]:
+    """Parse ISO travel date (cached, None if invalid)"""
+    try:
+        return datetime.fromisoformat(travel_date)
+    except (TypeError, ValueError):
+        return None
+
+
+def _month_in_ranges(month: int, season_ranges: List[tuple]) -> bool:
+    """Check if month is in any season range (supports cross-year ranges)"""
+    for start_month, end_month in season_ranges:
+        if start_month <= end_month:  # Same year range
+            if start_month <= month <= end_month:
+                return True
+        else:  # Cross-year range (e.g., Nov to Mar)
+            if month >= start_month or month <= end_month:
+                return True
+    return False
+
+
+class SeasonalityTable:
+    """(destination, month) lookup table with season, event and demand info"""
+
+    def __init__(self, seasonal_data: Dict[str, Dict[str, Any]] = None):
+        self.seasonal_data = seasonal_data or SEASONAL_DATA
+        self._index: Dict[str, str] = {}
+        self._rows: Dict[Tuple[Optional[str], int], Dict[str, Any]] = {}
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._max_alias_words = 1
+        self._build()
+
+    def _build(self):
+        """Precompute rows for every destination and month"""
+        for dest_key, dest_data in self.seasonal_data.items():
+            for name in [dest_key] + dest_data.get("aliases", []):
+                normalized = normalize_destination(name)
+                self._index[normalized] = dest_key
+                self._max_alias_words = max(self._max_alias_words, len(normalized.split()))
+
+            for month in range(1, 13):
+                self._rows[(dest_key, month)] = self._build_row(dest_key, dest_data, month)
+
+        # Generic rows for unknown destinations
+        for month in range(1, 13):
+            self._rows[(None, month)] = self._build_row(None, {}, month)
+
+        logger.info(f"📅 Seasonality table built: {len(self.seasonal_data)} destinations, {len(self._index)} names")
+
+    def _build_row(self, dest_key: Optional[str], dest_data: Dict[str, Any], month: int) -> Dict[str, Any]:
+        """Build a single (destination, month) row"""
+        if _month_in_ranges(month, dest_data.get("peak_season", [])):
+            season_type = "peak"
+        elif _month_in_ranges(month, dest_data.get("monsoon", [])):
+            season_type = "monsoon"
+        elif _month_in_ranges(month, dest_data.get("best_weather", [])):
+            season_type = "ideal"
+        else:
+            season_type = "normal"
+
+        events = []
+        for event_name, event_data in dest_data.get("events", {}).items():
+            for start_month, start_day, end_month, end_day in event_data["dates"]:
+                if _month_in_ranges(month, [(start_month, end_month)]):
+                    events.append({"name": event_name, "impact": event_data["impact"]})
+                    break
+
+        return {
+            "destination": dest_key,
+            "month": month,
+            "season_type": season_type,
+            "events": events,
+            "pricing_season": PRICING_SEASONS[month],
+            "demand_level": DEMAND_LEVELS[month]
+        }
+
+    def resolve_destination(self, destination: str) -> Optional[str]:
+        """Resolve free-text destination to a table key (exact name, then word n-grams)"""
+        if destination in self._resolved:
+            return self._resolved[destination]
+
+        normalized = normalize_destination(destination)
+        dest_key = self._index.get(normalized)
+
+        if dest_key is None and normalized:
+            # Match aliases inside longer text, e.g. "Jaipur, Rajasthan, India"
+            words = normalized.split()
+            for size in range(min(self._max_alias_words, len(words)), 0, -1):
+                for start in range(len(words) - size + 1):
+                    dest_key = self._index.get(" ".join(words[start:start + size]))
+                    if dest_key:
+                        break
+                if dest_key:
+                    break
+
+        if len(self._resolved) >= 1000:
+            self._resolved.clear()
+        self._resolved[destination] = dest_key
+        return dest_key
+
+    def lookup(self, destination: Optional[str], month: int) -> Dict[str, Any]:
+        """Get a copy of the row for destination and month (generic row if destination unknown)"""
+        dest_key = self.resolve_destination(destination) if destination else None
+        row = self._rows[(dest_key, month)]
+        return {**row, "events": [dict(event) for event in row["events"]]}
+
+    def get_seasonal_info(self, destination: str, month: int) -> Optional[Dict[str, Any]]:
+        """Get destination-specific seasonal info, None if destination is unknown"""
+        dest_key = self.resolve_destination(destination)
+        if not dest_key:
+            return None
+        row = self._rows[(dest_key, month)]
+        return {
+            "destination": dest_key,
+            "month": month,
+            "season_type": row["season_type"],
+            "events": [dict(event) for event in row["events"]]
+        }
+
+
+_seasonality_table: Optional[SeasonalityTable] = None
+
+
+def get_seasonality_table() -> SeasonalityTable:
+    """Get shared seasonality table (built once per process)"""
+    global _seasonality_table
+    if _seasonality_table is None:
+        _seasonality_table = SeasonalityTable()
+    return _seasonality_table
@@ -0,0 +1,109 @@
+"""
+Semantic response cache - reuses answers for near-duplicate messages
+Exact hits on a normalized token set, then cosine similarity over hashed n-gram vectors
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import re
+import numpy as np
+
+from utils.cache import MISSING, TTLCache, stable_fingerprint
+from utils.intent_classifier import hashed_features
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a an the i me my we us our you your it its is are was were be been am do does did to of in on at for from
+with about into by and or but so as that this these those there here please can could would will shall
+should want wanna like some any just also very really what which who whom how when where why let lets
+i'm i'd we're we'd it's that's there's
+""".split())
+
+# Equivalent words collapsed before matching
+CANONICAL_WORDS = {
+    "hello": "hi", "hey": "hi", "hii": "hi", "hiya": "hi",
+    "hotels": "hotel", "resorts": "resort", "stays": "stay", "beaches": "beach",
+    "destinations": "destination", "places": "place", "trips": "trip",
+    "recommend": "suggest", "recommendations": "suggest", "suggestions": "suggest",
+    "visit": "trip", "travel": "trip", "vacation": "trip", "holiday": "trip", "planning": "plan"
+}
+
+
+def normalize_message(message: str) -> str:
+    """Canonical token set: lowercased, stopwords removed, synonyms collapsed, sorted"""
+    tokens = {CANONICAL_WORDS.get(token, token) for token in TOKEN_PATTERN.findall(message.lower())}
+    return " ".join(sorted(tokens - STOPWORDS))
+
+
+class SemanticCache:
+    """TTL cache keyed by (namespace, slots, normalized message) with vector fallback"""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1000,
+                 similarity_threshold: float = 0.9, dims: int = 2 ** 12,
+                 max_vectors_per_bucket: int = 200):
+        self.entries = TTLCache(ttl=ttl, max_entries=max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.dims = dims
+        self.max_vectors_per_bucket = max_vectors_per_bucket
+        # bucket (namespace + slots) -> entry key -> message vector
+        self._vectors: Dict[str, "OrderedDict[str, np.ndarray]"] = {}
+        self.semantic_hits = 0
+
+    def _keys(self, namespace: str, message: str, slots: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+        normalized = normalize_message(message)
+        bucket = stable_fingerprint(namespace, slots or {})
+        return bucket, stable_fingerprint(bucket, normalized), normalized
+
+    def get(self, namespace: str, message: str, slots: Optional[Dict[str, Any]] = None,
+            semantic: bool = True) -> Any:
+        """
+        Cached value for the message or a near-duplicate with the same slots (None if absent)
+
+        Args:
+            semantic: Also match near-duplicates by vector similarity; pass False for values that
+                quote the original wording, so only messages with the same normalized tokens hit
+        """
+        bucket, key, normalized = self._keys(namespace, message, slots)
+        value = self.entries.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        vectors = self._vectors.get(bucket)
+        if not semantic or not vectors or not normalized:
+            return None
+
+        keys = list(vectors.keys())
+        similarities = np.stack(list(vectors.values())) @ hashed_features(normalized, self.dims)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        value = self.entries.get(keys[best], MISSING)
+        if value is MISSING:
+            # Expired or evicted entry
+            del vectors[keys[best]]
+            return None
+
+        self.semantic_hits += 1
+        return value
+
+    def set(self, namespace: str, message: str, slots: Optional[Dict[str, Any]], value: Any):
+        """Cache a value for the message under the given slots"""
+        bucket, key, normalized = self._keys(namespace, message, slots)
+        self.entries.set(key, value)
+
+        if normalized:
+            vectors = self._vectors.setdefault(bucket, OrderedDict())
+            vectors[key] = hashed_features(normalized, self.dims)
+            vectors.move_to_end(key)
+            while len(vectors) > self.max_vectors_per_bucket:
+                vectors.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self._vectors.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {**self.entries.stats(), "semantic_hits": self.semantic_hits, "buckets": len(self._vectors)}
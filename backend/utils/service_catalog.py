@@ -0,0 +1,176 @@
+"""
+In-memory service catalog with columnar storage and inverted indexes
+Loads accommodations, activities and transportation once from local data files
+"""
+
+from typing import Dict, List, Any, Optional, Callable
+import csv
+import heapq
+import logging
+import os
+import numpy as np
+
+from utils.seasonality import get_seasonality_table, normalize_destination
+from utils.service_vectors import get_service_vectorizer
+
+logger = logging.getLogger(__name__)
+
+# Contacts in the bundled catalog are @example.com placeholders until real partner data is loaded
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "service_catalog.csv")
+
+# Price band upper bounds per service type (budget, moderate; above is luxury)
+PRICE_BANDS = {
+    "accommodation": (3000, 8000),
+    "activities": (1500, 4000),
+    "transportation": (800, 2500)
+}
+
+
+def price_band(service_type: str, price: float) -> str:
+    """Price band for a service price"""
+    budget_max, moderate_max = PRICE_BANDS.get(service_type, (2000, 4000))
+    if price < budget_max:
+        return "budget"
+    elif price <= moderate_max:
+        return "moderate"
+    return "luxury"
+
+
+class ServiceCatalog:
+    """Columnar service catalog with filtered top-k queries"""
+
+    def __init__(self, path: str = CATALOG_PATH):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+
+        # Columnar storage
+        self.ids: List[str] = [row["id"] for row in rows]
+        self.row_by_id: Dict[str, int] = {service_id: row_id for row_id, service_id in enumerate(self.ids)}
+        self.names: List[str] = [row["name"] for row in rows]
+        self.types: List[str] = [row["type"] for row in rows]
+        self.locations: List[str] = [row["location"] for row in rows]
+        self.descriptions: List[str] = [row["description"] for row in rows]
+        self.contacts: List[str] = [row["contact"] for row in rows]
+        self.advance_booking: List[str] = [row["advance_booking"] for row in rows]
+        self.features: List[List[str]] = [[f for f in row["features"].split("|") if f] for row in rows]
+        self.price = np.asarray([float(row["price"]) for row in rows], dtype=np.float32)
+        self.rating = np.asarray([float(row["rating"]) for row in rows], dtype=np.float32)
+        self.price_bands: List[str] = [price_band(t, p) for t, p in zip(self.types, self.price)]
+
+        # Normalized feature vectors (one row per service) for profile similarity
+        self.vectors = get_service_vectorizer().encode_columns(
+            self.names, self.features, self.descriptions, self.price_bands, self.rating.tolist()
+        )
+
+        # Inverted indexes (sorted row id arrays)
+        self.location_index = self._build_index(normalize_destination(location) for location in self.locations)
+        self.type_index = self._build_index(self.types)
+        self.price_band_index = self._build_index(self.price_bands)
+        self.feature_index = self._build_index(
+            (feature.lower() for feature in features) for features in self.features
+        )
+
+        logger.info(f"📚 Service catalog loaded: {len(self.ids)} services across {len(self.location_index)} locations")
+
+    def _build_index(self, values) -> Dict[str, np.ndarray]:
+        postings: Dict[str, List[int]] = {}
+        for row_id, value in enumerate(values):
+            for key in ([value] if isinstance(value, str) else value):
+                postings.setdefault(key, []).append(row_id)
+        return {key: np.asarray(ids, dtype=np.int64) for key, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def resolve_location(self, location: str) -> Optional[str]:
+        """Map free-text location to a catalog location key"""
+        normalized = normalize_destination(location)
+        if normalized in self.location_index:
+            return normalized
+
+        # Cities and regions map to their destination (e.g. "Jaipur" -> rajasthan)
+        dest_key = get_seasonality_table().resolve_destination(location)
+        return dest_key if dest_key in self.location_index else None
+
+    def filter(self,
+               location: str,
+               service_type: Optional[str] = None,
+               price_band: Optional[str] = None,
+               features: Optional[List[str]] = None) -> np.ndarray:
+        """Row ids matching all filters (intersection of posting lists)"""
+        location_key = self.resolve_location(location)
+        if location_key is None:
+            return np.empty(0, dtype=np.int64)
+
+        row_ids = self.location_index[location_key]
+        postings = []
+        if service_type:
+            postings.append(self.type_index.get(service_type))
+        if price_band:
+            postings.append(self.price_band_index.get(price_band))
+        for feature in features or []:
+            postings.append(self.feature_index.get(feature.lower()))
+
+        for posting in postings:
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            row_ids = np.intersect1d(row_ids, posting, assume_unique=True)
+        return row_ids
+
+    def similarity(self, row_ids: np.ndarray, profile_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of services to a profile vector (one matrix-vector product)"""
+        return self.vectors[row_ids] @ profile_vector
+
+    def top_k(self,
+              row_ids: np.ndarray,
+              scores: np.ndarray,
+              k: int = 10) -> List[int]:
+        """Heap-based top-k row ids by score (ties keep catalog order)"""
+        return [row_id for _, _, row_id in heapq.nlargest(
+            k, ((float(score), -int(row_id), int(row_id)) for row_id, score in zip(row_ids, scores))
+        )]
+
+    def query(self,
+              location: str,
+              service_type: Optional[str] = None,
+              score_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+              k: int = 10,
+              price_band: Optional[str] = None,
+              features: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Filtered top-k services, scored by score_fn over row ids (rating by default)"""
+        row_ids = self.filter(location, service_type, price_band, features)
+        if len(row_ids) == 0:
+            return []
+
+        scores = score_fn(row_ids) if score_fn else self.rating[row_ids] / 5.0
+        score_by_row = dict(zip(row_ids.tolist(), np.asarray(scores).tolist()))
+        return [self.to_service(row_id, score_by_row[row_id]) for row_id in self.top_k(row_ids, scores, k)]
+
+    def to_service(self, row_id: int, similarity_score: float) -> Dict[str, Any]:
+        """Service dict in the recommendations API format"""
+        return {
+            "id": self.ids[row_id],
+            "name": self.names[row_id],
+            "type": self.types[row_id],
+            "location": self.locations[row_id].title(),
+            "rating": round(float(self.rating[row_id]), 1),
+            "price": int(self.price[row_id]),
+            "price_band": self.price_bands[row_id],
+            "similarity_score": round(float(similarity_score), 3),
+            "match_reasons": [],
+            "description": self.descriptions[row_id],
+            "features": list(self.features[row_id]),
+            "availability": True,
+            "booking_info": {"contact": self.contacts[row_id], "advance_booking": self.advance_booking[row_id]}
+        }
+
+
+_service_catalog: Optional[ServiceCatalog] = None
+
+
+def get_service_catalog() -> ServiceCatalog:
+    """Get shared service catalog (loaded once per process)"""
+    global _service_catalog
+    if _service_catalog is None:
+        _service_catalog = ServiceCatalog()
+    return _service_catalog
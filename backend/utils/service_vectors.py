@@ -0,0 +1,194 @@
+"""
+Fixed-length feature vectors for services and traveler profiles
+Profile-to-service similarity is a single matrix-vector product over normalized vectors
+"""
+
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+from utils.cache import TTLCache, stable_fingerprint
+
+# Interest axes shared by services and profiles
+INTEREST_AXES = ["adventure", "culture", "nature", "relaxation", "food", "shopping", "nightlife", "luxury", "family", "eco"]
+BUDGET_AXES = ["budget", "moderate", "luxury"]
+FEATURE_NAMES = INTEREST_AXES + [f"price_{band}" for band in BUDGET_AXES] + ["quality"]
+
+AXIS_INDEX = {axis: i for i, axis in enumerate(INTEREST_AXES)}
+BUDGET_OFFSET = len(INTEREST_AXES)
+QUALITY_INDEX = len(FEATURE_NAMES) - 1
+
+# Service keywords (name, features, description) per interest axis
+SERVICE_KEYWORDS = {
+    "adventure": ["adventure", "water sports", "trek", "paraglid", "rafting", "safari", "zipline", "surf", "ski", "snow", "self-drive", "balloon"],
+    "culture": ["culture", "heritage", "performance", "palace", "temple", "fort", "local experience", "kathakali", "haveli"],
+    "nature": ["nature", "wildlife", "backwaters", "lake", "mountain view", "river view", "scenic", "beach", "desert", "garden", "plantation", "national park"],
+    "relaxation": ["relaxation", "wellness", "spa", "ayurveda", "yoga", "sea view", "pool", "hot spring", "cruise"],
+    "food": ["food", "cooking", "lunch included", "meals included", "restaurant", "street food", "catering", "cafe"],
+    "shopping": ["shopping", "market", "craft", "printing"],
+    "nightlife": ["bar", "nightlife", "music", "evening", "sound & light"],
+    "luxury": ["luxury", "private", "palace", "chauffeur", "yacht", "mercedes"],
+    "family": ["family friendly", "group", "dolphin"],
+    "eco": ["eco-friendly", "homestay", "public transport", "cycle", "social impact", "community", "hostel"]
+}
+
+# Profile attributes -> interest axis weights
+VACATION_STYLE_WEIGHTS = {
+    "adventurous": {"adventure": 1.0, "nature": 0.5},
+    "relaxing": {"relaxation": 1.0, "nature": 0.3, "food": 0.3},
+    "balanced": {"culture": 0.5, "nature": 0.5, "food": 0.3, "relaxation": 0.3, "adventure": 0.3}
+}
+EXPERIENCE_TYPE_WEIGHTS = {
+    "nature": {"nature": 1.0},
+    "culture": {"culture": 1.0},
+    "adventure": {"adventure": 1.0},
+    "relaxation": {"relaxation": 1.0},
+    "food": {"food": 1.0}
+}
+ATTRACTION_WEIGHTS = {
+    "offbeat": {"nature": 0.4, "eco": 0.5},
+    "popular": {"culture": 0.3}
+}
+INTEREST_WEIGHTS = {
+    "hiking": {"adventure": 0.7, "nature": 0.5},
+    "adventure": {"adventure": 1.0},
+    "museums": {"culture": 0.8},
+    "history": {"culture": 1.0},
+    "culture": {"culture": 1.0},
+    "nightlife": {"nightlife": 1.0},
+    "shopping": {"shopping": 1.0},
+    "food": {"food": 1.0},
+    "beaches": {"nature": 0.5, "relaxation": 0.5},
+    "wellness": {"relaxation": 1.0},
+    "spa": {"relaxation": 1.0},
+    "wildlife": {"nature": 1.0},
+    "photography": {"nature": 0.5, "culture": 0.3},
+    "fine_dining": {"food": 0.7, "luxury": 0.5},
+    "exclusive_experiences": {"luxury": 1.0},
+    "luxury_shopping": {"shopping": 0.7, "luxury": 0.7}
+}
+ACCOMMODATION_WEIGHTS = {
+    "luxury_hotels": {"luxury": 0.8},
+    "resorts": {"relaxation": 0.4, "luxury": 0.3},
+    "boutique_hotels": {"culture": 0.2},
+    "homestays": {"eco": 0.6},
+    "hostels": {"eco": 0.3},
+    "budget_hotels": {"eco": 0.2}
+}
+
+AXIS_REASONS = {
+    "adventure": "Great for adventure",
+    "culture": "Rich cultural experience",
+    "nature": "Close to nature",
+    "relaxation": "Relaxing and rejuvenating",
+    "food": "Great food experience",
+    "shopping": "Good for shopping",
+    "nightlife": "Lively evenings",
+    "luxury": "Premium experience",
+    "family": "Family friendly",
+    "eco": "Sustainable choice"
+}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class ServiceVectorizer:
+    """Encodes services and traveler profiles into the same feature space"""
+
+    def __init__(self, quality_weight: float = 0.5, profile_cache_size: int = 1000):
+        self.quality_weight = quality_weight
+        self.profile_cache = TTLCache(ttl=3600, max_entries=profile_cache_size)
+
+    def encode_service(self, name: str, features: List[str], description: str,
+                       price_band: str, rating: float) -> np.ndarray:
+        """Raw (unnormalized) service vector"""
+        vector = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+        text = " ".join([name, description] + list(features)).lower()
+
+        for axis, keywords in SERVICE_KEYWORDS.items():
+            if any(keyword in text for keyword in keywords):
+                vector[AXIS_INDEX[axis]] = 1.0
+
+        if price_band in BUDGET_AXES:
+            vector[BUDGET_OFFSET + BUDGET_AXES.index(price_band)] = 1.0
+        vector[QUALITY_INDEX] = np.clip((rating - 3.0) / 2.0, 0.0, 1.0)
+        return vector
+
+    def encode_services(self, services: List[Dict[str, Any]]) -> np.ndarray:
+        """Normalized matrix for service dicts (rows in input order)"""
+        return self.encode_columns(
+            [service.get("name", "") for service in services],
+            [service.get("features", []) for service in services],
+            [service.get("description", "") for service in services],
+            [service.get("price_band", "") for service in services],
+            [float(service.get("rating", 4.0)) for service in services]
+        )
+
+    def encode_columns(self, names: List[str], features: List[List[str]], descriptions: List[str],
+                       price_bands: List[str], ratings) -> np.ndarray:
+        """Normalized matrix for columnar service data"""
+        if not names:
+            return np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+        return _normalize_rows(np.stack([
+            self.encode_service(*row) for row in zip(names, features, descriptions, price_bands, ratings)
+        ]))
+
+    def encode_profile(self, traveler_profile: Dict[str, Any]) -> np.ndarray:
+        """Normalized profile vector (cached per profile fingerprint)"""
+        cache_key = stable_fingerprint(traveler_profile)
+        cached = self.profile_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        vector = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+
+        def add(weights: Optional[Dict[str, float]]):
+            for axis, weight in (weights or {}).items():
+                vector[AXIS_INDEX[axis]] += weight
+
+        add(VACATION_STYLE_WEIGHTS.get(traveler_profile.get("vacation_style", "balanced")))
+        add(EXPERIENCE_TYPE_WEIGHTS.get(traveler_profile.get("experience_type", "")))
+        add(ATTRACTION_WEIGHTS.get(traveler_profile.get("attraction_preference", "")))
+        for interest in traveler_profile.get("interests", []) or []:
+            add(INTEREST_WEIGHTS.get(interest))
+        for accommodation in traveler_profile.get("accommodation", []) or []:
+            add(ACCOMMODATION_WEIGHTS.get(accommodation))
+        if traveler_profile.get("children"):
+            add({"family": 1.0})
+
+        budget_level = traveler_profile.get("budget_level", "moderate")
+        if budget_level in BUDGET_AXES:
+            vector[BUDGET_OFFSET + BUDGET_AXES.index(budget_level)] = 1.0
+        if budget_level == "luxury":
+            add({"luxury": 0.5})
+
+        vector[QUALITY_INDEX] = self.quality_weight
+        vector = _normalize_rows(vector)
+        self.profile_cache.set(cache_key, vector)
+        return vector
+
+    def match_reasons(self, service_vector: np.ndarray, profile_vector: np.ndarray,
+                      budget_level: str, limit: int = 2) -> List[str]:
+        """Reasons from the interest axes contributing most to the score"""
+        contributions = service_vector[:len(INTEREST_AXES)] * profile_vector[:len(INTEREST_AXES)]
+        reasons = [
+            AXIS_REASONS[INTEREST_AXES[i]]
+            for i in np.argsort(-contributions)[:limit]
+            if contributions[i] > 0
+        ]
+        if budget_level in BUDGET_AXES and service_vector[BUDGET_OFFSET + BUDGET_AXES.index(budget_level)] > 0:
+            reasons.append("Budget friendly" if budget_level == "budget" else f"Fits your {budget_level} budget")
+        return reasons or ["Popular choice"]
+
+
+_service_vectorizer: Optional[ServiceVectorizer] = None
+
+
+def get_service_vectorizer() -> ServiceVectorizer:
+    """Get shared service vectorizer"""
+    global _service_vectorizer
+    if _service_vectorizer is None:
+        _service_vectorizer = ServiceVectorizer()
+    return _service_vectorizer
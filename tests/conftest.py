@@ -0,0 +1,10 @@
+"""
+Shared test setup: backend modules import from the backend/ root (e.g. `from utils.cache import ...`)
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
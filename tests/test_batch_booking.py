@@ -0,0 +1,152 @@
+"""
+Tests for whole-cart batch booking
+"""
+
+import asyncio
+
+import pytest
+
+from agents.external_booking_agent import ExternalBookingAgent
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+
+DEFAULTS = {"destination": "Goa", "travel_date": "2026-12-01", "travelers": 2}
+
+API_PROVIDERS = {
+    "water_sports": "Viator",
+    "heritage": "Klook",
+    "nature": "Klook",
+    "dining": "Getyourguide"
+}
+
+
+def provider(name):
+    return {"name": name, "type": "external_provider", "rating": 4.3, "price": 5000,
+            "availability": "high", "response_time": "instant", "booking_method": "api"}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Agent on the mock provider server; the provider for an item follows its activity type"""
+    monkeypatch.setenv("BOOKING_PROVIDER_MOCK", "1")
+    agent = ExternalBookingAgent(ContextStore(), EventBus())
+    agent.lookups = []
+
+    async def get_available_providers(activity_id, booking_details):
+        agent.lookups.append(booking_details["activity_type"])
+        name = API_PROVIDERS.get(booking_details["activity_type"])
+        return [provider(name)] if name else []
+
+    agent._get_available_providers = get_available_providers
+    return agent
+
+
+def book(agent, items, **kwargs):
+    async def main():
+        try:
+            return await agent.handle_batch_booking("session-1", items, DEFAULTS, **kwargs)
+        finally:
+            await agent.aclose()
+    return asyncio.run(main())
+
+
+def batch_calls(agent):
+    return [request for request in agent.mock_server.requests if "batch" in request.url.path]
+
+
+def test_items_are_grouped_into_one_call_per_provider(agent):
+    items = [
+        {"id": "a1", "title": "Jet ski", "activity_type": "water_sports"},
+        {"id": "a2", "title": "Old Goa churches", "activity_type": "heritage"},
+        {"id": "a3", "title": "Spice farm", "activity_type": "nature"},
+        {"id": "a4", "title": "Parasailing", "activity_type": "water_sports"},
+        {"id": "a5", "title": "Feni tasting", "activity_type": "dining"}
+    ]
+    result = book(agent, items)
+
+    assert result["status"] == "completed"
+    assert [r["item_id"] for r in result["results"]] == ["a1", "a2", "a3", "a4", "a5"]
+    assert [r["provider"] for r in result["results"]] == ["Viator", "Klook", "Klook", "Viator", "Getyourguide"]
+    assert result["summary"]["provider_calls"] == 3
+    assert len(batch_calls(agent)) == 3
+    # Items sharing an availability query are looked up once
+    assert sorted(agent.lookups) == ["dining", "heritage", "nature", "water_sports"]
+    assert len(agent.context_store.get_bookings("session-1")) == 5
+
+
+def test_partial_failure_keeps_the_other_bookings(agent):
+    agent.mock_server.sold_out.add("a2")
+    items = [
+        {"id": "a1", "title": "Jet ski", "activity_type": "water_sports"},
+        {"id": "a2", "title": "Old Goa churches", "activity_type": "heritage"},
+        {"id": "a3", "title": "Casino night", "activity_type": "nightlife"}
+    ]
+    result = book(agent, items)
+
+    assert result["status"] == "partial"
+    assert [r["status"] for r in result["results"]] == ["confirmed", "failed", "not_available"]
+    assert result["results"][2]["provider"] is None
+    assert result["summary"] == {"total_items": 3, "booked": 1, "failed": 2, "provider_calls": 2, "total_cost": 5000}
+
+
+def test_provider_error_fails_only_its_group(agent):
+    async def attempt_batch_booking(selected, items):
+        if selected["name"] == "Klook":
+            raise RuntimeError("provider down")
+        return [{"status": "confirmed", "reference": f"REF-{item['activity_id']}"} for item in items]
+
+    agent._attempt_batch_booking = attempt_batch_booking
+    result = book(agent, [
+        {"id": "a1", "title": "Jet ski", "activity_type": "water_sports"},
+        {"id": "a2", "title": "Old Goa churches", "activity_type": "heritage"}
+    ])
+    assert [r["status"] for r in result["results"]] == ["confirmed", "error"]
+    assert result["results"][1]["message"] == "provider down"
+    assert result["status"] == "partial"
+
+
+def test_max_concurrency_bounds_provider_calls(agent):
+    in_flight = []
+    peak = []
+
+    async def get_available_providers(activity_id, booking_details):
+        return [provider(f"Partner {booking_details['activity_type']}")]
+
+    async def attempt_batch_booking(selected, items):
+        in_flight.append(selected["name"])
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(selected["name"])
+        return [{"status": "confirmed"} for _ in items]
+
+    agent._get_available_providers = get_available_providers
+    agent._attempt_batch_booking = attempt_batch_booking
+    items = [{"id": f"a{idx}", "title": f"Activity {idx}", "activity_type": f"type_{idx}"} for idx in range(6)]
+    result = book(agent, items, max_concurrency=2)
+
+    assert result["summary"]["provider_calls"] == 6
+    assert max(peak) == 2
+
+
+def test_endpoint_validates_the_request(monkeypatch):
+    from fastapi.testclient import TestClient
+    import server
+
+    async def handle_batch_booking(session_id, items, booking_defaults, max_concurrency):
+        return {"status": "completed", "results": [], "summary": {"items": len(items), "max_concurrency": max_concurrency}}
+
+    monkeypatch.setattr(server.booking_agent, "handle_batch_booking", handle_batch_booking)
+    client = TestClient(server.app)
+
+    assert client.post("/api/batch-booking", json={"items": [{"id": "a1"}]}).status_code == 422
+    assert client.post("/api/batch-booking", json={"session_id": "s1", "items": [{"id": "a1"}],
+                                                   "max_concurrency": 0}).status_code == 422
+    assert client.post("/api/batch-booking", json={"session_id": "s1"}).status_code == 400
+
+    response = client.post("/api/batch-booking", json={
+        "session_id": "s1",
+        "cart": {"cart_id": "cart-1", "booking_components": [{"id": "a1"}, {"id": "a2"}]}
+    })
+    assert response.status_code == 200
+    assert response.json()["cart_id"] == "cart-1"
+    assert response.json()["summary"] == {"items": 2, "max_concurrency": 4}
@@ -0,0 +1,224 @@
+"""
+Tests for the array-based conflict engine
+"""
+
+import random
+
+from utils.conflict_engine import ConflictEngine, parse_clock_time, parse_duration_minutes
+from utils.frozen_itinerary import (
+    changed_indices, freeze, insert_day, move_activity, remove_day, reorder_days, thaw, update_in
+)
+
+LOCATIONS = ["Baga Beach", "Fort Aguada", "Panjim", "Old Goa", "Dudhsagar Falls"]
+TIMES = ["8:00 AM", "9:00 AM", "10:30 AM", "12:00 PM", "2:00 PM", "6:00 PM", "14:30", "", "sometime"]
+DURATIONS = ["20 minutes", "1 hours", "2 hours", "3 hours", "13 hours", "a while"]
+
+
+def travel_time(source, target):
+    return 150 if {source, target} == {"Baga Beach", "Dudhsagar Falls"} else 30
+
+
+def random_activity(rng):
+    return {
+        "title": f"Activity {rng.random():.6f}",
+        "time": rng.choice(TIMES),
+        "duration": rng.choice(DURATIONS),
+        "location": rng.choice(LOCATIONS)
+    }
+
+
+def random_itinerary(rng, max_days=6):
+    return [
+        {"day": day + 1, "title": f"Day {day + 1}", "activities": [random_activity(rng) for _ in range(rng.randint(0, 6))]}
+        for day in range(rng.randint(0, max_days))
+    ]
+
+
+def naive_overlaps(activities):
+    """Reference O(n^2) check: every pair (in start order) where the later one starts before the earlier one ends"""
+    timed = []
+    for activity in activities:
+        start = parse_clock_time(activity.get("time") or "")
+        duration = parse_duration_minutes(activity.get("duration", "2 hours"))
+        if start >= 0 and duration > 0:
+            timed.append((start, start + duration, activity["title"]))
+    timed.sort(key=lambda item: item[0])
+    return {
+        (first[2], second[2])
+        for i, first in enumerate(timed)
+        for second in timed[i + 1:]
+        if second[0] < first[1]
+    }
+
+
+def test_overlaps_match_all_pairs_reference():
+    rng = random.Random(1)
+    engine = ConflictEngine(travel_time)
+    for _ in range(300):
+        itinerary = random_itinerary(rng)
+        found = {
+            (day_number, tuple(conflict["activities"]))
+            for conflict in engine.check(itinerary)["conflicts"]
+            if conflict["type"] == "time_overlap"
+            for day_number in [conflict["day"]]
+        }
+        expected = {
+            (day["day"], pair)
+            for day in itinerary
+            for pair in naive_overlaps(day["activities"])
+        }
+        assert found == expected
+
+
+def test_overlaps_include_non_adjacent_pairs():
+    day = {"activities": [
+        {"title": "Long tour", "time": "9:00 AM", "duration": "5 hours", "location": "Panjim"},
+        {"title": "Coffee", "time": "10:00 AM", "duration": "1 hours", "location": "Panjim"},
+        {"title": "Lunch", "time": "12:00 PM", "duration": "1 hours", "location": "Panjim"}
+    ]}
+    pairs = [c["activities"] for c in ConflictEngine(travel_time).check([day])["conflicts"] if c["type"] == "time_overlap"]
+    assert pairs == [["Long tour", "Coffee"], ["Long tour", "Lunch"]]
+
+
+def test_parsers():
+    assert parse_clock_time("9:00 AM") == 540
+    assert parse_clock_time("2:30 pm") == 870
+    assert parse_clock_time("12:00 AM") == 0
+    assert parse_clock_time("14:30") == 870
+    assert parse_clock_time("9:00 AM - 11:00 AM") == 540
+    assert parse_clock_time("25:00") == -1
+    assert parse_duration_minutes("1.5 hours") == 90
+    assert parse_duration_minutes("45 minutes") == 45
+    assert parse_duration_minutes("all day") == 120
+
+
+def test_scoped_check_matches_filtered_full_check():
+    rng = random.Random(2)
+    engine = ConflictEngine(travel_time)
+    for _ in range(200):
+        itinerary = random_itinerary(rng)
+        if not itinerary:
+            continue
+        days = rng.sample(range(len(itinerary)), k=min(2, len(itinerary)))
+        full = ConflictEngine(travel_time).check(itinerary)
+        scoped = engine.check(itinerary, days)
+        numbers = {idx + 1 for idx in days}
+        assert scoped["conflicts"] == [c for c in full["conflicts"] if c["day"] in numbers]
+        assert scoped["warnings"] == [
+            w for w in full["warnings"]
+            if w.get("day") in numbers or any(d in numbers for d in w.get("days", []))
+        ]
+
+
+def test_incremental_recheck_matches_fresh_check_and_parses_only_changed_days():
+    rng = random.Random(3)
+    engine = ConflictEngine(travel_time)
+    parsed_days = []
+    parse = engine.parse
+    engine.parse = lambda itinerary, day_indices=None: parsed_days.append(list(day_indices)) or parse(itinerary, day_indices)
+
+    itinerary = freeze(random_itinerary(rng, max_days=8) or [{"day": 1, "activities": []}])
+    engine.check(list(itinerary))
+    for _ in range(50):
+        day_idx = rng.randrange(len(itinerary))
+        edited = update_in(itinerary, (day_idx, "activities"), lambda activities: activities + (freeze(random_activity(rng)),))
+        parsed_days.clear()
+
+        result = engine.check(list(edited), modified_days=[day_idx])
+        fresh = ConflictEngine(travel_time).check(list(edited))
+        assert result == fresh
+        assert set(parsed_days[0]) <= {day_idx - 1, day_idx, day_idx + 1}
+        itinerary = edited
+
+
+def random_edit(rng, itinerary):
+    """One structural or content edit, as a batch step would apply it"""
+    kind = rng.choice(["add", "move", "insert", "remove", "reorder"])
+    if kind == "add" or len(itinerary) < 2:
+        day_idx = rng.randrange(len(itinerary))
+        return update_in(itinerary, (day_idx, "activities"), lambda activities: activities + (freeze(random_activity(rng)),))
+    if kind == "move":
+        from_day = rng.randrange(len(itinerary))
+        if not itinerary[from_day]["activities"]:
+            return itinerary
+        activity_index = rng.randrange(len(itinerary[from_day]["activities"]))
+        return move_activity(itinerary, from_day, rng.randrange(len(itinerary)), activity_index)
+    if kind == "insert":
+        return insert_day(itinerary, rng.randrange(len(itinerary) + 1), {"day": 0, "activities": [random_activity(rng)]})
+    if kind == "remove":
+        return remove_day(itinerary, rng.randrange(len(itinerary)))
+    order = list(range(len(itinerary)))
+    first, second = rng.sample(order, 2)
+    order[first], order[second] = order[second], order[first]
+    return reorder_days(itinerary, order)
+
+
+def test_scoped_batch_recheck_matches_filtered_full_check():
+    rng = random.Random(4)
+    engine = ConflictEngine(travel_time)
+    itinerary = freeze(random_itinerary(rng, max_days=8) or [{"day": 1, "activities": []}])
+    engine.check(list(itinerary))
+    for _ in range(100):
+        edited = itinerary
+        for _ in range(rng.randint(1, 3)):
+            edited = random_edit(rng, edited)
+        touched = changed_indices(itinerary, edited)
+
+        scoped = engine.check(list(edited), touched, modified_days=touched)
+        full = ConflictEngine(travel_time).check(list(edited))
+        numbers = {idx + 1 for idx in touched}
+        assert scoped["fingerprint"] == full["fingerprint"]
+        assert scoped["conflicts"] == [c for c in full["conflicts"] if c["day"] in numbers]
+        assert scoped["suggestions"] == [s for s in full["suggestions"] if s["day"] in numbers]
+        assert scoped["warnings"] == [
+            w for w in full["warnings"]
+            if w.get("day") in numbers or any(d in numbers for d in w.get("days", []))
+        ]
+        assert engine.check(list(edited), modified_days=touched) == full
+        itinerary = edited
+
+
+def test_modified_days_rehash_plain_days_edited_in_place():
+    rng = random.Random(5)
+    engine = ConflictEngine(travel_time)
+    itinerary = thaw(freeze(random_itinerary(rng, max_days=8) or [{"day": 1, "activities": []}]))
+    engine.check(itinerary)
+    for _ in range(50):
+        day_idx = rng.randrange(len(itinerary))
+        itinerary[day_idx]["activities"].append(random_activity(rng))
+
+        assert engine.check(itinerary, modified_days=[day_idx]) == ConflictEngine(travel_time).check(itinerary)
+
+
+def test_moved_day_is_rechecked_with_its_new_day_number():
+    engine = ConflictEngine(travel_time)
+    busy = {"activities": [{"title": f"a{i}", "time": "", "duration": "1 hours", "location": "Panjim"} for i in range(5)]}
+    quiet = {"activities": []}
+    assert engine.check([busy, quiet])["conflicts"][0]["day"] == 1
+    assert engine.check([quiet, busy])["conflicts"][0]["day"] == 2
+
+
+def test_cached_issues_are_returned_as_copies():
+    def new_engine():
+        return ConflictEngine(travel_time, max_overnight_travel_minutes=120)
+
+    engine = new_engine()
+    busy = {"activities": [
+        {"title": f"a{i}", "time": "9:00 AM", "duration": "1 hours", "location": "Baga Beach"} for i in range(5)
+    ]}
+    far = {"activities": [{"title": "Falls", "time": "", "duration": "13 hours", "location": "Dudhsagar Falls"}]}
+    itinerary = [busy, far]
+    fresh = new_engine().check(itinerary)
+
+    first = engine.check(itinerary)
+    assert {issue["type"] for issue in first["warnings"]} >= {"overnight_travel", "too_long_activity"}
+    for issue in first["conflicts"] + first["warnings"]:
+        issue["message"] = "annotated"
+        for key in ("activities", "days"):
+            if key in issue:
+                issue[key].append("annotated")
+
+    assert engine.check(itinerary) == fresh
+    assert engine.check(itinerary, [1]) == new_engine().check(itinerary, [1])
+    stats = engine.cache_stats()
+    assert stats["days"]["hits"] >= 2 and stats["boundaries"]["hits"] >= 2
@@ -0,0 +1,136 @@
+"""
+Tests for customization undo/redo through the operation log
+"""
+
+import asyncio
+
+import pytest
+
+from agents.customization_agent import CustomizationAgent
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+from utils.frozen_itinerary import thaw
+
+
+def activity(idx, time):
+    return {
+        "id": f"act-{idx}", "name": f"Activity {idx}", "type": "sightseeing", "time": time,
+        "duration": "1 hour", "location": "Panaji", "description": "Walk", "cost": 1000.0
+    }
+
+
+VARIANT = {
+    "id": "var-1", "type": "balanced", "title": "Goa", "description": "Three days in Goa", "days": 2,
+    "total_cost": 6000.0,
+    "daily_itinerary": [
+        {"day": 1, "date": "2026-12-01", "theme": "Beaches", "total_cost": 3000.0,
+         "activities": [activity(1, "9:00 AM"), activity(2, "12:00 PM"), activity(3, "4:00 PM")]},
+        {"day": 2, "date": "2026-12-02", "theme": "Forts", "total_cost": 3000.0,
+         "activities": [activity(4, "9:00 AM"), activity(5, "12:00 PM"), activity(6, "4:00 PM")]}
+    ],
+    "highlights": ["Beaches"], "persona_match": 0.8, "sustainability_score": 0.5,
+    "total_activities": 6, "activity_types": ["sightseeing"]
+}
+
+
+@pytest.fixture
+def agent():
+    agent = CustomizationAgent(ContextStore(), EventBus())
+    agent.context_store.add_itinerary("s1", "var-1", VARIANT)
+    return agent
+
+
+def remove(agent, day, index):
+    customization = {"type": "activity_remove", "day": day, "activity_index": index}
+    return asyncio.run(agent.apply_customizations("s1", "var-1", [customization]))
+
+
+def activity_ids(agent):
+    itinerary = agent.context_store.get_itinerary("s1", "var-1")
+    return [[a["id"] for a in day["activities"]] for day in itinerary["daily_itinerary"]]
+
+
+def test_customizations_are_logged_as_patches(agent):
+    remove(agent, 1, 0)
+    remove(agent, 2, 0)
+    history = agent.get_history("s1", "var-1")
+    assert [entry["operation"] for entry in history] == ["customize", "customize"]
+    assert history[0]["operation_data"]["customizations"][0]["type"] == "activity_remove"
+    log = agent.history.get("s1:var-1")
+    assert all("itinerary" not in record for record in log.records)
+    assert agent.context_store.get_customizations("s1") == []
+
+
+def test_undo_and_redo_restore_stored_itinerary(agent):
+    remove(agent, 1, 0)
+    remove(agent, 2, 0)
+    assert activity_ids(agent) == [["act-2", "act-3"], ["act-5", "act-6"]]
+
+    result = agent.step_history("s1", "var-1", "undo")
+    assert activity_ids(agent) == [["act-2", "act-3"], ["act-4", "act-5", "act-6"]]
+    assert result["can_undo"] and result["can_redo"]
+    assert {"op": "add", "path": "/daily_itinerary/1/activities/0", "value": activity(4, "9:00 AM")} in result["patch"]
+
+    agent.step_history("s1", "var-1", "undo")
+    assert activity_ids(agent) == [["act-1", "act-2", "act-3"], ["act-4", "act-5", "act-6"]]
+    assert thaw(agent.context_store.get_itinerary("s1", "var-1")) == VARIANT
+
+    agent.step_history("s1", "var-1", "redo")
+    assert activity_ids(agent) == [["act-2", "act-3"], ["act-4", "act-5", "act-6"]]
+
+
+def test_new_customization_after_undo_drops_redo(agent):
+    remove(agent, 1, 0)
+    agent.step_history("s1", "var-1", "undo")
+    remove(agent, 2, 0)
+    assert activity_ids(agent) == [["act-1", "act-2", "act-3"], ["act-5", "act-6"]]
+    with pytest.raises(ValueError, match="Nothing to redo"):
+        agent.step_history("s1", "var-1", "redo")
+    assert [entry["undone"] for entry in agent.get_history("s1", "var-1")] == [False]
+
+
+def test_rejected_customizations_are_not_logged(agent):
+    remove(agent, 1, 0)
+    remove(agent, 1, 0)  # Rejected: a day keeps at least 2 activities
+    assert len(agent.get_history("s1", "var-1")) == 1
+
+
+def test_undo_refuses_when_itinerary_changed_elsewhere(agent):
+    remove(agent, 1, 0)
+    agent.context_store.add_itinerary("s1", "var-1", {**VARIANT, "total_cost": 9999.0})
+    with pytest.raises(ValueError, match="changed"):
+        agent.step_history("s1", "var-1", "undo")
+
+    # The next customization starts a fresh log from the changed itinerary
+    remove(agent, 2, 0)
+    assert len(agent.get_history("s1", "var-1")) == 1
+    agent.step_history("s1", "var-1", "undo")
+    assert agent.context_store.get_itinerary("s1", "var-1")["total_cost"] == 9999.0
+
+
+def test_unknown_itinerary_has_no_history(agent):
+    assert agent.get_history("s1", "missing") == []
+    with pytest.raises(KeyError):
+        agent.step_history("s1", "missing", "undo")
+
+
+def test_history_endpoints():
+    from fastapi.testclient import TestClient
+    import server
+
+    server.context_store.add_itinerary("s-endpoint", "var-1", VARIANT)
+    client = TestClient(server.app)
+    body = {"session_id": "s-endpoint", "itinerary_id": "var-1"}
+
+    assert client.post("/api/customize-itinerary/undo", json=body).status_code == 404
+    response = client.post("/api/customize-itinerary", json={
+        **body, "customizations": [{"type": "activity_remove", "day": 1, "activity_index": 0}]
+    })
+    assert response.status_code == 200
+
+    history = client.get("/api/customize-itinerary/history", params=body).json()["history"]
+    assert len(history) == 1
+    undone = client.post("/api/customize-itinerary/undo", json=body).json()
+    assert undone["operation"] == "undo" and undone["can_redo"]
+    assert len(undone["updated_variant"]["daily_itinerary"][0]["activities"]) == 3
+    assert client.post("/api/customize-itinerary/undo", json=body).status_code == 409
@@ -0,0 +1,179 @@
+"""
+Tests for dynamic pricing quotes and incremental repricing
+"""
+
+import asyncio
+import copy
+
+import pytest
+
+from agents.dynamic_pricing_agent import DynamicPricingAgent
+
+
+PROFILE = {"budget_level": "budget", "spending_history": 30000, "propensity_to_pay": "medium"}
+DATES = {"start_date": "2026-11-10", "end_date": "2026-11-12"}
+
+
+def activity(title, category="culture", duration="2 hours", location="Panaji"):
+    return {"title": title, "category": category, "duration": duration, "location": location}
+
+
+ITINERARY = [
+    {"day": 1, "activities": [
+        activity("Heritage Walk"),
+        activity("Spice Farm", "nature", "4 hours"),
+        activity("Heritage Walk")
+    ]},
+    {"day": 2, "activities": [
+        activity("Fort Aguada", location="Candolim"),
+        activity("Amber Fort", location="Jaipur")
+    ]}
+]
+
+
+@pytest.fixture
+def agent():
+    return DynamicPricingAgent()
+
+
+def price(agent, itinerary):
+    return asyncio.run(agent.calculate_dynamic_pricing("s1", itinerary, PROFILE, DATES))
+
+
+def reprice(agent, quote_id, itinerary):
+    return asyncio.run(agent.reprice_itinerary("s1", quote_id, itinerary, PROFILE, DATES))
+
+
+def full_price(agent, itinerary):
+    """Price from scratch against the same competitor snapshot"""
+    agent.quote_cache.clear()
+    return price(agent, itinerary)
+
+
+def assert_same_pricing(repriced, full):
+    for key in ("base_total", "adjusted_total", "final_total", "total_savings"):
+        assert repriced[key] == pytest.approx(full[key])
+    assert ({item["id"]: item["current_price"] for item in repriced["line_items"]} ==
+            {item["id"]: item["current_price"] for item in full["line_items"]})
+    assert repriced["demand_analysis"] == full["demand_analysis"]
+
+
+def test_repeated_titles_in_a_day_get_distinct_ids(agent):
+    quote = price(agent, ITINERARY)
+
+    ids = [item["id"] for item in quote["line_items"]]
+    assert len(ids) == len(set(ids))
+    assert "day_1_1_Heritage Walk" in ids and "day_1_3_Heritage Walk" in ids
+
+
+def test_reprice_after_editing_a_repeated_title_matches_full_pricing(agent):
+    quote = price(agent, ITINERARY)
+    edited = copy.deepcopy(ITINERARY)
+    edited[0]["activities"][2]["duration"] = "5 hours"
+
+    repriced = reprice(agent, quote["quote_id"], edited)
+
+    assert repriced["pricing_delta"]["changed"] == ["day_1_3_Heritage Walk"]
+    assert repriced["pricing_delta"]["added"] == [] and repriced["pricing_delta"]["removed"] == []
+    assert_same_pricing(repriced, full_price(agent, edited))
+
+
+def test_reprice_after_removing_a_repeated_title_matches_full_pricing(agent):
+    quote = price(agent, ITINERARY)
+    edited = copy.deepcopy(ITINERARY)
+    del edited[0]["activities"][0]
+
+    repriced = reprice(agent, quote["quote_id"], edited)
+
+    assert repriced["pricing_delta"]["removed"] == ["day_1_3_Heritage Walk"]
+    assert [item["id"] for item in repriced["line_items"]][:2] == ["day_1_1_Spice Farm", "day_1_2_Heritage Walk"]
+    assert_same_pricing(repriced, full_price(agent, edited))
+
+
+def test_reprice_after_adding_and_moving_activities_matches_full_pricing(agent):
+    quote = price(agent, ITINERARY)
+    edited = copy.deepcopy(ITINERARY)
+    edited[1]["activities"].insert(0, activity("Heritage Walk", location="Candolim"))
+    edited[0]["activities"].reverse()
+
+    repriced = reprice(agent, quote["quote_id"], edited)
+
+    assert repriced["pricing_delta"]["added"] == ["day_2_1_Heritage Walk"]
+    assert_same_pricing(repriced, full_price(agent, edited))
+
+
+def test_reprice_updates_demand_when_first_location_changes(agent):
+    quote = price(agent, ITINERARY)
+    edited = copy.deepcopy(ITINERARY)
+    edited[0]["activities"].insert(0, activity("City Palace", location="Jaipur"))
+    jaipur_season = agent.seasonality.lookup("Jaipur", 11)["season_type"]
+    assert quote["demand_analysis"]["season_type"] != jaipur_season
+
+    repriced = reprice(agent, quote["quote_id"], edited)
+
+    assert repriced["pricing_delta"]["added"] == ["day_1_1_City Palace"]
+    assert repriced["demand_analysis"]["season_type"] == jaipur_season
+    assert_same_pricing(repriced, full_price(agent, edited))
+
+
+def test_reprice_falls_back_when_demand_multiplier_changes(agent, monkeypatch):
+    quote = price(agent, ITINERARY)
+    lookup = agent.seasonality.lookup
+
+    def lookup_by_destination(destination, month):
+        row = lookup(destination, month)
+        return {**row, "demand_level": "low"} if destination == "Candolim" else row
+
+    monkeypatch.setattr(agent.seasonality, "lookup", lookup_by_destination)
+    edited = copy.deepcopy(ITINERARY)
+    edited[0]["activities"] = [activity("Beach Morning", location="Candolim")] + edited[0]["activities"]
+
+    repriced = reprice(agent, quote["quote_id"], edited)
+
+    assert "pricing_delta" not in repriced
+    assert repriced["demand_analysis"]["multiplier"] != quote["demand_analysis"]["multiplier"]
+    assert_same_pricing(repriced, full_price(agent, edited))
+
+
+def test_repeat_quote_is_served_from_cache_as_a_copy(agent):
+    quote = price(agent, ITINERARY)
+    quote["line_items"][0]["current_price"] = 0
+
+    again = price(agent, copy.deepcopy(ITINERARY))
+
+    assert again["quote_id"] == quote["quote_id"]
+    assert again["quoted_at"] == quote["quoted_at"]
+    assert again["line_items"][0]["current_price"] > 0
+    assert agent.quote_cache.hits == 1
+
+
+def test_quote_fingerprint_ignores_fields_that_do_not_affect_price(agent):
+    annotated = copy.deepcopy(ITINERARY)
+    annotated[0]["activities"][0]["notes"] = "bring water"
+    extra_profile = {**PROFILE, "name": "Asha"}
+
+    assert (agent.get_quote_fingerprint(annotated, extra_profile, {**DATES, "flexible": True}) ==
+            agent.get_quote_fingerprint(ITINERARY, PROFILE, DATES))
+    assert (agent.get_quote_fingerprint(ITINERARY, {**PROFILE, "budget_level": "luxury"}, DATES) !=
+            agent.get_quote_fingerprint(ITINERARY, PROFILE, DATES))
+
+
+def test_update_base_rates_invalidates_cached_quotes(agent):
+    quote = price(agent, ITINERARY)
+
+    agent.update_base_rates("accommodation", {"budget": 3000})
+    repriced = price(agent, ITINERARY)
+
+    assert agent.get_cached_quote(quote["quote_id"]) is None
+    assert repriced["quote_id"] != quote["quote_id"]
+    assert repriced["rates_version"] == agent.rates_version != quote["rates_version"]
+    assert repriced["base_total"] > quote["base_total"]
+
+
+def test_expired_competitor_snapshot_invalidates_quote(agent):
+    quote = price(agent, ITINERARY)
+
+    agent.competitor_snapshots.clear()
+
+    assert agent.get_cached_quote(quote["quote_id"]) is None
+    assert quote["quote_id"] not in agent.quote_cache
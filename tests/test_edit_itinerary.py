@@ -0,0 +1,89 @@
+"""
+Tests for batched edits through /api/edit-itinerary
+"""
+
+import pytest
+
+
+def activity(title, location="Panjim"):
+    return {"title": title, "duration": "2 hours", "location": location}
+
+
+ITINERARY = [
+    {"day": 1, "title": "Day 1", "activities": [activity("Fort Aguada", "Candolim"), activity("Spice Farm")]},
+    {"day": 2, "title": "Day 2", "activities": [activity("Basilica")]},
+    {"day": 3, "title": "Day 3", "activities": [activity("Baga Beach", "Baga")]}
+]
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    import server
+
+    return TestClient(server.app)
+
+
+def hold(client):
+    return client.post("/api/itineraries", json={"session_id": "s1", "itinerary": ITINERARY}).json()
+
+
+def edit(client, held, operations):
+    return client.post("/api/edit-itinerary", json={
+        "session_id": "s1", "itinerary_id": held["itinerary_id"], "version": held["version"], "operations": operations
+    })
+
+
+def current(client, held):
+    return client.get(f"/api/itineraries/{held['itinerary_id']}").json()
+
+
+@pytest.mark.parametrize("failing_step", [
+    {"operation": "explode_day", "operation_data": {}},
+    {"operation": "move_activity", "operation_data": {"from_day": 1, "to_day": 0, "activity_index": 5}}
+])
+def test_failing_step_rolls_back_the_whole_batch(client, failing_step):
+    held = hold(client)
+    response = edit(client, held, [
+        {"operation": "move_activity", "operation_data": {"from_day": 0, "to_day": 2, "activity_index": 0}},
+        {"operation": "remove_destination", "operation_data": {"day_index": 0}},
+        failing_step
+    ])
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith(f"Operation 2 ({failing_step['operation']})")
+
+    after = current(client, held)
+    assert after["version"] == held["version"]
+    assert after["itinerary"] == ITINERARY
+    assert client.get(f"/api/itineraries/{held['itinerary_id']}/history").json()["history"] == []
+
+
+def test_failed_batch_leaves_the_version_usable(client):
+    held = hold(client)
+    assert edit(client, held, [
+        {"operation": "remove_destination", "operation_data": {"day_index": 2}},
+        {"operation": "explode_day", "operation_data": {}}
+    ]).status_code == 400
+
+    response = edit(client, held, [{"operation": "remove_destination", "operation_data": {"day_index": 2}}])
+
+    assert response.status_code == 200
+    assert response.json()["version"] == held["version"] + 1
+    assert current(client, held)["itinerary"] == ITINERARY[:2]
+
+
+def test_unheld_batch_applies_steps_in_order_without_touching_the_request(client):
+    request = {"session_id": "s1", "itinerary": ITINERARY, "operations": [
+        {"operation": "move_activity", "operation_data": {"from_day": 0, "to_day": 1, "activity_index": 1}},
+        {"operation": "reorder_days", "operation_data": {"new_order": [1, 0, 2]}}
+    ]}
+    snapshot = repr(request)
+
+    response = client.post("/api/edit-itinerary", json=request).json()
+
+    edited = response["edited_itinerary"]
+    assert [a["title"] for a in edited[0]["activities"]] == ["Basilica", "Spice Farm"]
+    assert [a["title"] for a in edited[1]["activities"]] == ["Fort Aguada"]
+    assert response["touched_days"] == [1, 2]
+    assert repr(request) == snapshot
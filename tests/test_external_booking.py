@@ -0,0 +1,183 @@
+"""
+Tests for the booking agent's provider fan-out
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import utils.cache
+from agents.external_booking_agent import ExternalBookingAgent
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+
+BOOKING = {
+    "activity_id": "act-1",
+    "activity_name": "Fort Aguada tour",
+    "destination": "Goa",
+    "activity_type": "heritage",
+    "travel_date": "2026-12-01",
+    "travelers": 2
+}
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    """Agent with simulated external providers only (no adapters, no local partners)"""
+    for variable in ("BOOKING_PROVIDER_MOCK", "VIATOR_API_KEY", "GETYOURGUIDE_API_KEY", "KLOOK_API_KEY"):
+        monkeypatch.delenv(variable, raising=False)
+
+    def make(latencies, provider_timeout=1.0, good_enough_score=100.0):
+        agent = ExternalBookingAgent(ContextStore(), EventBus())
+        agent.providers["local_partners"]["enabled"] = False
+        for name, latency in latencies.items():
+            agent.providers[name].update(enabled=True, simulated_latency=latency)
+        agent.provider_timeout = provider_timeout
+        agent.good_enough_score = good_enough_score
+        return agent
+
+    return make
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls TTLCache expiry without sleeping"""
+    fake = FakeClock()
+    monkeypatch.setattr(utils.cache, "time", fake)
+    return fake
+
+
+def count_lookups(agent, result=None):
+    """Count external provider lookups; `result` replaces the simulated availability when given"""
+    calls = []
+    simulate = agent._simulate_provider_availability
+
+    async def lookup(provider_name, booking_details):
+        calls.append(provider_name)
+        if result is not None:
+            return result(provider_name)
+        return await simulate(provider_name, booking_details)
+
+    agent._simulate_provider_availability = lookup
+    return calls
+
+
+def query(agent, booking=BOOKING):
+    started = time.perf_counter()
+    providers = asyncio.run(agent._get_available_providers(booking["activity_id"], booking))
+    return providers, time.perf_counter() - started
+
+
+def test_providers_are_queried_concurrently(make_agent):
+    agent = make_agent({"viator": 0.3, "getyourguide": 0.3, "klook": 0.3})
+    providers, elapsed = query(agent)
+    assert sorted(p["name"] for p in providers) == ["Getyourguide", "Klook", "Viator"]
+    # Close to the slowest provider, well under the 0.9s a sequential loop would take
+    assert 0.3 <= elapsed < 0.6
+
+
+def test_slow_provider_is_dropped_at_its_timeout(make_agent):
+    agent = make_agent({"viator": 2.0, "klook": 0.05}, provider_timeout=0.3)
+    providers, elapsed = query(agent)
+    assert [p["name"] for p in providers] == ["Klook"]
+    assert 0.3 <= elapsed < 0.8
+
+
+def test_fanout_deadline_bounds_the_whole_query(make_agent):
+    agent = make_agent({"viator": 2.0, "getyourguide": 2.0}, provider_timeout=5.0)
+    agent.fanout_deadline = 0.3
+    providers, elapsed = query(agent)
+    assert providers == []
+    assert elapsed < 0.8
+
+
+def test_good_enough_provider_returns_early(make_agent):
+    agent = make_agent({"viator": 2.0, "getyourguide": 2.0, "klook": 0.05}, provider_timeout=5.0,
+                       good_enough_score=3.0)
+    providers, elapsed = query(agent)
+    assert [p["name"] for p in providers] == ["Klook"]
+    assert elapsed < 0.5
+
+
+def test_waits_for_more_providers_while_below_the_bar(make_agent):
+    agent = make_agent({"viator": 0.3, "klook": 0.05}, good_enough_score=100.0)
+    providers, elapsed = query(agent)
+    assert sorted(p["name"] for p in providers) == ["Klook", "Viator"]
+    assert elapsed >= 0.3
+
+
+def test_repeat_queries_hit_the_availability_cache(make_agent, clock):
+    agent = make_agent({"viator": 0, "klook": 0})
+    calls = count_lookups(agent)
+    first, _ = query(agent)
+    second, _ = query(agent)
+    assert sorted(calls) == ["klook", "viator"]
+    assert sorted(first, key=lambda p: p["name"]) == sorted(second, key=lambda p: p["name"])
+    assert agent.availability_cache.hits == 2
+
+    # Other slots are separate entries
+    query(agent, {**BOOKING, "travel_date": "2026-12-02"})
+    assert len(calls) == 4
+
+
+def test_cached_availability_expires_after_its_ttl(make_agent, clock):
+    agent = make_agent({"viator": 0})
+    calls = count_lookups(agent)
+    query(agent)
+    clock.now += agent.availability_cache.ttl - 1
+    query(agent)
+    assert calls == ["viator"]
+    clock.now += 2
+    query(agent)
+    assert calls == ["viator", "viator"]
+
+
+def test_unavailable_results_are_cached_briefly(make_agent, clock):
+    agent = make_agent({"viator": 0, "klook": 0})
+    calls = count_lookups(agent, result=lambda name: None if name == "viator" else {
+        "name": "Klook", "type": "external_provider", "rating": 4.2, "price": 6000,
+        "availability": "high", "response_time": "instant", "booking_method": "api"
+    })
+    query(agent)
+    clock.now += agent.negative_cache_ttl - 1
+    providers, _ = query(agent)
+    assert [p["name"] for p in providers] == ["Klook"]
+    assert sorted(calls) == ["klook", "viator"]
+
+    # Only the negative entry has expired
+    clock.now += 2
+    query(agent)
+    assert sorted(calls) == ["klook", "viator", "viator"]
+
+
+def test_timed_out_lookups_are_not_cached(make_agent):
+    agent = make_agent({"viator": 0.5}, provider_timeout=0.1)
+    assert query(agent)[0] == []
+    assert len(agent.availability_cache) == 0
+
+
+def test_booking_invalidates_the_booked_slot(make_agent, clock):
+    agent = make_agent({"viator": 0, "klook": 0})
+    calls = count_lookups(agent)
+    other_date = {**BOOKING, "travel_date": "2026-12-02"}
+    query(agent)
+    query(agent, other_date)
+
+    result = asyncio.run(agent.handle_booking("session-1", BOOKING))
+    assert result.booking_status == "confirmed"
+    booked = agent.context_store.get_bookings("session-1")[0]["provider"].lower()
+    assert len(calls) == 4
+
+    # The booked provider's slot is looked up again, everything else stays cached
+    query(agent)
+    query(agent, other_date)
+    assert calls[4:] == [booked]
@@ -0,0 +1,97 @@
+"""
+Tests for copy-on-write itinerary edits
+"""
+
+import copy
+import random
+
+import pytest
+
+from utils.frozen_itinerary import (
+    FrozenDict, freeze, thaw, assoc_in, update_in, insert_in, remove_in, changed_indices,
+    reorder_days, move_activity, insert_day, remove_day, lock_activity
+)
+
+
+def sample_itinerary(days=4, activities=3):
+    return [
+        {"day": d + 1, "title": f"Day {d + 1}",
+         "activities": [{"title": f"a{d}{i}", "time": "9:00 AM"} for i in range(activities)]}
+        for d in range(days)
+    ]
+
+
+def test_freeze_and_thaw_round_trip():
+    data = sample_itinerary()
+    frozen = freeze(data)
+    assert isinstance(frozen, tuple) and isinstance(frozen[0], FrozenDict)
+    assert isinstance(frozen[0]["activities"], tuple)
+    assert thaw(frozen) == data
+    assert freeze(frozen) is frozen
+
+
+def test_frozen_dict_is_read_only():
+    day = freeze({"title": "Day 1"})
+    with pytest.raises(TypeError):
+        day["title"] = "changed"
+    with pytest.raises(TypeError):
+        day.update(title="changed")
+    with pytest.raises(TypeError):
+        del day["title"]
+    assert day.set("title", "changed") == {"title": "changed"}
+    assert day == {"title": "Day 1"}
+    assert copy.deepcopy(day) is day
+
+
+def test_edits_never_mutate_the_input():
+    rng = random.Random(4)
+    for _ in range(200):
+        source = sample_itinerary(days=rng.randint(1, 5), activities=rng.randint(1, 4))
+        snapshot = copy.deepcopy(source)
+        frozen = freeze(source)
+        frozen_snapshot = thaw(frozen)
+
+        days = len(frozen)
+        edits = [
+            lambda it: reorder_days(it, rng.sample(range(days), days)),
+            lambda it: move_activity(it, rng.randrange(days), rng.randrange(days), 0),
+            lambda it: insert_day(it, rng.randrange(days + 1), {"title": "new", "activities": []}),
+            lambda it: remove_day(it, rng.randrange(days)),
+            lambda it: lock_activity(it, rng.randrange(days), 0, "svc"),
+            lambda it: assoc_in(it, (rng.randrange(days), "title"), "renamed"),
+            lambda it: insert_in(it, (rng.randrange(days), "activities"), 0, {"title": "x"}),
+            lambda it: remove_in(it, (rng.randrange(days), "activities"), 0)[0]
+        ]
+        rng.choice(edits)(frozen)
+
+        assert source == snapshot
+        assert thaw(frozen) == frozen_snapshot
+
+
+def test_edits_share_untouched_days():
+    frozen = freeze(sample_itinerary())
+    edited = lock_activity(frozen, 2, 1, "svc-1")
+    assert changed_indices(frozen, edited) == [2]
+    assert all(edited[i] is frozen[i] for i in (0, 1, 3))
+    assert edited[2]["activities"][0] is frozen[2]["activities"][0]
+    assert edited[2]["activities"][1]["locked_service_id"] == "svc-1"
+    assert "locked" not in frozen[2]["activities"][1]
+
+
+def test_day_operations():
+    frozen = freeze(sample_itinerary())
+    assert [d["day"] for d in reorder_days(frozen, [3, 0, 9, 1])] == [4, 1, 2]
+
+    moved = move_activity(frozen, 0, 2, 1)
+    assert [a["title"] for a in moved[0]["activities"]] == ["a00", "a02"]
+    assert moved[2]["activities"][-1]["title"] == "a01"
+    assert move_activity(frozen, 0, 9, 0) is frozen
+
+    assert [d["day"] for d in insert_day(frozen, 1, {"day": 9, "activities": []})] == [1, 9, 2, 3, 4]
+    assert [d["day"] for d in remove_day(frozen, 0)] == [2, 3, 4]
+    assert changed_indices(frozen, remove_day(frozen, 3)) == []
+
+
+def test_update_in_returns_same_root_when_unchanged():
+    frozen = freeze(sample_itinerary())
+    assert update_in(frozen, (1, "activities"), lambda activities: activities) is frozen
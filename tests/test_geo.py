@@ -0,0 +1,136 @@
+"""
+Tests for the local gazetteer and haversine travel times
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from utils.geo import DEFAULT_TRAVEL_LOGISTICS, Gazetteer, get_gazetteer, haversine_matrix, road_minutes
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    """Three POIs on a meridian in one destination, one far away in another"""
+    path = tmp_path / "gazetteer.json"
+    path.write_text(json.dumps({
+        "road_factor": 1.5,
+        "destinations": {
+            "town": {"pois": [
+                {"name": "Town Square", "aliases": ["town centre"], "lat": 10.0, "lon": 76.0, "type": "city"},
+                {"name": "Town Market", "lat": 10.005, "lon": 76.0},
+                {"name": "Town Hill Fort", "aliases": ["fort"], "lat": 10.2, "lon": 76.0}
+            ]},
+            "coast": {"pois": [
+                {"name": "Coast Beach", "lat": 11.0, "lon": 76.0, "type": "beach"}
+            ]}
+        }
+    }))
+    return Gazetteer(str(path))
+
+
+def test_haversine_matrix_is_symmetric_with_zero_diagonal():
+    lat = np.asarray([0.0, 1.0, 0.0, 28.6139])
+    lon = np.asarray([0.0, 0.0, 1.0, 77.209])
+
+    distances = haversine_matrix(lat, lon)
+
+    assert np.allclose(distances, distances.T)
+    assert np.allclose(np.diag(distances), 0.0)
+    assert distances[0, 1] == pytest.approx(111.19, abs=0.01)  # one degree of latitude
+    assert distances[0, 2] == pytest.approx(111.19, abs=0.01)  # one degree of longitude at the equator
+
+
+def test_road_minutes_speed_bands():
+    minutes = road_minutes(np.asarray([0.0, 0.5, 10.0, 35.0, 100.0]))
+
+    assert minutes.tolist() == [0, 5, 30, 60, 120]
+
+
+@pytest.mark.parametrize("location, name", [
+    ("Town Square", "Town Square"),
+    ("lunch near the TOWN CENTRE", "Town Square"),
+    ("Sunset at Town Hill Fort", "Town Hill Fort"),   # longest name wins over "fort"
+    ("the old fort", "Town Hill Fort"),
+    ("town", "Town Square"),                          # destination key maps to its first POI
+])
+def test_resolve_names_aliases_and_free_text(gazetteer, location, name):
+    assert gazetteer.names[gazetteer.resolve(location)] == name
+
+
+def test_resolve_unknown_location(gazetteer):
+    assert gazetteer.resolve("Atlantis") is None
+    assert gazetteer.resolve("") is None
+
+
+def test_nearest_uses_grid_and_distance_limit(gazetteer):
+    assert gazetteer.names[gazetteer.nearest(10.004, 76.001)] == "Town Market"
+    assert gazetteer.names[gazetteer.nearest(10.95, 76.0, max_km=10)] == "Coast Beach"
+    assert gazetteer.nearest(12.0, 76.0, max_km=10) is None
+
+
+def test_travel_between_uses_cached_matrix_within_a_destination(gazetteer):
+    square, fort = gazetteer.resolve("Town Square"), gazetteer.resolve("Town Hill Fort")
+
+    road_km, minutes = gazetteer.travel_between(square, fort)
+
+    assert road_km == pytest.approx(0.2 * 111.19 * 1.5, rel=1e-3)
+    assert minutes == int(road_minutes(np.asarray([road_km]))[0])
+    assert gazetteer.travel_matrix("town") is gazetteer.travel_matrix("town")
+    assert gazetteer.travel_between(fort, square) == (road_km, minutes)
+
+
+def test_travel_between_destinations_is_computed_directly(gazetteer):
+    road_km, minutes = gazetteer.estimate_travel("Town Square", "Coast Beach")
+
+    assert road_km == pytest.approx(111.19 * 1.5, rel=1e-3)
+    assert minutes == 201  # ceil(166.8 km / 50 km/h)
+    assert gazetteer.estimate_travel("Town Square", "Atlantis") is None
+
+
+def test_minutes_matrix_mixes_known_and_unknown_locations(gazetteer):
+    square, market, beach = (gazetteer.resolve(name) for name in ("Town Square", "Town Market", "Coast Beach"))
+
+    local = gazetteer.minutes_matrix([square, None, market], unknown_minutes=15)
+    mixed = gazetteer.minutes_matrix([square, beach])
+
+    assert local.tolist() == [[0, 15, 5], [15, 0, 15], [5, 15, 0]]
+    assert mixed[0, 1] == mixed[1, 0] == 201
+
+
+def test_fill_travel_logistics(gazetteer):
+    activities = [
+        {"title": "Market stroll", "location": "Town Market"},
+        {"title": "Fort visit", "location": "Town Hill Fort"},
+        {"title": "Mystery stop", "location": "Atlantis"},
+        {"title": "Kept", "location": "Town Market", "travel_logistics": {"travel_time": "custom"}}
+    ]
+
+    gazetteer.fill_travel_logistics(activities, destination="Town")
+
+    walk, taxi, unknown, kept = (activity["travel_logistics"] for activity in activities)
+    assert walk["from_previous"] == "Town Square" and walk["transport_mode"] == "Walk" and walk["transport_cost"] == 0
+    assert taxi["from_previous"] == "Town Market" and taxi["transport_mode"] == "Taxi"
+    assert taxi["distance_km"] == pytest.approx(0.195 * 111.19 * 1.5, abs=0.1)
+    # Unresolved locations fall back to the destination centre
+    assert unknown["from_previous"] == "Town Hill Fort"
+    assert unknown["distance_km"] == pytest.approx(0.2 * 111.19 * 1.5, abs=0.1)
+    assert kept == {"travel_time": "custom"}
+
+
+def test_fill_travel_logistics_defaults_without_a_known_start(gazetteer):
+    activities = [{"title": "Mystery stop", "location": "Atlantis"}, {"title": "Market", "location": "Town Market"}]
+
+    gazetteer.fill_travel_logistics(activities)
+
+    assert activities[0]["travel_logistics"] == DEFAULT_TRAVEL_LOGISTICS
+    assert activities[1]["travel_logistics"] == DEFAULT_TRAVEL_LOGISTICS
+
+
+def test_shipped_gazetteer_resolves_real_places():
+    gazetteer = get_gazetteer()
+
+    assert gazetteer.names[gazetteer.resolve("Pickup from Dabolim Airport")] == "Goa International Airport"
+    road_km, minutes = gazetteer.estimate_travel("Baga Beach", "Calangute Beach")
+    assert 1 < road_km < 5 and 5 <= minutes <= 15
@@ -0,0 +1,121 @@
+"""
+Tests for the local intent classifier and when intake escalates to the LLM
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from agents.profile_intake_agent import ProfileIntakeAgent
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+from utils.intent_classifier import IntentClassifier
+
+
+@pytest.fixture(scope="module")
+def trained():
+    classifier = IntentClassifier()
+    classifier.train()
+    return classifier
+
+
+@pytest.fixture
+def classifier(trained, tmp_path):
+    classifier = IntentClassifier(log_path=str(tmp_path / "intents.jsonl"), max_log_bytes=200)
+    classifier.weights, classifier.bias = trained.weights, trained.bias
+    classifier.trained_examples = trained.trained_examples
+    return classifier
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("I want to plan a holiday in Kerala", "trip_planning"),
+    ("what is your name", "general"),
+    ("I like museums and quiet cafes", "profile_continuation")
+])
+def test_classifier_predicts_seed_like_messages(trained, message, intent):
+    prediction = trained.predict(message)
+
+    assert prediction["intent"] == intent
+    assert prediction["confident"]
+    assert sum(prediction["probabilities"].values()) == pytest.approx(1.0, abs=0.01)
+
+
+def test_confidence_gate_at_threshold(trained):
+    uncertain = trained.predict("hmm ok")
+    assert uncertain["confidence"] < 0.8 and not uncertain["confident"]
+
+    strict = IntentClassifier(confidence_threshold=0.95)
+    strict.weights, strict.bias, strict.trained_examples = trained.weights, trained.bias, trained.trained_examples
+    assert 0.8 <= strict.predict("what is your name")["confidence"] < 0.95
+    assert not strict.predict("what is your name")["confident"]
+
+
+def test_untrained_classifier_is_never_confident():
+    assert not IntentClassifier(confidence_threshold=0.0).predict("plan a trip to Goa")["confident"]
+
+
+def test_log_example_skips_unknown_intents_and_rotates(classifier):
+    classifier.log_example("book me a spa", "spa")
+    assert not os.path.exists(classifier.log_path)
+
+    for idx in range(6):
+        classifier.log_example(f"planning a week away number {idx}", "trip_planning")
+
+    with open(classifier.log_path) as f:
+        current = [json.loads(line)["text"] for line in f]
+    with open(classifier.backup_log_path) as f:
+        backup = [json.loads(line)["text"] for line in f]
+    assert current[-1] == "planning a week away number 5"
+    assert len(current) < 6 and backup
+    logged = [text for text, _ in classifier.load_examples() if text.startswith("planning a week away")]
+    assert logged == backup + current
+
+
+@pytest.fixture
+def agent(classifier, monkeypatch):
+    agent = ProfileIntakeAgent(ContextStore(), EventBus())
+    agent.intent_classifier = classifier
+    calls = []
+
+    async def llm_intent_analysis(message, profile, trip_details):
+        calls.append(message)
+        return agent.llm_result
+
+    monkeypatch.setattr(agent, "_llm_intent_analysis", llm_intent_analysis)
+    agent.llm_calls = calls
+    agent.llm_result = {"intent": "general", "confidence": 0.9, "extracted_info": {}}
+    return agent
+
+
+def analyze(agent, message):
+    return asyncio.run(agent._analyze_intent(message, {}, {}))
+
+
+def test_keyword_and_confident_classifier_results_skip_the_llm(agent):
+    assert analyze(agent, "I want to plan a trip to Goa")["intent"] == "trip_planning"
+    result = analyze(agent, "what is your name")
+
+    assert result["reasoning"] == "Local intent classifier"
+    assert agent.llm_calls == []
+
+
+def test_low_confidence_messages_go_to_the_llm_and_are_logged(agent):
+    result = analyze(agent, "hmm ok")
+
+    assert result["intent"] == "general"
+    assert agent.llm_calls == ["hmm ok"]
+    assert ("hmm ok", "general") in agent.intent_classifier.load_examples()
+
+
+def test_llm_results_below_threshold_or_without_intent_are_not_logged(agent):
+    agent.llm_result = {"confidence": 0.95, "extracted_info": {}}
+    assert analyze(agent, "hmm ok")["confidence"] == 0.95
+
+    agent.llm_result = {"intent": "general", "confidence": 0.7, "extracted_info": {}}
+    analyze(agent, "well then")
+
+    assert agent.llm_calls == ["hmm ok", "well then"]
+    texts = [text for text, _ in agent.intent_classifier.load_examples()]
+    assert "hmm ok" not in texts and "well then" not in texts
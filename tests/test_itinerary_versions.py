@@ -0,0 +1,37 @@
+"""
+Tests for server-held itinerary versions
+"""
+
+import pytest
+
+from utils.frozen_itinerary import FrozenDict
+from utils.itinerary_versions import ItineraryVersionStore, VersionConflictError
+
+
+def test_create_and_commit_advance_the_version():
+    store = ItineraryVersionStore()
+    record = store.create([{"day": 1}], session_id="s1")
+    assert record["version"] == 1
+    assert isinstance(record["itinerary"][0], FrozenDict)
+
+    committed = store.commit(record["itinerary_id"], 1, [{"day": 1}, {"day": 2}])
+    assert committed["version"] == 2 and committed["session_id"] == "s1"
+    assert store.get(record["itinerary_id"]) is committed
+    assert record["version"] == 1  # Earlier record is untouched
+
+
+def test_stale_version_is_rejected():
+    store = ItineraryVersionStore()
+    itinerary_id = store.create([])["itinerary_id"]
+    store.commit(itinerary_id, 1, [{"day": 1}])
+    with pytest.raises(VersionConflictError) as excinfo:
+        store.commit(itinerary_id, 1, [{"day": 2}])
+    assert excinfo.value.current_version == 2
+    assert store.get(itinerary_id)["itinerary"] == ({"day": 1},)
+
+
+def test_unknown_itinerary_raises_key_error():
+    store = ItineraryVersionStore()
+    assert store.get("missing") is None
+    with pytest.raises(KeyError):
+        store.commit("missing", 1, [])
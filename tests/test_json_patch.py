@@ -0,0 +1,100 @@
+"""
+Tests for RFC 6902 patches over frozen itineraries
+"""
+
+import random
+
+import pytest
+
+from utils.frozen_itinerary import freeze, thaw, assoc_in, insert_in, remove_in, reorder_days, move_activity
+from utils.json_patch import PatchError, apply_patch, make_patch, parse_pointer
+
+
+def sample_itinerary(rng, days=5):
+    return freeze([
+        {"day": d + 1, "title": f"Day {d + 1}",
+         "activities": [{"title": f"a{d}{i}", "cost": rng.randint(1, 9)} for i in range(rng.randint(0, 4))]}
+        for d in range(days)
+    ])
+
+
+def random_edit(rng, itinerary):
+    days = len(itinerary)
+    choice = rng.randrange(7)
+    if choice == 0 and days:
+        return reorder_days(itinerary, rng.sample(range(days), days))
+    if choice == 1 and days:
+        source = rng.randrange(days)
+        if itinerary[source]["activities"]:
+            return move_activity(itinerary, source, rng.randrange(days), 0)
+    if choice == 2 and days:
+        return remove_in(itinerary, (), rng.randrange(days))[0]
+    if choice == 3:
+        return insert_in(itinerary, (), rng.randint(0, days), {"day": 0, "title": "new", "activities": []})
+    if choice == 4 and days:
+        return assoc_in(itinerary, (rng.randrange(days), "title"), f"t{rng.random():.4f}")
+    if choice == 5 and days:
+        day = rng.randrange(days)
+        return assoc_in(itinerary, (day, "note"), True)
+    if choice == 6 and days:
+        day = rng.randrange(days)
+        if itinerary[day]["activities"]:
+            return remove_in(itinerary, (day, "activities"), rng.randrange(len(itinerary[day]["activities"])))[0]
+    return itinerary
+
+
+def test_round_trip_over_random_edit_sequences():
+    rng = random.Random(5)
+    for _ in range(500):
+        before = sample_itinerary(rng, days=rng.randint(0, 6))
+        after = before
+        for _ in range(rng.randint(1, 4)):
+            after = random_edit(rng, after)
+        patch = make_patch(before, after)
+        assert thaw(apply_patch(before, patch)) == thaw(after)
+
+
+def test_reorder_becomes_moves_and_removal_a_single_remove():
+    rng = random.Random(6)
+    before = sample_itinerary(rng, days=3)
+    assert {op["op"] for op in make_patch(before, reorder_days(before, [2, 0, 1]))} == {"move"}
+    assert make_patch(before, remove_in(before, (), 1)[0]) == [{"op": "remove", "path": "/1"}]
+    assert make_patch(before, before) == []
+
+
+def test_type_change_is_not_treated_as_equal():
+    assert make_patch(freeze({"a": 1}), freeze({"a": True})) == [{"op": "replace", "path": "/a", "value": True}]
+
+
+def test_operations_and_pointer_escaping():
+    doc = freeze({"a/b": {"m~n": [1, 2]}, "list": [1, 2, 3]})
+    patched = apply_patch(doc, [
+        {"op": "add", "path": "/a~1b/m~0n/-", "value": 3},
+        {"op": "replace", "path": "/list/0", "value": 9},
+        {"op": "move", "from": "/list/2", "path": "/list/0"},
+        {"op": "copy", "from": "/list", "path": "/copied"},
+        {"op": "remove", "path": "/list/1"},
+        {"op": "test", "path": "/copied/0", "value": 3}
+    ])
+    assert thaw(patched) == {"a/b": {"m~n": [1, 2, 3]}, "list": [3, 2], "copied": [3, 9, 2]}
+    assert parse_pointer("/a~1b/m~0n") == ["a/b", "m~n"]
+
+
+def test_failed_patch_leaves_input_untouched():
+    doc = freeze({"list": [1, 2]})
+    with pytest.raises(PatchError):
+        apply_patch(doc, [{"op": "remove", "path": "/list/0"}, {"op": "test", "path": "/list/0", "value": 1}])
+    assert thaw(doc) == {"list": [1, 2]}
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "remove", "path": ""},
+    {"op": "replace", "path": "/list/5", "value": 1},
+    {"op": "add", "path": "/list/01", "value": 1},
+    {"op": "move", "from": "/list", "path": "/list/0"},
+    {"op": "bogus", "path": "/list"},
+    {"op": "add", "value": 1}
+])
+def test_invalid_operations_raise_patch_error(operation):
+    with pytest.raises(PatchError):
+        apply_patch(freeze({"list": [1, 2]}), [operation])
@@ -0,0 +1,85 @@
+"""
+Tests for the compiled keyword matcher
+"""
+
+import pytest
+
+from utils.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return get_keyword_matcher()
+
+
+@pytest.mark.parametrize("message", [
+    "Is this place good in winter?",
+    "Which city has the best food?",
+    "Show me something historic",
+    "I'd like a ship cruise",
+    "They checked the highway",
+])
+def test_greetings_match_whole_words_only(matcher, message):
+    assert matcher.match(message).best("intent") != "greeting"
+    assert not matcher.match(message).has("query_type", "greeting")
+
+
+@pytest.mark.parametrize("message", ["Hi there", "hey, can you help?", "Good morning!", "HELLO"])
+def test_greetings_match(matcher, message):
+    assert matcher.match(message).best("intent") == "greeting"
+
+
+@pytest.mark.parametrize("message, category, label", [
+    ("We love relaxing by the water", "travel_style", "relaxation"),
+    ("An adventurous week please", "travel_style", "adventurous"),
+    ("Historical forts and museums", "travel_style", "cultural"),
+    ("Looking for cheaper options", "budget_preference", "budget"),
+    ("Something affordable", "budget_preference", "budget"),
+    ("Luxurious villas only", "budget_preference", "luxury"),
+    ("Where are we staying?", "intent", "accommodation"),
+    ("Compare these hotels", "intent", "accommodation"),
+    ("Recommended beaches", "query_type", "destination_suggestion"),
+])
+def test_stems_match_inflected_forms(matcher, message, category, label):
+    assert matcher.match(message).has(category, label)
+
+
+def test_exact_phrases_do_not_match_inflections(matcher):
+    assert not matcher.match("The spaceship exhibit").has("travel_style", "relaxation")
+    assert matcher.match("Two spas nearby").has("travel_style", "relaxation")
+
+
+def test_destinations_keep_message_order(matcher):
+    matches = matcher.match("Torn between Kerala, Goa and kerala again, or maybe Leh")
+
+    assert matches.labels("destination") == ["Kerala", "Goa", "Ladakh"]
+    assert matches.first("destination") == "Kerala"
+
+
+def test_longest_phrase_wins(matcher):
+    matches = matcher.match("Flying into New Delhi, then the Andaman Islands")
+
+    assert matches.labels("destination") == ["Delhi", "Andaman Islands"]
+
+
+def test_best_uses_vocabulary_priority_not_message_order(matcher):
+    matches = matcher.match("Need a hotel, and I want to visit Goa")
+
+    assert matches.labels("intent") == ["accommodation", "trip_planning"]
+    assert matches.best("intent") == "trip_planning"
+
+
+def test_one_phrase_feeds_every_category_it_belongs_to():
+    matcher = KeywordMatcher({"a": {"x": ["resort*"]}, "b": {"y": ["resort*"]}})
+
+    matches = matcher.match("beach resorts")
+
+    assert matches.first("a") == "x" and matches.first("b") == "y"
+    assert matches.first("c") is None and matches.best("c") is None
+
+
+def test_vocabulary_without_stems_matches_only_its_phrases():
+    matcher = KeywordMatcher({"a": {"x": ["goa"]}})
+
+    assert matcher.match("beaches of goa").labels("a") == ["x"]
+    assert matcher.match("beaches of kerala").labels("a") == []
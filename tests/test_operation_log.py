@@ -0,0 +1,97 @@
+"""
+Tests for the undo/redo operation log
+"""
+
+from utils.frozen_itinerary import assoc_in, freeze, thaw
+from utils.json_patch import make_patch
+from utils.operation_log import OperationLog, OperationLogStore
+
+
+def build_log(edits, snapshot_interval=3, max_records=100):
+    """Log `edits` renames of day 0; returns the log and every state by version"""
+    state = freeze([{"day": 1, "title": "v1"}])
+    states = {1: state}
+    log = OperationLog(state, 1, snapshot_interval=snapshot_interval, max_records=max_records)
+    for version in range(2, edits + 2):
+        after = assoc_in(state, (0, "title"), f"v{version}")
+        log.append("rename", {"title": f"v{version}"}, make_patch(state, after), after, version)
+        states[version] = state = after
+    return log, states
+
+
+def test_state_at_version_across_snapshot_boundaries():
+    log, states = build_log(10)
+    assert sorted(log.snapshots) == [0, 3, 6, 9]
+    for version, state in states.items():
+        assert thaw(log.state_at_version(version)) == thaw(state)
+
+
+def test_state_at_version_after_trimming():
+    log, states = build_log(20, snapshot_interval=4, max_records=8)
+    assert len(log.records) <= 8
+    assert log.base > 0 and log.base in log.snapshots
+    kept = [version for version in states if log.state_at_version(version) is not None]
+    assert kept == list(range(log.base + 1, 22))
+    for version in kept:
+        assert thaw(log.state_at_version(version)) == thaw(states[version])
+    assert log.state_at_version(1) is None
+
+
+def test_undo_redo_round_trip():
+    log, states = build_log(4)
+    assert not log.can_redo
+    assert thaw(log.undo(6)) == thaw(states[4])
+    assert thaw(log.undo(7)) == thaw(states[3])
+    assert log.version == 7
+    assert log.can_redo
+    assert thaw(log.redo(8)) == thaw(states[4])
+    assert thaw(log.redo(9)) == thaw(states[5])
+    assert log.redo(10) is None
+
+
+def test_undo_stops_at_the_oldest_state():
+    log, states = build_log(1)
+    assert thaw(log.undo(3)) == thaw(states[1])
+    assert log.undo(4) is None
+    assert not log.can_undo
+
+
+def test_new_edit_after_undo_truncates_redo_history():
+    log, states = build_log(6)
+    for version in (8, 9, 10):
+        log.undo(version)
+    undone_state = log.state_at(log.cursor)
+    assert log.cursor == 3 and log.can_redo
+
+    after = assoc_in(undone_state, (0, "title"), "branch")
+    log.append("rename", {"title": "branch"}, make_patch(undone_state, after), after, 11)
+
+    assert not log.can_redo
+    assert log.redo(12) is None
+    assert len(log.records) == 4
+    assert [entry["undone"] for entry in log.history()] == [False] * 4
+    assert thaw(log.state_at_version(11)) == thaw(after)
+    # States only reachable through the dropped branch are gone
+    assert log.state_at_version(6) is None and log.state_at_version(7) is None
+    assert all(position <= log.cursor for position in log.snapshots)
+
+
+def test_store_restarts_log_when_versions_do_not_line_up():
+    store = OperationLogStore(snapshot_interval=2)
+    before = freeze([{"title": "a"}])
+    after = assoc_in(before, (0, "title"), "b")
+    store.record("it-1", before, 1, "rename", None, make_patch(before, after), after, 2)
+    log = store.get("it-1")
+    assert log.cursor == 1
+
+    # Same log continues from the current version
+    later = assoc_in(after, (0, "title"), "c")
+    store.record("it-1", after, 2, "rename", None, make_patch(after, later), later, 3)
+    assert store.get("it-1") is log and log.cursor == 2
+
+    # An edit from an unknown version starts over
+    store.record("it-1", before, 7, "rename", None, make_patch(before, after), after, 8)
+    restarted = store.get("it-1")
+    assert restarted is not log and restarted.cursor == 1
+    assert thaw(restarted.state_at_version(7)) == thaw(before)
+    assert store.get("other") is None
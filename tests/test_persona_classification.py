@@ -0,0 +1,242 @@
+"""
+Tests for vectorized persona scoring, LLM gating and the classification cache
+"""
+
+import asyncio
+import random
+
+import pytest
+
+import utils.cache
+from agents.persona_classification_agent import PersonaClassificationAgent
+from models.schemas import PersonaType
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+from utils.persona_scoring import SCORED_PERSONAS
+
+
+def per_profile_rules(profile_data, trip_details):
+    """The original one-profile-at-a-time rules, kept as the reference for the vectorized scorer"""
+    scores = {persona: 0 for persona in SCORED_PERSONAS}
+
+    vacation_style = profile_data.get('vacation_style', '')
+    if vacation_style == 'adventurous':
+        scores[PersonaType.ADVENTURER] += 3
+    elif vacation_style == 'relaxing':
+        scores[PersonaType.LUXURY_CONNOISSEUR] += 2
+    elif vacation_style == 'balanced':
+        scores[PersonaType.CULTURAL_EXPLORER] += 2
+
+    experience_type = profile_data.get('experience_type', '')
+    if experience_type == 'nature':
+        scores[PersonaType.ADVENTURER] += 2
+        scores[PersonaType.ECO_CONSCIOUS] += 2
+    elif experience_type == 'culture':
+        scores[PersonaType.CULTURAL_EXPLORER] += 3
+
+    attraction_pref = profile_data.get('attraction_preference', '')
+    if attraction_pref == 'local':
+        scores[PersonaType.CULTURAL_EXPLORER] += 2
+        scores[PersonaType.BUDGET_BACKPACKER] += 1
+    elif attraction_pref == 'popular':
+        scores[PersonaType.LUXURY_CONNOISSEUR] += 1
+
+    accommodations = profile_data.get('accommodation', [])
+    if 'luxury_hotels' in accommodations:
+        scores[PersonaType.LUXURY_CONNOISSEUR] += 3
+    if 'budget_hotels' in accommodations or 'hostels' in accommodations:
+        scores[PersonaType.BUDGET_BACKPACKER] += 3
+    if 'boutique_hotels' in accommodations or 'bnb' in accommodations:
+        scores[PersonaType.CULTURAL_EXPLORER] += 2
+
+    interests = profile_data.get('interests', [])
+    for interest, contributions in (
+        ('hiking', {PersonaType.ADVENTURER: 2, PersonaType.ECO_CONSCIOUS: 1}),
+        ('museums', {PersonaType.CULTURAL_EXPLORER: 2}),
+        ('nightlife', {PersonaType.ADVENTURER: 1}),
+        ('shopping', {PersonaType.LUXURY_CONNOISSEUR: 1}),
+        ('food', {PersonaType.CULTURAL_EXPLORER: 1})
+    ):
+        if interest in interests:
+            for persona, points in contributions.items():
+                scores[persona] += points
+
+    budget = trip_details.get('budget_per_night', 0)
+    if budget > 15000:
+        scores[PersonaType.LUXURY_CONNOISSEUR] += 3
+    elif budget < 5000:
+        scores[PersonaType.BUDGET_BACKPACKER] += 3
+    else:
+        scores[PersonaType.CULTURAL_EXPLORER] += 1
+
+    if trip_details.get('children', 0) > 0:
+        scores[PersonaType.FAMILY_ORIENTED] += 4
+
+    primary = max(scores, key=scores.get)
+    secondary = [f"secondary_{persona.value}" for persona, score in
+                 sorted(scores.items(), key=lambda item: item[1], reverse=True)[1:3] if score > 2]
+
+    propensity = {PersonaType.LUXURY_CONNOISSEUR: 0.9, PersonaType.BUDGET_BACKPACKER: 0.2, PersonaType.ADVENTURER: 0.7,
+                  PersonaType.CULTURAL_EXPLORER: 0.6}.get(primary, 0.5)
+    propensity += 0.2 if budget > 15000 else -0.2 if budget < 5000 else 0.0
+    propensity += 0.1 if 'luxury_hotels' in accommodations else -0.1 if 'hostels' in accommodations else 0.0
+
+    return {
+        "persona_type": primary.value,
+        "persona_scores": {persona.value: score for persona, score in scores.items()},
+        "secondary": secondary,
+        "confidence": min(scores[primary] / 10.0, 1.0),
+        "propensity_to_pay": min(max(propensity, 0.1), 1.0)
+    }
+
+
+def random_profile(rng):
+    profile = {
+        "vacation_style": rng.choice(["adventurous", "relaxing", "balanced", ""]),
+        "experience_type": rng.choice(["nature", "culture", ""]),
+        "attraction_preference": rng.choice(["local", "popular", ""]),
+        "accommodation": rng.sample(["luxury_hotels", "budget_hotels", "hostels", "boutique_hotels", "bnb"], rng.randint(0, 3)),
+        "interests": rng.sample(["hiking", "museums", "nightlife", "shopping", "food", "yoga"], rng.randint(0, 4))
+    }
+    trip = {"budget_per_night": rng.choice([0, 3000, 5000, 10000, 15000, 15001, 30000]), "children": rng.choice([0, 0, 1, 2])}
+    return profile, trip
+
+
+@pytest.fixture
+def agent():
+    return PersonaClassificationAgent(ContextStore(), EventBus())
+
+
+def test_vectorized_scores_match_per_profile_rules(agent):
+    rng = random.Random(7)
+    pairs = [random_profile(rng) for _ in range(500)]
+
+    results = agent.classify_batch(pairs, include_reasoning=False)
+
+    for (profile, trip), result in zip(pairs, results):
+        expected = per_profile_rules(profile, trip)
+        assert result["persona_type"] == expected["persona_type"]
+        assert result["persona_scores"] == expected["persona_scores"]
+        assert [tag for tag in result["persona_tags"] if tag.startswith("secondary_")] == expected["secondary"]
+        assert result["confidence"] == pytest.approx(expected["confidence"], abs=1e-3)
+        assert result["propensity_to_pay"] == pytest.approx(expected["propensity_to_pay"], abs=1e-3)
+
+
+def test_empty_batch_and_missing_fields(agent):
+    assert agent.classify_batch([]) == []
+    result = agent.classify_batch([({}, {})])[0]
+    assert result["persona_type"] == PersonaType.BUDGET_BACKPACKER.value  # no budget counts as low
+    assert result["score_margin"] == 3
+
+
+# Clear winner: adventurer 3 + 2 + 2 = 7 against eco-conscious 3 (margin 4)
+CLEAR_PROFILE = ({"vacation_style": "adventurous", "experience_type": "nature", "interests": ["hiking"]},
+                 {"budget_per_night": 8000})
+# Close call: cultural explorer 2 + 1 = 3 against luxury connoisseur 2 (margin 1)
+CLOSE_PROFILE = ({"vacation_style": "balanced", "attraction_preference": "popular", "interests": ["shopping"]},
+                 {"budget_per_night": 8000})
+LLM_RESULT = {"persona_type": "balanced_traveler", "persona_tags": ["balanced_traveler"], "confidence": 0.8,
+              "propensity_to_pay": 0.6, "reasoning": "LLM"}
+
+
+def stub_llm(agent, monkeypatch, result=LLM_RESULT):
+    calls = []
+
+    async def classify_with_llm(session_id, profile_data, trip_details, rule_based):
+        calls.append(rule_based["score_margin"])
+        return dict(result) if result is not None else None
+
+    monkeypatch.setattr(agent, "_classify_with_llm", classify_with_llm)
+    return calls
+
+
+def classify(agent, pair, session_id="s1"):
+    return asyncio.run(agent.classify_persona(session_id, *pair))
+
+
+def test_llm_is_consulted_only_for_close_calls(agent, monkeypatch):
+    calls = stub_llm(agent, monkeypatch)
+
+    clear = classify(agent, CLEAR_PROFILE)
+    close = classify(agent, CLOSE_PROFILE)
+
+    assert clear["persona_type"] == "adventurer" and clear["score_margin"] >= agent.llm_margin_threshold
+    assert close["persona_type"] == "balanced_traveler"
+    assert calls == [1]
+
+
+def test_margin_threshold_is_configurable(agent, monkeypatch):
+    calls = stub_llm(agent, monkeypatch)
+    agent.llm_margin_threshold = 5
+
+    classify(agent, CLEAR_PROFILE)
+
+    assert calls == [4]
+
+
+def test_fingerprint_ignores_list_order_and_unrelated_fields(agent, monkeypatch):
+    calls = stub_llm(agent, monkeypatch)
+    profile, trip = CLOSE_PROFILE
+    reordered = ({**profile, "interests": ["shopping"], "accommodation": None, "name": "Asha"}, dict(trip))
+
+    first = classify(agent, ({**profile, "interests": ["nightlife", "shopping"]}, trip), "s1")
+    second = classify(agent, ({**profile, "interests": ["shopping", "nightlife"]}, trip), "s2")
+
+    assert first == second
+    assert calls == [1]
+    assert agent._profile_fingerprint(*CLOSE_PROFILE) == agent._profile_fingerprint(*reordered)
+    assert agent._profile_fingerprint(*CLOSE_PROFILE) != agent._profile_fingerprint(profile, {**trip, "children": 1})
+
+
+def test_cached_results_are_copies(agent, monkeypatch):
+    stub_llm(agent, monkeypatch)
+
+    classify(agent, CLEAR_PROFILE)["persona_tags"].append("edited")
+
+    assert "edited" not in classify(agent, CLEAR_PROFILE)["persona_tags"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(utils.cache, "time", fake)
+    return fake
+
+
+def test_failed_llm_result_is_cached_only_for_fallback_ttl(agent, monkeypatch, clock):
+    calls = stub_llm(agent, monkeypatch, result=None)
+
+    fallback = classify(agent, CLOSE_PROFILE)
+    clock.now += agent.fallback_cache_ttl - 1
+    assert classify(agent, CLOSE_PROFILE) == fallback
+    assert calls == [1]
+
+    clock.now += 2
+    assert classify(agent, CLOSE_PROFILE)["persona_type"] == "cultural_explorer"
+    assert calls == [1, 1]
+
+
+def test_successful_llm_result_uses_full_ttl(agent, monkeypatch, clock):
+    calls = stub_llm(agent, monkeypatch)
+
+    classify(agent, CLOSE_PROFILE)
+    clock.now += agent.fallback_cache_ttl + 1
+    classify(agent, CLOSE_PROFILE)
+    assert calls == [1]
+
+    clock.now += agent.result_cache.ttl
+    classify(agent, CLOSE_PROFILE)
+    assert calls == [1, 1]
+
+
+def test_unreachable_llm_falls_back_to_rules(agent):
+    # The offline LLM client raises, so the close call resolves to the rule-based persona
+    assert classify(agent, CLOSE_PROFILE)["persona_type"] == "cultural_explorer"
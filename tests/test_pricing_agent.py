@@ -0,0 +1,66 @@
+"""
+Tests for variant pricing on API models and internal itinerary data
+"""
+
+import asyncio
+import copy
+
+import pytest
+
+from agents.pricing_agent import PricingAgent
+from models.schemas import ItineraryVariant
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+
+
+def activity(idx, cost):
+    return {
+        "id": f"act-{idx}", "name": f"Activity {idx}", "type": "sightseeing", "time": "9:00 AM",
+        "duration": "2 hours", "location": "Panaji", "description": "Walk", "cost": cost
+    }
+
+
+VARIANT = {
+    "id": "var-1", "type": "balanced", "title": "Goa", "description": "Two days in Goa", "days": 2,
+    "total_cost": 3500.0,
+    "daily_itinerary": [
+        {"day": 1, "date": "2026-12-01", "theme": "Beaches", "total_cost": 1500.0,
+         "activities": [activity(1, 1000.0), activity(2, 500.0)]},
+        {"day": 2, "date": "2026-12-02", "theme": "Forts", "total_cost": 2000.0,
+         "activities": [activity(3, 2000.0)]}
+    ],
+    "highlights": ["Beaches"], "persona_match": 0.8, "sustainability_score": 0.5,
+    "total_activities": 3, "activity_types": ["sightseeing"]
+}
+
+# Goa is a high-demand destination: 15% markup x 10% demand premium, no dates so no season/urgency factors
+MULTIPLIER = 1.15 * 1.1
+
+
+@pytest.fixture
+def agent():
+    agent = PricingAgent(ContextStore(), EventBus())
+    agent.context_store.set_trip_details("s1", {"destination": "Goa", "adults": 2})
+    return agent
+
+
+def test_apply_pricing_prices_api_variants(agent):
+    variants = asyncio.run(agent.apply_pricing("s1", [ItineraryVariant(**copy.deepcopy(VARIANT))]))
+
+    variant = variants[0]
+    assert isinstance(variant, ItineraryVariant)
+    assert [a.cost for a in variant.daily_itinerary[0].activities] == [round(1000 * MULTIPLIER, 2), round(500 * MULTIPLIER, 2)]
+    assert variant.daily_itinerary[0].total_cost == pytest.approx(1500 * MULTIPLIER)
+    assert variant.total_cost == pytest.approx(3500 * MULTIPLIER)
+
+
+def test_update_pricing_prices_stored_itinerary_like_apply_pricing(agent):
+    agent.context_store.add_itinerary("s1", "var-1", copy.deepcopy(VARIANT))
+
+    response = asyncio.run(agent.update_pricing("s1", "var-1"))
+    variants = asyncio.run(agent.apply_pricing("s1", [ItineraryVariant(**copy.deepcopy(VARIANT))]))
+
+    assert response.updated_pricing["total_cost"] == pytest.approx(variants[0].total_cost)
+    assert response.price_breakdown["total_cost"] == pytest.approx(3500 * MULTIPLIER)
+    stored = agent.context_store.get_itinerary("s1", "var-1")
+    assert stored["daily_itinerary"][1]["activities"][0]["cost"] == variants[0].daily_itinerary[1].activities[0].cost
@@ -0,0 +1,173 @@
+"""
+Tests for booking provider adapters against the local mock provider server
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from agents.external_booking_agent import ExternalBookingAgent
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+from utils.provider_adapters import KlookAdapter, MockProviderServer, ProviderError, TokenBucket, ViatorAdapter
+
+BOOKING = {
+    "activity_id": "act-1",
+    "activity_name": "Spice plantation visit",
+    "destination": "Goa",
+    "activity_type": "nature",
+    "travel_date": "2026-12-01",
+    "travelers": 3
+}
+
+
+def make_adapter(server, adapter_class=ViatorAdapter, **kwargs):
+    return adapter_class(api_key="test-key", transport=server.transport, **kwargs)
+
+
+def run(coroutine_factory):
+    """Run an adapter call and close its client on the same loop"""
+    async def main():
+        adapter, call = coroutine_factory()
+        try:
+            return await call
+        finally:
+            await adapter.aclose()
+    return asyncio.run(main())
+
+
+def test_availability_and_booking_through_mock_server():
+    server = MockProviderServer()
+    adapter = make_adapter(server)
+
+    async def main():
+        availability = await adapter.check_availability(BOOKING)
+        booking = await adapter.book(BOOKING)
+        await adapter.aclose()
+        return availability, booking
+
+    availability, booking = asyncio.run(main())
+    assert availability["name"] == "Viator" and availability["booking_method"] == "api"
+    assert availability["price"] == round(3000 * 3 * 1.2)
+    assert booking["status"] == "confirmed" and booking["reference"].startswith("VIA-")
+    assert [request.url.path for request in server.requests] == ["/partner/products/search", "/partner/bookings/book"]
+    assert server.requests[0].headers["Authorization"] == "Bearer test-key"
+
+
+def test_unavailable_listing_returns_none():
+    server = MockProviderServer(inventory={"viator": {"available": False}})
+    adapter = make_adapter(server)
+    assert run(lambda: (adapter, adapter.check_availability(BOOKING))) is None
+
+
+def test_transient_failures_are_retried():
+    server = MockProviderServer(failures=[503, 429])
+    adapter = make_adapter(server, backoff_base=0.01)
+    availability = run(lambda: (adapter, adapter.check_availability(BOOKING)))
+    assert availability["name"] == "Viator"
+    assert len(server.requests) == 3
+
+
+def test_client_errors_are_not_retried():
+    server = MockProviderServer(failures=[400])
+    adapter = make_adapter(server, backoff_base=0.01)
+    with pytest.raises(ProviderError):
+        run(lambda: (adapter, adapter.check_availability(BOOKING)))
+    assert len(server.requests) == 1
+
+
+def test_retries_stay_within_the_budget():
+    server = MockProviderServer(failures=[503] * 20)
+    adapter = make_adapter(server, max_retries=10, backoff_base=0.2, backoff_max=0.2)
+    started = time.perf_counter()
+    with pytest.raises(ProviderError, match="attempts"):
+        run(lambda: (adapter, adapter.check_availability(BOOKING, budget=0.5)))
+    # Budget plus event loop start-up; ten unbudgeted retries would take about 2s
+    assert time.perf_counter() - started < 0.75
+    assert 1 <= len(server.requests) < 11
+
+
+def test_backoff_is_jittered_and_capped():
+    adapter = ViatorAdapter(backoff_base=0.2, backoff_max=1.0)
+    for attempt in range(6):
+        delays = [adapter._backoff(attempt) for _ in range(50)]
+        assert all(0 <= delay <= min(1.0, 0.2 * 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 1
+    assert adapter._backoff(0, retry_after="0.4") == 0.4
+    assert adapter._backoff(0, retry_after="30") == 1.0
+
+
+def test_token_bucket_enforces_rate():
+    async def main():
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.perf_counter()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.perf_counter() - started
+
+    # Two tokens are available at once, the other four arrive at 20 per second
+    assert 0.18 <= asyncio.run(main()) < 0.5
+
+
+def test_adapter_requests_are_rate_limited():
+    server = MockProviderServer()
+    adapter = make_adapter(server, rate_limit=10)
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*(adapter.check_availability(BOOKING) for _ in range(15)))
+        await adapter.aclose()
+        return time.perf_counter() - started
+
+    # Capacity 10, then 10 per second for the remaining 5
+    assert asyncio.run(main()) >= 0.45
+    assert len(server.requests) == 15
+
+
+def test_book_batch_is_one_call_with_results_in_item_order():
+    server = MockProviderServer()
+    server.sold_out.add("act-2")
+    adapter = make_adapter(server, KlookAdapter)
+    items = [{**BOOKING, "activity_id": f"act-{idx}"} for idx in range(1, 4)]
+    results = run(lambda: (adapter, adapter.book_batch(items)))
+    assert [result["status"] for result in results] == ["confirmed", "failed", "confirmed"]
+    assert len(server.requests) == 1 and server.requests[0].url.path == "/v1/orders/batch"
+
+
+def test_book_batch_reports_missing_results():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"results": [{"reference": "VIA-1"}]}))
+    adapter = ViatorAdapter(transport=transport)
+    results = run(lambda: (adapter, adapter.book_batch([BOOKING, {**BOOKING, "activity_id": "act-2"}])))
+    assert results[0]["status"] == "confirmed" and results[0]["reference"] == "VIA-1"
+    assert results[1]["status"] == "error"
+
+
+def test_mock_env_enables_every_adapter(monkeypatch):
+    monkeypatch.setenv("BOOKING_PROVIDER_MOCK", "1")
+    agent = ExternalBookingAgent(ContextStore(), EventBus())
+    agent.providers["local_partners"]["enabled"] = False
+    assert sorted(agent.adapters) == ["getyourguide", "klook", "viator"]
+
+    async def main():
+        providers = await agent._get_available_providers(BOOKING["activity_id"], BOOKING)
+        await agent.aclose()
+        return providers
+
+    providers = asyncio.run(main())
+    assert sorted(p["name"] for p in providers) == ["Getyourguide", "Klook", "Viator"]
+    assert len(agent.mock_server.requests) == 3
+    assert all(adapter._client is None for adapter in agent.adapters.values())
+
+
+def test_server_shutdown_closes_pooled_clients(monkeypatch):
+    from fastapi.testclient import TestClient
+    import server
+
+    adapter = make_adapter(MockProviderServer())
+    monkeypatch.setattr(server.booking_agent, "adapters", {"viator": adapter})
+    assert adapter.client is not None
+    with TestClient(server.app):
+        pass
+    assert adapter._client is None
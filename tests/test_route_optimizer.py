@@ -0,0 +1,98 @@
+"""
+Tests for the day route optimizer
+"""
+
+import random
+
+from utils.conflict_engine import parse_clock_time, parse_duration_minutes
+from utils.route_optimizer import get_route_optimizer
+
+GOA_POIS = ["Baga Beach", "Palolem Beach", "Calangute Beach", "Colva Beach", "Anjuna Beach",
+            "Margao", "Chapora Fort", "Dudhsagar Falls", "Fort Aguada", "Basilica of Bom Jesus"]
+
+
+def format_clock(minutes):
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def random_day(rng):
+    start = 8 * 60
+    activities = []
+    for idx in range(rng.randint(2, 6)):
+        duration = rng.choice([30, 60, 90, 120, 180])
+        activities.append({
+            "title": f"Visit {idx}",
+            "location": rng.choice(GOA_POIS),
+            "time": format_clock(start),
+            "duration": f"{duration // 60} hours {duration % 60} minutes"
+        })
+        start += rng.choice([60, 90, 120, 180])
+    return activities
+
+
+def overlaps(activities):
+    count = 0
+    for current, following in zip(activities, activities[1:]):
+        start, next_start = parse_clock_time(current["time"]), parse_clock_time(following["time"])
+        if start >= 0 and next_start >= 0 and start + parse_duration_minutes(current["duration"]) > next_start:
+            count += 1
+    return count
+
+
+def test_reordering_never_adds_overlaps():
+    rng = random.Random(7)
+    optimizer = get_route_optimizer()
+    reordered = 0
+    for _ in range(300):
+        day = random_day(rng)
+        result = optimizer.optimize_day(day, "goa", time_budget_ms=50)
+        assert overlaps(result["activities"]) <= overlaps(day)
+        assert result["optimized_travel_minutes"] <= result["original_travel_minutes"]
+        assert sorted(a["title"] for a in result["activities"]) == sorted(a["title"] for a in day)
+        assert [a["time"] for a in result["activities"]] == [a["time"] for a in day]
+        reordered += result["reordered"]
+    assert reordered > 0
+
+
+def test_long_activity_is_not_moved_into_a_short_slot():
+    day = [
+        {"title": "Beach walk", "location": "Palolem Beach", "time": "9:00 AM", "duration": "1 hour"},
+        {"title": "Fort visit", "location": "Baga Beach", "time": "10:00 AM", "duration": "4 hours"},
+        {"title": "Market", "location": "Colva Beach", "time": "2:00 PM", "duration": "1 hour"}
+    ]
+    result = get_route_optimizer().optimize_day(day, "goa", time_budget_ms=50)
+    fort = next(a for a in result["activities"] if a["title"] == "Fort visit")
+    assert fort["time"] in ("10:00 AM", "2:00 PM")
+    assert overlaps(result["activities"]) == 0
+
+
+def test_locked_activities_keep_their_position():
+    rng = random.Random(8)
+    optimizer = get_route_optimizer()
+    for _ in range(100):
+        day = random_day(rng)
+        locked = rng.randrange(len(day))
+        day[locked]["locked"] = True
+        result = optimizer.optimize_day(day, "goa", time_budget_ms=50)
+        assert result["activities"][locked]["title"] == day[locked]["title"]
+        assert result["order"][locked] == locked
+
+
+def test_meal_stays_inside_its_window():
+    day = [
+        {"title": "Lunch at shack", "location": "Palolem Beach", "time": "12:00 PM", "duration": "1 hour"},
+        {"title": "Fort visit", "location": "Fort Aguada", "time": "6:00 PM", "duration": "1 hour"},
+        {"title": "Beach", "location": "Calangute Beach", "time": "8:00 PM", "duration": "1 hour"}
+    ]
+    result = get_route_optimizer().optimize_day(day, "goa", time_budget_ms=50)
+    lunch = next(a for a in result["activities"] if a["title"] == "Lunch at shack")
+    assert lunch["time"] == "12:00 PM"
+
+
+def test_input_activities_are_not_modified():
+    rng = random.Random(9)
+    day = random_day(rng)
+    snapshot = [dict(activity) for activity in day]
+    get_route_optimizer().optimize_day(day, "goa", time_budget_ms=50)
+    assert day == snapshot
@@ -0,0 +1,89 @@
+"""
+Tests for the precomputed (destination, month) seasonality table
+"""
+
+import pytest
+
+from utils.seasonality import SEASONAL_DATA, SeasonalityTable, get_seasonality_table, parse_travel_date
+
+
+@pytest.fixture(scope="module")
+def table():
+    return SeasonalityTable()
+
+
+def test_every_destination_and_month_has_a_row(table):
+    for dest_key in list(SEASONAL_DATA) + [None]:
+        for month in range(1, 13):
+            row = table.lookup(dest_key, month)
+            assert row["destination"] == dest_key and row["month"] == month
+
+
+@pytest.mark.parametrize("destination, month, season_type", [
+    ("goa", 12, "peak"),
+    ("goa", 1, "peak"),        # cross-year peak (Dec-Jan)
+    ("goa", 7, "monsoon"),
+    ("goa", 2, "ideal"),       # cross-year best weather (Nov-Mar)
+    ("goa", 4, "normal"),
+    ("manali", 5, "peak"),     # first of two peak ranges
+    ("manali", 12, "peak"),    # second, cross-year
+    ("manali", 3, "ideal"),
+    ("kerala", 12, "peak"),    # peak wins over best weather
+])
+def test_season_type_follows_range_priority(table, destination, month, season_type):
+    assert table.lookup(destination, month)["season_type"] == season_type
+
+
+def test_events_are_listed_for_each_month_they_span(table):
+    assert [event["name"] for event in table.lookup("kerala", 8)["events"]] == [
+        "onam", "nehru_trophy_boat_race", "monsoon_ayurveda_season"
+    ]
+    assert "onam" in [event["name"] for event in table.lookup("kerala", 9)["events"]]
+    assert table.lookup("kerala", 11)["events"] == []
+
+
+def test_pricing_and_demand_columns_come_from_month_tables(table):
+    assert table.lookup("goa", 12)["pricing_season"] == "peak"
+    assert table.lookup("goa", 7)["demand_level"] == "low"
+    assert table.lookup("Atlantis", 3)["pricing_season"] == table.lookup(None, 3)["pricing_season"] == "high"
+
+
+@pytest.mark.parametrize("destination, dest_key", [
+    ("Goa", "goa"),
+    ("  BAGA ", "goa"),
+    ("Jaipur, Rajasthan, India", "rajasthan"),
+    ("Port-Blair", "andaman"),
+    ("a week in new delhi", "delhi"),
+    ("Atlantis", None),
+    ("", None),
+])
+def test_resolve_destination_names_aliases_and_free_text(table, destination, dest_key):
+    assert table.resolve_destination(destination) == dest_key
+
+
+def test_unknown_destination_gets_generic_row(table):
+    row = table.lookup("Atlantis", 7)
+
+    assert row["destination"] is None
+    assert row["season_type"] == "normal" and row["events"] == []
+    assert table.get_seasonal_info("Atlantis", 7) is None
+
+
+def test_lookup_returns_copies(table):
+    row = table.lookup("kerala", 8)
+    row["season_type"] = "edited"
+    row["events"][0]["impact"] = "edited"
+
+    fresh = table.lookup("kerala", 8)
+    assert fresh["season_type"] == "monsoon"
+    assert fresh["events"][0]["impact"] == "cultural_highlight"
+
+
+def test_shared_table_is_built_once():
+    assert get_seasonality_table() is get_seasonality_table()
+
+
+def test_parse_travel_date():
+    assert parse_travel_date("2026-12-15").month == 12
+    assert parse_travel_date("15/12/2026") is None
+    assert parse_travel_date(None) is None
@@ -0,0 +1,114 @@
+"""
+Tests for the semantic response cache and general inquiry reuse
+"""
+
+import asyncio
+
+import pytest
+
+import utils.cache
+from agents.profile_intake_agent import ProfileIntakeAgent
+from utils.context_store import ContextStore
+from utils.event_bus import EventBus
+from utils.semantic_cache import SemanticCache, normalize_message
+
+
+BEACH_SLOTS = {"query_type": "beach_suggestion", "destination": "Goa"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(utils.cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(ttl=60)
+    cache.set("general_inquiry", "Can you suggest some beach destinations in Goa?", BEACH_SLOTS, "answer")
+    return cache
+
+
+def test_normalize_drops_stopwords_collapses_synonyms_and_sorts():
+    assert normalize_message("Can you recommend some Beaches in GOA?") == "beach goa suggest"
+    assert normalize_message("Hey, hotels please") == normalize_message("hello hotel")
+    assert normalize_message("the of and") == ""
+
+
+def test_same_normalized_message_hits_exactly(cache):
+    assert cache.get("general_inquiry", "Could you recommend beach destinations in Goa", BEACH_SLOTS) == "answer"
+    assert cache.get("general_inquiry", "Goa beach destinations suggest", BEACH_SLOTS, semantic=False) == "answer"
+    assert cache.semantic_hits == 0
+
+
+def test_slot_or_namespace_mismatch_misses(cache):
+    message = "Can you suggest some beach destinations in Goa?"
+    assert cache.get("general_inquiry", message, {**BEACH_SLOTS, "destination": "Kerala"}) is None
+    assert cache.get("general_inquiry", message, {"query_type": "general", "destination": "Goa"}) is None
+    assert cache.get("intent", message, BEACH_SLOTS) is None
+
+
+@pytest.mark.parametrize("message, hit", [
+    ("suggest beach destination in goa now", True),       # similarity ~0.91
+    ("suggest beachy destinations in Goa", True),         # ~0.90
+    ("suggest quiet beach destinations in Goa", False),   # ~0.89
+    ("suggest beach destinations for families in Goa", False),
+    ("what are the best beaches", False)
+])
+def test_near_duplicates_at_similarity_threshold(cache, message, hit):
+    assert (cache.get("general_inquiry", message, BEACH_SLOTS) == "answer") is hit
+    assert cache.semantic_hits == int(hit)
+
+
+def test_semantic_matching_can_be_disabled(cache):
+    assert cache.get("general_inquiry", "suggest beach destination in goa now", BEACH_SLOTS, semantic=False) is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SemanticCache(ttl=60)
+    cache.set("intent", "plan a trip to Goa", None, "trip_planning")
+
+    clock.now += 59
+    assert cache.get("intent", "plan trip Goa") == "trip_planning"
+    clock.now += 2
+    assert cache.get("intent", "plan trip Goa") is None
+    assert cache.get("intent", "plan a trip to Goa now") is None
+    assert cache.stats()["entries"] == 0
+
+
+class FakeLlmClient:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def send_message(self, message):
+        self.calls.append(message.text)
+        return f"answer {len(self.calls)}"
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = ProfileIntakeAgent(ContextStore(), EventBus())
+    agent.llm_calls = []
+    monkeypatch.setattr(agent, "_get_llm_client", lambda session_id: FakeLlmClient(agent.llm_calls))
+    return agent
+
+
+def ask(agent, session_id, message):
+    return asyncio.run(agent._handle_general_inquiry(session_id, message, {})).chat_text
+
+
+def test_general_inquiry_reuses_answers_only_for_the_same_question(agent):
+    first = ask(agent, "user-a", "What documents do I need for an international trip?")
+
+    assert ask(agent, "user-b", "what documents do i need for international trips") == first
+    assert ask(agent, "user-c", "What documents do I need for an international trip with kids?") != first
+    assert len(agent.llm_calls) == 2
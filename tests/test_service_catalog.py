@@ -0,0 +1,112 @@
+"""
+Tests for catalog inverted-index filters and heap top-k
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.seasonality import normalize_destination
+from utils.service_catalog import ServiceCatalog, get_service_catalog, price_band
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return get_service_catalog()
+
+
+def linear_scan(catalog, location_key, service_type=None, band=None, features=()):
+    """Reference filter: check every row"""
+    wanted = {feature.lower() for feature in features}
+    return [
+        row_id for row_id in range(len(catalog))
+        if normalize_destination(catalog.locations[row_id]) == location_key
+        and (not service_type or catalog.types[row_id] == service_type)
+        and (not band or catalog.price_bands[row_id] == band)
+        and wanted <= {feature.lower() for feature in catalog.features[row_id]}
+    ]
+
+
+@pytest.mark.parametrize("location, service_type, band, features", [
+    ("goa", None, None, []),
+    ("Goa", "accommodation", None, []),
+    ("kerala", "accommodation", "luxury", []),
+    ("goa", "accommodation", None, ["pool", "Spa"]),
+    ("rajasthan", "activities", "budget", []),
+    ("manali", "transportation", "moderate", []),
+])
+def test_filter_matches_linear_scan(catalog, location, service_type, band, features):
+    row_ids = catalog.filter(location, service_type, band, features)
+
+    assert row_ids.tolist() == linear_scan(catalog, catalog.resolve_location(location), service_type, band, features)
+
+
+def test_filter_matches_linear_scan_for_every_type_and_band(catalog):
+    for location, service_type, band in itertools.product(
+            catalog.location_index, ["accommodation", "activities", "transportation"], ["budget", "moderate", "luxury"]):
+        assert catalog.filter(location, service_type, band).tolist() == linear_scan(catalog, location, service_type, band)
+
+
+def test_free_text_locations_resolve_through_the_seasonality_table(catalog):
+    assert catalog.resolve_location("Jaipur") == "rajasthan"
+    assert catalog.filter("Jaipur, India", "accommodation").tolist() == catalog.filter("rajasthan", "accommodation").tolist()
+
+
+def test_unknown_filters_return_nothing(catalog):
+    assert len(catalog.filter("Atlantis")) == 0
+    assert len(catalog.filter("goa", "spaceflight")) == 0
+    assert len(catalog.filter("goa", features=["Helipad"])) == 0
+
+
+def test_price_bands():
+    assert price_band("accommodation", 2999) == "budget"
+    assert price_band("accommodation", 8000) == "moderate"
+    assert price_band("accommodation", 8001) == "luxury"
+    assert price_band("unknown", 3000) == "moderate"
+
+
+def test_top_k_matches_full_sort_with_catalog_order_ties(catalog):
+    rng = np.random.default_rng(3)
+    row_ids = np.arange(len(catalog))
+    scores = rng.integers(0, 5, size=len(catalog)).astype(np.float32)  # many ties
+
+    expected = sorted(row_ids.tolist(), key=lambda row_id: (-scores[row_id], row_id))
+    for k in (1, 5, 20, len(catalog) + 5):
+        assert catalog.top_k(row_ids, scores, k) == expected[:k]
+
+
+def test_query_ranks_by_rating_by_default(catalog):
+    services = catalog.query("goa", "accommodation", k=3)
+
+    ratings = [service["rating"] for service in services]
+    assert len(services) == 3 and ratings == sorted(ratings, reverse=True)
+    assert ratings[0] == pytest.approx(catalog.rating[catalog.filter("goa", "accommodation")].max(), abs=0.05)
+    assert services[0]["similarity_score"] == pytest.approx(ratings[0] / 5.0, abs=1e-3)
+    assert services[0]["booking_info"]["contact"].endswith("@example.com")
+
+
+def test_query_uses_score_fn(catalog):
+    cheapest_first = catalog.query("goa", "accommodation", score_fn=lambda rows: -catalog.price[rows], k=2)
+
+    prices = sorted(int(catalog.price[row_id]) for row_id in catalog.filter("goa", "accommodation"))
+    assert [service["price"] for service in cheapest_first] == prices[:2]
+    assert catalog.query("Atlantis", score_fn=lambda rows: catalog.price[rows]) == []
+
+
+def test_catalog_loads_from_any_csv(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "id,name,type,location,rating,price,features,description,contact,advance_booking\n"
+        "a,Alpha Stay,accommodation,Goa,4.0,2500,Pool|WiFi,Alpha,a@example.com,1 day\n"
+        "b,Beta Stay,accommodation,goa,4.5,9000,Pool,Beta,b@example.com,1 day\n"
+        "c,Gamma Tour,activities,kerala,4.9,1000,,Gamma,c@example.com,same day\n"
+    )
+
+    catalog = ServiceCatalog(str(path))
+
+    assert len(catalog) == 3
+    assert catalog.filter("goa", features=["pool"]).tolist() == [0, 1]
+    assert catalog.filter("goa", "accommodation", "luxury").tolist() == [1]
+    assert [service["id"] for service in catalog.query("goa")] == ["b", "a"]
+    assert catalog.features[2] == []
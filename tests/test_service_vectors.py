@@ -0,0 +1,108 @@
+"""
+Tests for service/profile vectors and cosine similarity ranking
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.service_selection_agent import ServiceSelectionAgent
+from utils.service_vectors import AXIS_INDEX, BUDGET_OFFSET, FEATURE_NAMES, QUALITY_INDEX, ServiceVectorizer
+
+
+@pytest.fixture
+def vectorizer():
+    return ServiceVectorizer()
+
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+SPA_RESORT = {"name": "Lagoon Resort", "features": ["Spa", "Pool"], "description": "Ayurveda retreat",
+              "price_band": "luxury", "rating": 4.8}
+TREK = {"name": "Ridge Trek", "features": ["Guide"], "description": "Mountain trek with camping",
+        "price_band": "budget", "rating": 4.2}
+MARKET_TOUR = {"name": "Old Town Walk", "features": ["Street Food"], "description": "Heritage market walk",
+               "price_band": "budget", "rating": 3.0}
+
+RELAXED_LUXURY = {"vacation_style": "relaxing", "interests": ["spa"], "budget_level": "luxury"}
+ADVENTUROUS_BUDGET = {"vacation_style": "adventurous", "interests": ["hiking"], "budget_level": "budget"}
+
+
+def test_service_vector_axes(vectorizer):
+    vector = vectorizer.encode_service(*[SPA_RESORT[key] for key in ("name", "features", "description", "price_band", "rating")])
+
+    assert vector.shape == (len(FEATURE_NAMES),)
+    assert vector[AXIS_INDEX["relaxation"]] == 1.0 and vector[AXIS_INDEX["adventure"]] == 0.0
+    assert vector[BUDGET_OFFSET + 2] == 1.0  # luxury band
+    assert vector[QUALITY_INDEX] == pytest.approx(0.9)
+
+
+def test_rows_are_unit_length_so_dot_product_is_cosine(vectorizer):
+    services = [SPA_RESORT, TREK, MARKET_TOUR]
+    raw = np.stack([vectorizer.encode_service(*[s[key] for key in ("name", "features", "description", "price_band", "rating")])
+                    for s in services])
+    profile = vectorizer.encode_profile(RELAXED_LUXURY)
+
+    matrix = vectorizer.encode_services(services)
+
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    assert np.linalg.norm(profile) == pytest.approx(1.0)
+    assert np.allclose(matrix @ profile, [cosine(row, profile) for row in raw], atol=1e-6)
+
+
+def test_similarity_ranks_services_for_matching_profiles(vectorizer):
+    matrix = vectorizer.encode_services([SPA_RESORT, TREK, MARKET_TOUR])
+
+    relaxed = matrix @ vectorizer.encode_profile(RELAXED_LUXURY)
+    adventurous = matrix @ vectorizer.encode_profile(ADVENTUROUS_BUDGET)
+
+    assert int(np.argmax(relaxed)) == 0
+    assert int(np.argmax(adventurous)) == 1
+    assert np.all((relaxed >= -1e-6) & (relaxed <= 1 + 1e-6))
+
+
+def test_empty_inputs(vectorizer):
+    assert vectorizer.encode_services([]).shape == (0, len(FEATURE_NAMES))
+    profile = vectorizer.encode_profile({})
+    assert profile[QUALITY_INDEX] > 0 and np.linalg.norm(profile) == pytest.approx(1.0)
+
+
+def test_profile_vectors_are_cached_by_fingerprint(vectorizer):
+    first = vectorizer.encode_profile({"interests": ["spa", "food"], "budget_level": "luxury"})
+    second = vectorizer.encode_profile({"budget_level": "luxury", "interests": ["spa", "food"]})
+
+    assert second is first
+    assert vectorizer.profile_cache.hits == 1
+
+
+def test_match_reasons_follow_the_strongest_axes(vectorizer):
+    services = vectorizer.encode_services([SPA_RESORT, MARKET_TOUR])
+    profile = vectorizer.encode_profile(RELAXED_LUXURY)
+
+    assert vectorizer.match_reasons(services[0], profile, "luxury") == ["Relaxing and rejuvenating", "Fits your luxury budget"]
+    assert vectorizer.match_reasons(services[1], vectorizer.encode_profile({"vacation_style": "none"}), "moderate") == ["Popular choice"]
+
+
+def test_catalog_recommendations_are_ordered_by_similarity():
+    agent = ServiceSelectionAgent()
+
+    services = asyncio.run(agent.get_service_recommendations("s1", "accommodation", "Goa", RELAXED_LUXURY))
+
+    scores = [service["similarity_score"] for service in services]
+    assert scores == sorted(scores, reverse=True)
+    profile = agent.vectorizer.encode_profile(RELAXED_LUXURY)
+    best = agent.catalog.row_by_id[services[0]["id"]]
+    assert scores[0] == pytest.approx(float(agent.catalog.vectors[best] @ profile), abs=1e-3)
+    assert all(service["match_reasons"] for service in services)
+
+
+def test_fallback_services_are_ranked_the_same_way():
+    agent = ServiceSelectionAgent()
+
+    services = asyncio.run(agent.get_service_recommendations("s1", "activities", "Atlantis", ADVENTUROUS_BUDGET))
+
+    scores = [service["similarity_score"] for service in services]
+    assert services and scores == sorted(scores, reverse=True)